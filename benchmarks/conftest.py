@@ -0,0 +1,66 @@
+import asyncio
+from collections.abc import Callable, Coroutine, Generator
+from typing import Any, TypeVar
+
+import pytest
+from sqlalchemy import Engine, create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.pool import StaticPool
+
+T = TypeVar("T")
+
+AsyncRunner = Callable[[Coroutine[Any, Any, T]], T]
+
+
+class BenchmarkBaseModel(DeclarativeBase):
+    pass
+
+
+class Item(BenchmarkBaseModel):
+    __tablename__ = "items"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    name: Mapped[str]
+
+
+@pytest.fixture(scope="session")
+def run() -> Generator[AsyncRunner]:
+    # pytest-benchmark only measures synchronous callables, so the async workloads
+    # are driven through a dedicated event loop shared by the whole session
+    loop = asyncio.new_event_loop()
+
+    yield loop.run_until_complete
+
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def db_engine(run: AsyncRunner) -> Generator[AsyncEngine]:
+    # StaticPool is needed so that all connections share the same in-memory database
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def create_tables() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(BenchmarkBaseModel.metadata.create_all)
+
+    run(create_tables())
+
+    yield engine
+
+    run(engine.dispose())
+
+
+@pytest.fixture(scope="session")
+def sync_db_engine() -> Generator[Engine]:
+    # A sync driver runs the statements in the calling thread, unlike aiosqlite whose thread hops
+    # take much longer than the statements themselves and so hide the overhead of the capture
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    with engine.begin() as conn:
+        BenchmarkBaseModel.metadata.create_all(conn)
+        conn.execute(insert(Item), [{"name": f"item-{i}"} for i in range(10)])
+
+    yield engine
+
+    engine.dispose()
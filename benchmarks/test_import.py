@@ -0,0 +1,32 @@
+"""Benchmarks for the time it takes to import the plugin.
+
+The pytest11 entry point imports the plugin module in every pytest process, including xdist
+workers and runs which never use the fixtures, so it should stay as cheap to import as possible.
+Every round imports the module in a fresh interpreter, so nothing is cached between rounds.
+"""
+
+import subprocess  # noqa: S404
+import sys
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+
+@pytest.mark.benchmark(group="import")
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import pytest",
+        "import pytest_capsqlalchemy.plugin",
+        "from pytest_capsqlalchemy import SQLAlchemyCapturer",
+    ],
+    ids=["pytest", "plugin", "capturer"],
+)
+def test_import(benchmark: BenchmarkFixture, statement: str) -> None:
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", statement],),
+        kwargs={"check": True},
+        rounds=20,
+        warmup_rounds=2,
+    )
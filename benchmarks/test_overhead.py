@@ -0,0 +1,192 @@
+"""Benchmarks for the overhead the plugin adds to every test using it.
+
+All benchmarks run against an in-memory SQLite database, so no external services are needed.
+Run them with `make benchmark`, which also writes the results to `benchmark.json` so they can
+be compared between revisions.
+"""
+
+import time
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+from sqlalchemy import Engine, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.conftest import AsyncRunner, Item
+from pytest_capsqlalchemy import SQLAlchemyCaptureContext, SQLAlchemyCapturer, SQLExpression
+
+STATEMENTS_PER_ROUND = 100
+LARGE_CAPTURE_TRANSACTIONS = 2_500  # 4 statements per transaction -> 10k captured statements
+
+# How much time the capture may add to every statement of a test, in seconds
+MAX_CAPTURE_OVERHEAD_PER_STATEMENT = 10e-6
+
+
+async def execute_statements(engine: AsyncEngine, count: int) -> None:
+    async with engine.connect() as conn:
+        for i in range(count):
+            await conn.execute(select(literal(i)))
+
+
+async def execute_mixed_transactions(engine: AsyncEngine, count: int) -> None:
+    async with engine.connect() as conn:
+        for i in range(count):
+            async with conn.begin():
+                await conn.execute(select(Item).where(Item.id == i))
+                await conn.execute(insert(Item).values(name=f"item-{i}"))
+
+
+def execute_sync_reads(engine: Engine, count: int) -> None:
+    # The statement is only built once, so that executing it is mostly the work of the listeners and the driver
+    statement = select(Item).where(Item.id == 1)
+
+    with engine.connect() as conn:
+        for _ in range(count):
+            conn.execute(statement).all()
+
+
+@pytest.fixture(scope="module")
+def captured_expressions(run: AsyncRunner, db_engine: AsyncEngine) -> list[SQLExpression]:
+    with SQLAlchemyCaptureContext(db_engine) as ctx:
+        run(execute_mixed_transactions(db_engine, 25))
+
+    return ctx.captured_expressions
+
+
+@pytest.fixture(scope="module")
+def large_capture(run: AsyncRunner, db_engine: AsyncEngine) -> SQLAlchemyCaptureContext:
+    with SQLAlchemyCaptureContext(db_engine) as ctx:
+        run(execute_mixed_transactions(db_engine, LARGE_CAPTURE_TRANSACTIONS))
+
+    return ctx
+
+
+@pytest.mark.benchmark(group="listener")
+def test_execute_without_capture(benchmark: BenchmarkFixture, run: AsyncRunner, db_engine: AsyncEngine) -> None:
+    benchmark.extra_info["statements"] = STATEMENTS_PER_ROUND
+
+    benchmark(lambda: run(execute_statements(db_engine, STATEMENTS_PER_ROUND)))
+
+
+@pytest.mark.benchmark(group="listener")
+def test_execute_with_capture(benchmark: BenchmarkFixture, run: AsyncRunner, db_engine: AsyncEngine) -> None:
+    benchmark.extra_info["statements"] = STATEMENTS_PER_ROUND
+
+    with SQLAlchemyCaptureContext(db_engine) as ctx:
+        benchmark.pedantic(
+            lambda: run(execute_statements(db_engine, STATEMENTS_PER_ROUND)),
+            setup=ctx.clear,
+            rounds=100,
+            warmup_rounds=5,
+        )
+
+
+@pytest.mark.benchmark(group="overhead")
+def test_capture_overhead(benchmark: BenchmarkFixture, sync_db_engine: Engine) -> None:
+    # Unlike the benchmarks above, this one fails when the work done by the listeners for every statement
+    # of the default capture exceeds its budget. The statements are executed without capture before every
+    # round, so that both timings are affected by the same noise of the machine
+    benchmark.extra_info["statements"] = STATEMENTS_PER_ROUND
+    ctx = SQLAlchemyCaptureContext(sync_db_engine)
+    uncaptured_times: list[float] = []
+
+    def execute_uncaptured() -> None:
+        ctx.clear()
+        started_at = time.perf_counter()
+        execute_sync_reads(sync_db_engine, STATEMENTS_PER_ROUND)
+        uncaptured_times.append(time.perf_counter() - started_at)
+
+    def execute_captured() -> None:
+        with ctx:
+            execute_sync_reads(sync_db_engine, STATEMENTS_PER_ROUND)
+
+    benchmark.pedantic(execute_captured, setup=execute_uncaptured, rounds=200, warmup_rounds=10)
+
+    if benchmark.disabled or benchmark.stats is None:
+        pytest.skip("the capture overhead is only measured when benchmarking is enabled")
+
+    overhead_per_statement = (benchmark.stats.stats.min - min(uncaptured_times)) / STATEMENTS_PER_ROUND
+    benchmark.extra_info["overhead_per_statement"] = overhead_per_statement
+
+    assert overhead_per_statement < MAX_CAPTURE_OVERHEAD_PER_STATEMENT
+
+
+@pytest.mark.benchmark(group="listener")
+def test_execute_with_nested_capture(benchmark: BenchmarkFixture, run: AsyncRunner, db_engine: AsyncEngine) -> None:
+    benchmark.extra_info["statements"] = STATEMENTS_PER_ROUND
+
+    with SQLAlchemyCaptureContext(db_engine) as ctx:
+        capturer = SQLAlchemyCapturer(ctx)
+
+        def execute_nested() -> None:
+            with capturer:
+                run(execute_statements(db_engine, STATEMENTS_PER_ROUND))
+
+        benchmark.pedantic(execute_nested, setup=ctx.clear, rounds=100, warmup_rounds=5)
+
+
+@pytest.mark.benchmark(group="capturer")
+def test_capturer_enter_exit(benchmark: BenchmarkFixture, db_engine: AsyncEngine) -> None:
+    with SQLAlchemyCaptureContext(db_engine) as ctx:
+        capturer = SQLAlchemyCapturer(ctx)
+
+        def enter_exit() -> None:
+            with capturer:
+                pass
+
+        benchmark(enter_exit)
+
+
+@pytest.mark.benchmark(group="expression")
+def test_expression_type(benchmark: BenchmarkFixture, captured_expressions: list[SQLExpression]) -> None:
+    benchmark.extra_info["statements"] = len(captured_expressions)
+
+    benchmark(lambda: [expr.type for expr in captured_expressions])
+
+
+@pytest.mark.benchmark(group="expression")
+@pytest.mark.parametrize("bind_params", [False, True], ids=["placeholders", "bind_params"])
+def test_expression_get_sql(
+    benchmark: BenchmarkFixture, captured_expressions: list[SQLExpression], bind_params: bool
+) -> None:
+    benchmark.extra_info["statements"] = len(captured_expressions)
+
+    benchmark(lambda: [expr.get_sql(bind_params=bind_params) for expr in captured_expressions])
+
+
+@pytest.mark.benchmark(group="expression")
+def test_expression_get_sql_without_dialect(
+    benchmark: BenchmarkFixture, captured_expressions: list[SQLExpression]
+) -> None:
+    # Expressions created manually have neither a dialect nor a captured statement, so they are always compiled
+    expressions = [SQLExpression(expr.executable, expr.params, expr.multiparams) for expr in captured_expressions]
+    benchmark.extra_info["statements"] = len(expressions)
+
+    benchmark(lambda: [expr.get_sql() for expr in expressions])
+
+
+@pytest.mark.benchmark(group="assertions")
+def test_assert_query_count(benchmark: BenchmarkFixture, large_capture: SQLAlchemyCaptureContext) -> None:
+    capturer = SQLAlchemyCapturer(large_capture)
+    expected_count = len(large_capture.captured_expressions)
+    benchmark.extra_info["statements"] = expected_count
+
+    benchmark(capturer.assert_query_count, expected_count)
+
+
+@pytest.mark.benchmark(group="assertions")
+def test_assert_query_types(benchmark: BenchmarkFixture, large_capture: SQLAlchemyCaptureContext) -> None:
+    capturer = SQLAlchemyCapturer(large_capture)
+    expected_types = ["BEGIN", "SELECT", "INSERT", "COMMIT"] * LARGE_CAPTURE_TRANSACTIONS
+    benchmark.extra_info["statements"] = len(expected_types)
+
+    benchmark(capturer.assert_query_types, *expected_types)
+
+
+@pytest.mark.benchmark(group="assertions")
+def test_assert_captured_queries(benchmark: BenchmarkFixture, large_capture: SQLAlchemyCaptureContext) -> None:
+    capturer = SQLAlchemyCapturer(large_capture)
+    expected_queries = [expr.get_sql() for expr in large_capture.captured_expressions]
+    benchmark.extra_info["statements"] = len(expected_queries)
+
+    benchmark(capturer.assert_captured_queries, *expected_queries)
@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import Engine, create_engine, text
+
+
+@pytest.fixture(scope="session")
+def primary_engine() -> Engine:
+    return create_engine("sqlite://")
+
+
+@pytest.fixture(scope="session")
+def replica_engine() -> Engine:
+    return create_engine("sqlite://")
+
+
+@pytest.fixture
+def capsqlalchemy_engines(primary_engine, replica_engine):
+    return {"primary": primary_engine, "replica": replica_engine}
+
+
+def test_capsqlalchemy_setup(capsqlalchemy):
+    assert set(capsqlalchemy.engines) == {"primary", "replica"}
+
+
+def test_capsqlalchemy_counts_per_engine(capsqlalchemy, primary_engine, replica_engine):
+    with replica_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+
+    with primary_engine.begin() as conn:
+        conn.execute(text("SELECT 3"))
+
+    capsqlalchemy.assert_query_count(3, include_tcl=False)
+    capsqlalchemy.assert_query_count(2, include_tcl=False, engine="replica")
+    capsqlalchemy.assert_query_types("BEGIN", "UNKNOWN", "COMMIT", engine="primary")
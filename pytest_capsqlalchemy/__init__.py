@@ -1,12 +1,58 @@
-from pytest_capsqlalchemy.capturer import SQLAlchemyCapturer
-from pytest_capsqlalchemy.context import SQLAlchemyCaptureContext
-from pytest_capsqlalchemy.expression import SQLExpression
-from pytest_capsqlalchemy.plugin import capsqlalchemy, capsqlalchemy_context
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_capsqlalchemy.benchmark import BenchmarkResult
+    from pytest_capsqlalchemy.capturer import SQLAlchemyCapturer
+    from pytest_capsqlalchemy.context import SQLAlchemyCaptureContext
+    from pytest_capsqlalchemy.expression import SQLExpression
+    from pytest_capsqlalchemy.latency import SimulatedLatency
+    from pytest_capsqlalchemy.orm import SessionFlush
+    from pytest_capsqlalchemy.plugin import capsqlalchemy, capsqlalchemy_context
+    from pytest_capsqlalchemy.timeout import StatementTimeout, StatementTimeoutError
+    from pytest_capsqlalchemy.workload import Workload
 
 __all__ = [
+    "BenchmarkResult",
     "SQLAlchemyCaptureContext",
     "SQLAlchemyCapturer",
     "SQLExpression",
+    "SessionFlush",
+    "SimulatedLatency",
+    "StatementTimeout",
+    "StatementTimeoutError",
+    "Workload",
     "capsqlalchemy",
     "capsqlalchemy_context",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # The pytest11 entry point imports the plugin module, and with it this package, in every pytest
+    # process. The public names are only imported when first accessed, so that SQLAlchemy and the
+    # capture machinery are not imported by runs which never use the fixtures.
+    modules = {
+        "BenchmarkResult": "pytest_capsqlalchemy.benchmark",
+        "SQLAlchemyCaptureContext": "pytest_capsqlalchemy.context",
+        "SQLAlchemyCapturer": "pytest_capsqlalchemy.capturer",
+        "SQLExpression": "pytest_capsqlalchemy.expression",
+        "SessionFlush": "pytest_capsqlalchemy.orm",
+        "SimulatedLatency": "pytest_capsqlalchemy.latency",
+        "StatementTimeout": "pytest_capsqlalchemy.timeout",
+        "StatementTimeoutError": "pytest_capsqlalchemy.timeout",
+        "Workload": "pytest_capsqlalchemy.workload",
+        "capsqlalchemy": "pytest_capsqlalchemy.plugin",
+        "capsqlalchemy_context": "pytest_capsqlalchemy.plugin",
+    }
+
+    if name not in modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(modules[name]), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
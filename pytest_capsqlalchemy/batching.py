@@ -0,0 +1,120 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import Insert
+
+from pytest_capsqlalchemy.expression import CallSite, SQLExpression, SQLExpressionType
+from pytest_capsqlalchemy.utils import get_values_columns, has_multi_values
+
+_WRITE_TYPES = frozenset({SQLExpressionType.INSERT, SQLExpressionType.UPDATE, SQLExpressionType.DELETE})
+
+
+@dataclass
+class UnbatchedWriteRun:
+    """A run of consecutive, structurally identical single-row write statements.
+
+    Such runs are usually caused by writing rows one by one in a loop (e.g. flushing the ORM session
+    after every object) and could have been executed as a single bulk statement or `executemany` instead.
+    """
+
+    type: SQLExpressionType
+    table: str
+    columns: tuple[str, ...]
+    engine_name: Optional[str]
+    expressions: list[SQLExpression] = field(repr=False)
+
+    @property
+    def count(self) -> int:
+        """The number of statements in the run."""
+        return len(self.expressions)
+
+    @property
+    def call_site(self) -> Optional[CallSite]:
+        """The location in the application code which executed the first statement of the run."""
+        return self.expressions[0].call_site
+
+    def __str__(self) -> str:
+        target = f"{self.table} ({', '.join(self.columns)})" if self.columns else self.table
+        location = f" at {self.call_site}" if self.call_site is not None else ""
+
+        return f"{self.count} x {self.type._value_} {target}{location}"
+
+
+def _get_written_columns(expression: SQLExpression) -> tuple[str, ...]:
+    table = getattr(expression.executable, "table", None)
+    table_columns = getattr(table, "c", None)
+
+    column_names = dict.fromkeys(expression.multiparams[0] if expression.multiparams else expression.params)
+
+    # Values given directly to the statement (e.g. `insert(...).values(...)`) are not part of the parameters
+    for column_name in get_values_columns(expression.executable):
+        column_names[column_name] = None
+
+    if table_columns is None:  # pragma: no cover
+        return tuple(column_names)
+
+    # The parameters of UPDATE/DELETE statements also include the values of the WHERE clause
+    return tuple(name for name in column_names if name in table_columns)
+
+
+def _is_single_row_write(expression: SQLExpression) -> bool:
+    if expression.type not in _WRITE_TYPES or len(expression.multiparams) > 1:
+        return False
+
+    # INSERT statements with multiple VALUES rows are already batched
+    return not (isinstance(expression.executable, Insert) and has_multi_values(expression.executable))
+
+
+def find_unbatched_writes(expressions: Iterable[SQLExpression], *, min_run: int = 3) -> list[UnbatchedWriteRun]:
+    """Find runs of structurally identical single-row INSERT, UPDATE or DELETE statements.
+
+    Two statements are structurally identical when they were executed on the same engine and write
+    to the same table and set of columns with the same SQL. Transaction control statements (BEGIN,
+    COMMIT, ROLLBACK) don't break a run, so committing after every row is detected as well, but any
+    other statement does -- e.g. the SELECT in between the UPDATEs of an N+1 loop.
+
+    Args:
+        expressions: The captured SQL expressions to analyze, in the order they were executed.
+        min_run: The minimum number of consecutive identical statements to report as a run.
+
+    Returns:
+        All runs with at least `min_run` statements, in the order they were executed.
+
+    Raises:
+        ValueError: If `min_run` is less than 2.
+    """
+    if min_run < 2:
+        raise ValueError(f"A run of unbatched writes needs at least 2 statements, got min_run={min_run}")
+
+    runs = []
+    current_run: Optional[UnbatchedWriteRun] = None
+    current_signature: Optional[tuple[object, ...]] = None
+
+    for expression in expressions:
+        if expression.type.is_tcl:
+            continue
+
+        if not _is_single_row_write(expression):
+            current_run = current_signature = None
+            continue
+
+        table = expression.tables[0] if expression.tables else "<unknown>"
+        columns = _get_written_columns(expression)
+        signature = (expression.engine_name, expression.type, table, columns, expression.get_sql())
+
+        if current_run is not None and signature == current_signature:
+            current_run.expressions.append(expression)
+            continue
+
+        current_signature = signature
+        current_run = UnbatchedWriteRun(
+            type=expression.type,
+            table=table,
+            columns=columns,
+            engine_name=expression.engine_name,
+            expressions=[expression],
+        )
+        runs.append(current_run)
+
+    return [run for run in runs if run.count >= min_run]
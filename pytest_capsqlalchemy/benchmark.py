@@ -0,0 +1,156 @@
+import statistics
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Optional
+
+if sys.version_info >= (3, 11):  # pragma: no cover
+    from typing import Self
+else:  # pragma: no cover
+    from typing_extensions import Self
+
+from pytest_capsqlalchemy.expression import SQLExpression
+
+
+@dataclass(frozen=True)
+class BenchmarkStats:
+    """Summary statistics of a single metric measured across all benchmark rounds."""
+
+    min: float
+    median: float
+    p95: float
+    stdev: float
+
+    @classmethod
+    def from_samples(cls, samples: Sequence[float]) -> Self:
+        """Compute the summary statistics for the given samples.
+
+        Args:
+            samples: The values measured in each round. Must contain at least one value.
+
+        Returns:
+            The summary statistics of the samples.
+
+        Raises:
+            ValueError: If no samples are given.
+        """
+        if not samples:
+            raise ValueError("At least one sample is required to compute benchmark statistics")
+
+        if len(samples) == 1:
+            return cls(min=samples[0], median=samples[0], p95=samples[0], stdev=0.0)
+
+        return cls(
+            min=min(samples),
+            median=statistics.median(samples),
+            p95=statistics.quantiles(samples, n=100, method="inclusive")[94],
+            stdev=statistics.stdev(samples),
+        )
+
+    def __str__(self) -> str:
+        return f"min={self.min:.6f}, median={self.median:.6f}, p95={self.p95:.6f}, stdev={self.stdev:.6f}"
+
+
+@dataclass
+class BenchmarkRound:
+    """The measurements of a single benchmark round.
+
+    All times are in seconds. The database time is the sum of the time the database took to execute
+    each of the statements captured during the round. The projected database time adds the network
+    latency simulated for their round trips, if any.
+    """
+
+    wall_time: float
+    db_time: float
+    statement_count: int
+    captured_expressions: list[SQLExpression] = field(repr=False)
+    projected_db_time: Optional[float] = None
+
+
+@dataclass
+class BenchmarkResult:
+    """The result of running a callable repeatedly with `SQLAlchemyCapturer.benchmark`.
+
+    Provides summary statistics across all the measured rounds (warmup rounds excluded) and assertions
+    on them, which are a lot less noisy than assertions on timings from a single run.
+
+    See [`SQLAlchemyCapturer.benchmark`][pytest_capsqlalchemy.capturer.SQLAlchemyCapturer.benchmark].
+    """
+
+    rounds: list[BenchmarkRound]
+
+    @property
+    def wall_time(self) -> BenchmarkStats:
+        """Statistics of the total time taken by each round, in seconds."""
+        return BenchmarkStats.from_samples([benchmark_round.wall_time for benchmark_round in self.rounds])
+
+    @property
+    def db_time(self) -> BenchmarkStats:
+        """Statistics of the time the database took to execute the statements of each round, in seconds."""
+        return BenchmarkStats.from_samples([benchmark_round.db_time for benchmark_round in self.rounds])
+
+    @property
+    def projected_db_time(self) -> BenchmarkStats:
+        """Statistics of the database time of each round including the simulated network latency, in seconds.
+
+        Same as `db_time` when no network latency was simulated.
+        """
+        return BenchmarkStats.from_samples([
+            benchmark_round.projected_db_time
+            if benchmark_round.projected_db_time is not None
+            else benchmark_round.db_time
+            for benchmark_round in self.rounds
+        ])
+
+    @property
+    def statement_count(self) -> BenchmarkStats:
+        """Statistics of the number of statements captured in each round."""
+        return BenchmarkStats.from_samples([benchmark_round.statement_count for benchmark_round in self.rounds])
+
+    def assert_p95_db_time_below(self, max_db_time: float) -> None:
+        """Asserts that the 95th percentile of the database time per round is below the given value.
+
+        Args:
+            max_db_time: The maximum allowed database time, in seconds.
+
+        Raises:
+            AssertionError: If the 95th percentile of the database time is not below `max_db_time`.
+        """
+        db_time = self.db_time
+
+        assert db_time.p95 < max_db_time, (
+            f"p95 DB time is {db_time.p95:.6f}s, expected below {max_db_time:.6f}s "
+            f"({len(self.rounds)} rounds: {db_time})"
+        )
+
+    def assert_p95_projected_db_time_below(self, max_db_time: float) -> None:
+        """Asserts that the 95th percentile of the projected database time per round is below the given value.
+
+        Args:
+            max_db_time: The maximum allowed projected database time, in seconds.
+
+        Raises:
+            AssertionError: If the 95th percentile of the projected database time is not below `max_db_time`.
+        """
+        projected_db_time = self.projected_db_time
+
+        assert projected_db_time.p95 < max_db_time, (
+            f"p95 projected DB time is {projected_db_time.p95:.6f}s, expected below {max_db_time:.6f}s "
+            f"({len(self.rounds)} rounds: {projected_db_time}, measured DB time: {self.db_time})"
+        )
+
+    def assert_p95_wall_time_below(self, max_wall_time: float) -> None:
+        """Asserts that the 95th percentile of the wall time per round is below the given value.
+
+        Args:
+            max_wall_time: The maximum allowed wall time, in seconds.
+
+        Raises:
+            AssertionError: If the 95th percentile of the wall time is not below `max_wall_time`.
+        """
+        wall_time = self.wall_time
+
+        assert wall_time.p95 < max_wall_time, (
+            f"p95 wall time is {wall_time.p95:.6f}s, expected below {max_wall_time:.6f}s "
+            f"({len(self.rounds)} rounds: {wall_time})"
+        )
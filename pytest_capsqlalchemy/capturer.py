@@ -1,16 +1,29 @@
+import inspect
+import os
 import sys
+import time
+from collections.abc import Awaitable, Callable, Iterator, Mapping
 from types import TracebackType
-from typing import Optional, Union
+from typing import Any, Optional, Union, overload
 
 if sys.version_info >= (3, 11):  # pragma: no cover
     from typing import Self
 else:  # pragma: no cover
     from typing_extensions import Self
 
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy import Executable
+from sqlalchemy.exc import CompileError
 
-from pytest_capsqlalchemy.context import SQLAlchemyCaptureContext
+from pytest_capsqlalchemy.batching import find_unbatched_writes
+from pytest_capsqlalchemy.benchmark import BenchmarkResult, BenchmarkRound
+from pytest_capsqlalchemy.context import AnyEngine, SQLAlchemyCaptureContext
 from pytest_capsqlalchemy.expression import SQLExpression, SQLExpressionType
+from pytest_capsqlalchemy.locking import find_lock_order_conflicts, find_locking_transactions
+from pytest_capsqlalchemy.orm import SessionFlush
+from pytest_capsqlalchemy.read_cache import ReadCacheSimulation, simulate_read_cache
+from pytest_capsqlalchemy.report import render_sequence_mismatch
+from pytest_capsqlalchemy.trace import write_chrome_trace
+from pytest_capsqlalchemy.workload import Workload
 
 
 class SQLAlchemyCapturer:
@@ -34,9 +47,17 @@ class SQLAlchemyCapturer:
         self._partial_context = None
 
     @property
-    def engine(self) -> AsyncEngine:
-        """The SQLAlchemy engine instance being captured."""
-        return self._full_test_context._engine
+    def engine(self) -> AnyEngine:
+        """The SQLAlchemy engine instance being captured.
+
+        When several engines are captured, this is the first one -- see `engines` for all of them.
+        """
+        return next(iter(self.engines.values()))
+
+    @property
+    def engines(self) -> Mapping[str, AnyEngine]:
+        """The SQLAlchemy engine instances being captured, by name."""
+        return self._full_test_context.engines
 
     @property
     def captured_expressions(self) -> list[SQLExpression]:
@@ -49,13 +70,109 @@ class SQLAlchemyCapturer:
         This property is useful for performing specific assertions on the captured expressions which
         cannot be easily achieved with the provided assert methods.
         """
-        if self._partial_context is not None:
-            return self._partial_context.captured_expressions
+        return self._current_context.captured_expressions
+
+    @property
+    def _current_context(self) -> SQLAlchemyCaptureContext:
+        return self._partial_context if self._partial_context is not None else self._full_test_context
+
+    @property
+    def flushes(self) -> list[SessionFlush]:
+        """All ORM session flushes captured in the current context.
+
+        Flushes are only captured when enabled with `@pytest.mark.capsqlalchemy(capture_sessions=True)`.
+        """
+        return self._current_context.flushes
+
+    def _make_context(self, *, capture_details: bool = False) -> SQLAlchemyCaptureContext:
+        return SQLAlchemyCaptureContext(
+            self.engines,
+            capture_sessions=self._full_test_context.capture_sessions,
+            capture_details=capture_details or self._full_test_context.capture_details,
+            count_rows=self._full_test_context.count_rows,
+            simulated_latency=self._full_test_context.simulated_latency,
+            statement_timeout=self._full_test_context.statement_timeout,
+        )
+
+    def export_chrome_trace(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        """Write a timeline of the database activity captured in the current context to a Chrome trace file.
+
+        The file can be opened in [Perfetto](https://ui.perfetto.dev) or [speedscope](https://www.speedscope.app)
+        to see when each statement, transaction and connection checkout happened, including the ones of
+        concurrent asyncio tasks. See [`build_chrome_trace`][pytest_capsqlalchemy.trace.build_chrome_trace].
+
+        Requires the details of the expressions to be captured with
+        `@pytest.mark.capsqlalchemy(capture_details=True)`.
+
+        Args:
+            path: The path of the JSON file to write.
+
+        Raises:
+            RuntimeError: If the details of the expressions are not captured.
+        """
+        self._validate_capture_details()
+
+        write_chrome_trace(self._current_context, path)
+
+    def save_workload(self, path: Union[str, "os.PathLike[str]"], *, engine: Optional[str] = None) -> None:
+        """Save the statements captured in the current context as a workload file, to replay them as a load test.
 
-        return self._full_test_context.captured_expressions
+        See [`replay_workload`][pytest_capsqlalchemy.workload.replay_workload]. Requires the details of the
+        expressions to be captured with `@pytest.mark.capsqlalchemy(capture_details=True)`.
+
+        Args:
+            path: The path of the JSON file to write.
+            engine: The name of the engine to save the statements of. Required when several engines
+                with different dialects are captured.
+
+        Raises:
+            RuntimeError: If the details of the expressions are not captured.
+        """
+        self._validate_capture_details()
+
+        Workload.from_expressions(self._iter_expressions(include_tcl=True, engine=engine)).save(path)
+
+    def _validate_capture_sessions(self) -> None:
+        if not self._full_test_context.capture_sessions:
+            raise RuntimeError(
+                f"{self.__class__.__name__}: ORM sessions are not captured, "
+                "enable it with @pytest.mark.capsqlalchemy(capture_sessions=True)"
+            )
+
+    def _validate_capture_details(self) -> None:
+        if not self._full_test_context.capture_details:
+            raise RuntimeError(
+                f"{self.__class__.__name__}: the details of the expressions are not captured, "
+                "enable it with @pytest.mark.capsqlalchemy(capture_details=True)"
+            )
+
+    def _validate_count_rows(self) -> None:
+        if not self._full_test_context.count_rows:
+            raise RuntimeError(
+                f"{self.__class__.__name__}: the consumed rows are not counted, "
+                "enable it with @pytest.mark.capsqlalchemy(count_rows=True)"
+            )
+
+    def _validate_engine_name(self, engine: Optional[str]) -> None:
+        if engine is not None and engine not in self.engines:
+            expected = ", ".join(map(repr, self.engines))
+
+            raise ValueError(f"{self.__class__.__name__}: unknown engine {engine!r}, expected one of {expected}")
+
+    def _iter_expressions(self, *, include_tcl: bool, engine: Optional[str]) -> Iterator[SQLExpression]:
+        self._validate_engine_name(engine)
+
+        for query in self.captured_expressions:
+            if not include_tcl and query.type.is_tcl:
+                continue
+
+            if engine is not None and query.engine_name != engine:
+                continue
+
+            yield query
 
     def __enter__(self) -> Self:
-        self._partial_context = SQLAlchemyCaptureContext(self.engine)
+        self._partial_context = self._make_context()
         self._partial_context = self._partial_context.__enter__()
         return self
 
@@ -74,10 +191,176 @@ class SQLAlchemyCapturer:
 
         return result
 
+    @overload
+    def benchmark(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        rounds: int = ...,
+        warmup: int = ...,
+        include_tcl: bool = ...,
+        engine: Optional[str] = ...,
+    ) -> Awaitable[BenchmarkResult]: ...
+
+    @overload
+    def benchmark(
+        self,
+        fn: Callable[[], Any],
+        *,
+        rounds: int = ...,
+        warmup: int = ...,
+        include_tcl: bool = ...,
+        engine: Optional[str] = ...,
+    ) -> BenchmarkResult: ...
+
+    def benchmark(
+        self,
+        fn: Callable[[], Any],
+        *,
+        rounds: int = 10,
+        warmup: int = 1,
+        include_tcl: bool = True,
+        engine: Optional[str] = None,
+    ) -> Union[BenchmarkResult, Awaitable[BenchmarkResult]]:
+        """Runs a callable repeatedly and measures the SQL expressions executed in each run.
+
+        Every round runs under a fresh capture context, so the measurements of different rounds
+        don't affect each other. The expressions are still captured by the context of the full test
+        (and any enclosing `with capsqlalchemy:` block).
+
+        When `fn` is a coroutine function the result must be awaited:
+
+        ```python
+        result = await capsqlalchemy.benchmark(fetch_orders, rounds=20)
+        result.assert_p95_db_time_below(0.05)
+        ```
+
+        Args:
+            fn: The callable to benchmark, either a regular function or a coroutine function, taking
+                no arguments.
+            rounds: The number of measured rounds.
+            warmup: The number of rounds to run before measuring, e.g. to warm up SQLAlchemy's
+                compiled cache or the connection pool. Their measurements are discarded.
+            include_tcl: Whether to include transaction control language statements (BEGIN,
+                COMMIT, ROLLBACK) in the statement counts.
+            engine: The name of the engine to measure the statements of. When `None` the statements
+                of all captured engines are measured.
+
+        Returns:
+            The measurements of all the rounds, or an awaitable resolving to them if `fn` is a
+            coroutine function.
+
+        Raises:
+            ValueError: If `rounds` is less than 1, `warmup` is negative or `engine` is not a captured engine.
+            TypeError: If `fn` is a regular function returning an awaitable (e.g. a lambda calling a
+                coroutine function), as it's not possible to detect that it needs to be awaited beforehand.
+        """
+        if rounds < 1:
+            raise ValueError(f"{self.__class__.__name__}: at least one benchmark round is required, got {rounds}")
+
+        if warmup < 0:
+            raise ValueError(f"{self.__class__.__name__}: the number of warmup rounds can't be negative, got {warmup}")
+
+        self._validate_engine_name(engine)
+
+        if inspect.iscoroutinefunction(fn):
+            return self._benchmark_async(fn, rounds=rounds, warmup=warmup, include_tcl=include_tcl, engine=engine)
+
+        measured_rounds = []
+
+        for round_index in range(warmup + rounds):
+            with self._make_context(capture_details=True) as round_context:
+                started_at = time.perf_counter()
+                fn_result = fn()
+                wall_time = time.perf_counter() - started_at
+
+            if inspect.iscoroutine(fn_result):
+                fn_result.close()
+
+                raise TypeError(f"{self.__class__.__name__}: async callables to benchmark must be coroutine functions")
+
+            if round_index >= warmup:
+                measured_rounds.append(
+                    self._make_benchmark_round(round_context, wall_time, include_tcl=include_tcl, engine=engine)
+                )
+
+        return BenchmarkResult(rounds=measured_rounds)
+
+    async def _benchmark_async(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        rounds: int,
+        warmup: int,
+        include_tcl: bool,
+        engine: Optional[str],
+    ) -> BenchmarkResult:
+        measured_rounds = []
+
+        for round_index in range(warmup + rounds):
+            with self._make_context(capture_details=True) as round_context:
+                started_at = time.perf_counter()
+                await fn()
+                wall_time = time.perf_counter() - started_at
+
+            if round_index >= warmup:
+                measured_rounds.append(
+                    self._make_benchmark_round(round_context, wall_time, include_tcl=include_tcl, engine=engine)
+                )
+
+        return BenchmarkResult(rounds=measured_rounds)
+
+    @staticmethod
+    def _make_benchmark_round(
+        round_context: SQLAlchemyCaptureContext,
+        wall_time: float,
+        *,
+        include_tcl: bool,
+        engine: Optional[str],
+    ) -> BenchmarkRound:
+        captured_expressions = [
+            query for query in round_context.captured_expressions if engine is None or query.engine_name == engine
+        ]
+
+        return BenchmarkRound(
+            wall_time=wall_time,
+            db_time=sum(query.duration for query in captured_expressions if query.duration is not None),
+            statement_count=sum(1 for query in captured_expressions if include_tcl or not query.type.is_tcl),
+            captured_expressions=captured_expressions,
+            projected_db_time=sum(
+                query.projected_duration for query in captured_expressions if query.projected_duration is not None
+            ),
+        )
+
+    def simulate_read_cache(self, max_size: int = 128, *, engine: Optional[str] = None) -> ReadCacheSimulation:
+        """Replays the captured statements through a simulated read cache, to see which reads are worth caching.
+
+        Each SELECT is looked up in a least recently used cache of `max_size` entries and writes
+        invalidate the cached reads of the tables they write to. See
+        [`simulate_read_cache`][pytest_capsqlalchemy.read_cache.simulate_read_cache] for the details.
+        The time spent on the reads, and so the time saved, is only known when the details of the
+        expressions are captured with `@pytest.mark.capsqlalchemy(capture_details=True)`.
+
+        ```python
+        simulation = capsqlalchemy.simulate_read_cache(max_size=256)
+        print(simulation)  # the hit ratio and database time saved, per fingerprint
+        ```
+
+        Args:
+            max_size: The maximum number of reads the cache holds at once.
+            engine: The name of the engine to replay the statements of. When `None` the statements of
+                all captured engines are replayed.
+
+        Returns:
+            The hit ratio and the database time the cache would have saved, in total and per fingerprint.
+        """
+        return simulate_read_cache(self._iter_expressions(include_tcl=False, engine=engine), max_size=max_size)
+
     def assert_query_types(
         self,
         *expected_query_types: Union[SQLExpressionType, str],
         include_tcl: bool = True,
+        engine: Optional[str] = None,
     ) -> None:
         """Asserts that the captured SQL expressions match the expected query types in order.
 
@@ -88,27 +371,39 @@ class SQLAlchemyCapturer:
             *expected_query_types: Variable number of expected query types
             include_tcl: Whether to include transaction control language statements (BEGIN,
                 COMMIT, ROLLBACK) in the comparison
+            engine: The name of the engine to check the queries of. When `None` the queries of all
+                captured engines are checked.
 
         Raises:
             AssertionError: If the actual query types don't match the expected ones.
         """
-        actual_query_types_values = []
-
-        for query in self.captured_expressions:
-            if not include_tcl and query.type.is_tcl:
-                continue
-
-            actual_query_types_values.append(query.type._value_)
+        actual_query_types_values = [
+            query.type._value_ for query in self._iter_expressions(include_tcl=include_tcl, engine=engine)
+        ]
 
-        # Converting to strings as the error message diff will be shorter and more readable
+        # Converting to strings as the error message will be shorter and more readable
         expected_query_types_values = [
             query_type._value_ if isinstance(query_type, SQLExpressionType) else query_type
             for query_type in expected_query_types
         ]
 
-        assert expected_query_types_values == actual_query_types_values
-
-    def assert_query_count(self, expected_query_count: int, *, include_tcl: bool = True) -> None:
+        if expected_query_types_values != actual_query_types_values:
+            raise AssertionError(
+                render_sequence_mismatch(
+                    "Captured query types don't match the expected ones",
+                    expected_query_types_values,
+                    actual_query_types_values,
+                    group_by_fingerprint=False,
+                )
+            )
+
+    def assert_query_count(
+        self,
+        expected_query_count: int,
+        *,
+        include_tcl: bool = True,
+        engine: Optional[str] = None,
+    ) -> None:
         """Asserts that the number of captured SQL expressions matches the expected count.
 
         This is useful for ensuring that your code is not generating more statements than expected
@@ -118,17 +413,25 @@ class SQLAlchemyCapturer:
             expected_query_count: The expected number of SQL expressions.
             include_tcl: Whether to include transaction control language statements (BEGIN,
                 COMMIT, ROLLBACK) in the count.
+            engine: The name of the engine to count the queries of. When `None` the queries of all
+                captured engines are counted.
 
         Raises:
             AssertionError: If the actual query count doesn't match the expected count.
         """
-        actual_query_count = sum(1 for query in self.captured_expressions if include_tcl or not query.type.is_tcl)
+        actual_query_count = sum(1 for _ in self._iter_expressions(include_tcl=include_tcl, engine=engine))
 
         assert expected_query_count == actual_query_count, (
             f"Query count mismatch: expected {expected_query_count}, got {actual_query_count}"
         )
 
-    def assert_max_query_count(self, expected_max_query_count: int, *, include_tcl: bool = True) -> None:
+    def assert_max_query_count(
+        self,
+        expected_max_query_count: int,
+        *,
+        include_tcl: bool = True,
+        engine: Optional[str] = None,
+    ) -> None:
         """Asserts that the number of captured SQL expressions doesn't exceed the expected count.
 
         This is useful for ensuring that your code is not generating more statements than expected
@@ -139,11 +442,13 @@ class SQLAlchemyCapturer:
             expected_max_query_count: The expected maximum number of SQL expressions.
             include_tcl: Whether to include transaction control language statements (BEGIN,
                 COMMIT, ROLLBACK) in the count.
+            engine: The name of the engine to count the queries of. When `None` the queries of all
+                captured engines are counted.
 
         Raises:
             AssertionError: If the actual query count exceeds the expected maximum count.
         """
-        actual_query_count = sum(1 for query in self.captured_expressions if include_tcl or not query.type.is_tcl)
+        actual_query_count = sum(1 for _ in self._iter_expressions(include_tcl=include_tcl, engine=engine))
 
         assert expected_max_query_count < actual_query_count, (
             f"Query count mismatch: expected maximum {expected_max_query_count}, got {actual_query_count}"
@@ -154,6 +459,7 @@ class SQLAlchemyCapturer:
         *expected_queries: str,
         include_tcl: bool = True,
         bind_params: bool = False,
+        engine: Optional[str] = None,
     ) -> None:
         """Asserts that the captured SQL queries match the expected SQL strings in order.
 
@@ -165,16 +471,310 @@ class SQLAlchemyCapturer:
                 COMMIT, ROLLBACK) in the comparison.
             bind_params: Whether to include bound parameters in the SQL strings. When `False`,
                 parameters are represented as placeholders instead.
+            engine: The name of the engine to check the queries of. When `None` the queries of all
+                captured engines are checked.
 
         Raises:
             AssertionError: If the actual SQL queries don't match the expected ones.
         """
-        actual_queries = []
+        actual_queries = [
+            query.get_sql(bind_params=bind_params)
+            for query in self._iter_expressions(include_tcl=include_tcl, engine=engine)
+        ]
 
-        for query in self.captured_expressions:
-            if not include_tcl and query.type.is_tcl:
-                continue
+        if list(expected_queries) != actual_queries:
+            raise AssertionError(
+                render_sequence_mismatch(
+                    "Captured queries don't match the expected ones", expected_queries, actual_queries
+                )
+            )
 
-            actual_queries.append(query.get_sql(bind_params=bind_params))
+    def assert_captured_statements(
+        self,
+        *expected_statements: Executable,
+        include_tcl: bool = True,
+        ignore_bind_values: bool = False,
+        engine: Optional[str] = None,
+    ) -> None:
+        """Asserts that the captured SQL expressions are the expected SQLAlchemy statements in order.
+
+        Unlike `assert_captured_queries` the statements are compared by their structural cache keys,
+        so nothing has to be compiled to SQL unless they don't match, and the comparison doesn't depend
+        on how the SQL is formatted:
+
+        ```python
+        capsqlalchemy.assert_captured_statements(
+            select(Order).where(Order.id == 123),
+            include_tcl=False,
+        )
+        ```
+
+        Transaction control statements are captured as `text("BEGIN")`, `text("COMMIT")` and
+        `text("ROLLBACK")`. See [`SQLExpression.matches`][pytest_capsqlalchemy.expression.SQLExpression.matches]
+        for how the bind values are compared.
+
+        Args:
+            *expected_statements: Variable number of expected SQLAlchemy statements.
+            include_tcl: Whether to include transaction control language statements (BEGIN,
+                COMMIT, ROLLBACK) in the comparison.
+            ignore_bind_values: Whether to only compare the structure of the statements, ignoring
+                the values of their bound parameters.
+            engine: The name of the engine to check the queries of. When `None` the queries of all
+                captured engines are checked.
+
+        Raises:
+            AssertionError: If the captured statements don't match the expected ones. The error shows
+                the difference between their SQL strings, with the bind values rendered unless some
+                of them can't be rendered as SQL literals.
+        """
+        actual_expressions = list(self._iter_expressions(include_tcl=include_tcl, engine=engine))
+
+        if len(expected_statements) == len(actual_expressions) and all(
+            actual.matches(expected, ignore_bind_values=ignore_bind_values)
+            for expected, actual in zip(expected_statements, actual_expressions)
+        ):
+            return
+
+        # Only compiling the statements on a mismatch, to show the difference between them
+        default_dialect = next((query.dialect for query in actual_expressions if query.dialect is not None), None)
+        expected_expressions = [
+            SQLExpression(
+                statement,
+                dialect=actual_expressions[index].dialect if index < len(actual_expressions) else default_dialect,
+            )
+            for index, statement in enumerate(expected_statements)
+        ]
+
+        try:
+            expected_queries = [query.get_sql(bind_params=not ignore_bind_values) for query in expected_expressions]
+            actual_queries = [query.get_sql(bind_params=not ignore_bind_values) for query in actual_expressions]
+        except CompileError:
+            # Some bind values can't be rendered as literals (e.g. pickled objects), showing the placeholders instead
+            expected_queries = [query.get_sql() for query in expected_expressions]
+            actual_queries = [query.get_sql() for query in actual_expressions]
+
+        if expected_queries != actual_queries:
+            raise AssertionError(
+                render_sequence_mismatch(
+                    "Captured statements don't match the expected ones", expected_queries, actual_queries
+                )
+            )
+
+        mismatch_index = next(
+            index
+            for index, (expected, actual) in enumerate(zip(expected_statements, actual_expressions))
+            if not actual.matches(expected, ignore_bind_values=ignore_bind_values)
+        )
+
+        raise AssertionError(
+            f"Statement {mismatch_index} compiles to the expected SQL, but its structure or bind values differ "
+            f"(e.g. it was built from a table instead of an ORM entity):\n{actual_queries[mismatch_index]}"
+        )
+
+    def assert_writes_batched(self, min_run: int = 3, *, engine: Optional[str] = None) -> None:
+        """Asserts that there are no runs of row-by-row INSERT, UPDATE or DELETE statements.
+
+        This is useful for catching loops which write rows one at a time (e.g. flushing the ORM session
+        after adding every object), where a single bulk statement or `executemany` would do. See
+        [`find_unbatched_writes`][pytest_capsqlalchemy.batching.find_unbatched_writes] for how the runs
+        are detected.
 
-        assert list(expected_queries) == actual_queries
+        Args:
+            min_run: The minimum number of consecutive, structurally identical single-row writes which
+                are reported as unbatched.
+            engine: The name of the engine to check the queries of. When `None` the queries of all
+                captured engines are checked.
+
+        Raises:
+            AssertionError: If any runs of unbatched writes are found.
+        """
+        unbatched_writes = find_unbatched_writes(
+            self._iter_expressions(include_tcl=True, engine=engine),
+            min_run=min_run,
+        )
+
+        assert not unbatched_writes, "Found writes which could have been batched:\n" + "\n".join(
+            f"  * {run}" for run in unbatched_writes
+        )
+
+    def assert_lock_order_consistent(self, *, include_writes: bool = True, engine: Optional[str] = None) -> None:
+        """Asserts that all transactions lock the tables they have in common in the same order.
+
+        Transactions locking the same tables in the opposite order (e.g. one locks a row of `orders`
+        and then of `order_items`, while another one does it the other way around) deadlock when they
+        run concurrently. This is best checked across all the statements of a test exercising
+        several code paths. See [`find_locking_transactions`][pytest_capsqlalchemy.locking.find_locking_transactions]
+        for the locks which are detected.
+
+        Only the transactions captured in this context are compared -- i.e. those of the current test, or
+        of the `with capsqlalchemy:` block. Transactions of different tests are never compared with each
+        other, so a conflict between code paths exercised by separate tests is not detected.
+
+        The statements are assigned to their transactions by their connection, so this requires the details
+        of the expressions to be captured with `@pytest.mark.capsqlalchemy(capture_details=True)`.
+
+        Args:
+            include_writes: Whether to include the row locks taken implicitly by UPDATE and DELETE statements.
+            engine: The name of the engine to check the transactions of. When `None` the transactions of all
+                captured engines are checked.
+
+        Raises:
+            RuntimeError: If the details of the expressions are not captured.
+            AssertionError: If any two tables were locked in the opposite order by different transactions.
+        """
+        self._validate_capture_details()
+
+        conflicts = find_lock_order_conflicts(
+            find_locking_transactions(
+                self._iter_expressions(include_tcl=True, engine=engine),
+                include_writes=include_writes,
+            )
+        )
+
+        assert not conflicts, "Found tables locked in an inconsistent order:\n" + "\n".join(
+            f"  * {conflict}" for conflict in conflicts
+        )
+
+    def assert_max_lock_hold_time(
+        self,
+        max_hold_time: float,
+        *,
+        include_writes: bool = True,
+        engine: Optional[str] = None,
+    ) -> None:
+        """Asserts that no lock was held for longer than the given time.
+
+        Locks are held until the end of their transaction, so any other transaction needing the same
+        rows has to wait for it -- including for any slow work (e.g. calls to other services) done
+        before the transaction is committed. Locks of transactions which didn't end while being
+        captured are not checked. Requires the details of the expressions to be captured with
+        `@pytest.mark.capsqlalchemy(capture_details=True)`.
+
+        Args:
+            max_hold_time: The maximum time a lock may be held, in seconds.
+            include_writes: Whether to include the row locks taken implicitly by UPDATE and DELETE statements.
+            engine: The name of the engine to check the transactions of. When `None` the transactions of all
+                captured engines are checked.
+
+        Raises:
+            RuntimeError: If the details of the expressions are not captured.
+            AssertionError: If any lock was held for longer than `max_hold_time`.
+        """
+        self._validate_capture_details()
+
+        transactions = find_locking_transactions(
+            self._iter_expressions(include_tcl=True, engine=engine),
+            include_writes=include_writes,
+        )
+        long_locks = [
+            lock
+            for transaction in transactions
+            for lock in transaction.locks
+            if lock.hold_time is not None and lock.hold_time > max_hold_time
+        ]
+
+        assert not long_locks, f"Found locks held for longer than {max_hold_time:.6f}s:\n" + "\n".join(
+            f"  * {lock}" for lock in long_locks
+        )
+
+    def assert_streamed(self, min_rows: int, *, engine: Optional[str] = None) -> None:
+        """Asserts that every read of at least the given number of rows was streamed.
+
+        Unless a server-side cursor is used (e.g. with the `stream_results` or `yield_per` execution
+        options, or `AsyncSession.stream()`), the driver loads all the rows of a result into memory at
+        once, before the application can process any of them. Rows are counted as the application
+        consumes them, so the assertion should be made after the results have been processed.
+
+        Dialects without server-side cursors (e.g. SQLite) ignore `stream_results`, so their reads
+        are always reported as buffered.
+
+        Requires row counting to be enabled with `@pytest.mark.capsqlalchemy(count_rows=True)`.
+
+        Args:
+            min_rows: The minimum number of consumed rows for which a read must be streamed.
+            engine: The name of the engine to check the queries of. When `None` the queries of all
+                captured engines are checked.
+
+        Raises:
+            RuntimeError: If row counting is not enabled.
+            AssertionError: If any read of `min_rows` rows or more was buffered.
+        """
+        self._validate_count_rows()
+
+        buffered_reads = [
+            expression
+            for expression in self._iter_expressions(include_tcl=False, engine=engine)
+            if expression.rows_consumed is not None and expression.rows_consumed >= min_rows and not expression.streamed
+        ]
+
+        assert not buffered_reads, f"Found reads of at least {min_rows} rows which weren't streamed:\n" + "\n".join(
+            f"  * {expression.rows_consumed} rows from {' '.join(expression.get_sql().split())}"
+            + (f" at {expression.call_site}" if expression.call_site is not None else "")
+            for expression in buffered_reads
+        )
+
+    def assert_max_flushes(
+        self,
+        max_flushes: int,
+        *,
+        include_autoflush: bool = True,
+        engine: Optional[str] = None,
+    ) -> None:
+        """Asserts that the ORM sessions flushed at most the given number of times.
+
+        Every flush is a round trip to the database with its own unit of work overhead. Autoflushes
+        are particularly easy to miss, as they are triggered implicitly by queries -- including lazy
+        loads caused by accessing a relationship attribute.
+
+        Requires ORM session capture to be enabled with `@pytest.mark.capsqlalchemy(capture_sessions=True)`.
+
+        Args:
+            max_flushes: The maximum number of flushes allowed.
+            include_autoflush: Whether to include the flushes triggered by autoflush in the count.
+            engine: The name of the engine to check the sessions of. When `None` the sessions of all
+                captured engines are checked.
+
+        Raises:
+            RuntimeError: If ORM session capture is not enabled.
+            AssertionError: If the number of flushes is greater than `max_flushes`.
+        """
+        self._validate_capture_sessions()
+        self._validate_engine_name(engine)
+
+        flushes = [
+            flush
+            for flush in self.flushes
+            if (include_autoflush or not flush.autoflush) and (engine is None or flush.engine_name == engine)
+        ]
+
+        assert len(flushes) <= max_flushes, (
+            f"Expected at most {max_flushes} flushes, got {len(flushes)}:\n"
+            + "\n".join(f"  * {flush}" for flush in flushes)
+        )
+
+    def assert_max_identity_map_size(self, max_size: int, *, engine: Optional[str] = None) -> None:
+        """Asserts that the identity map of any ORM session never held more than the given number of objects.
+
+        Every object in the identity map is kept in memory for as long as the session is alive (or
+        the application holds a reference to it), so loading large result sets as ORM objects can
+        be a major memory cost.
+
+        Requires ORM session capture to be enabled with `@pytest.mark.capsqlalchemy(capture_sessions=True)`.
+
+        Args:
+            max_size: The maximum number of objects allowed in the identity map of a single session.
+            engine: The name of the engine to check the sessions of. When `None` the sessions of all
+                captured engines are checked.
+
+        Raises:
+            RuntimeError: If ORM session capture is not enabled.
+            AssertionError: If an identity map grew to more than `max_size` objects.
+        """
+        self._validate_capture_sessions()
+        self._validate_engine_name(engine)
+
+        actual_size = self._current_context.get_max_identity_map_size(engine)
+
+        assert actual_size <= max_size, (
+            f"Expected the identity map to hold at most {max_size} objects, but it grew to {actual_size}"
+        )
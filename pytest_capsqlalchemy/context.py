@@ -1,23 +1,56 @@
 import contextlib
+import functools
 import sys
-from collections.abc import Mapping
+import time
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import dataclass, field
 from types import TracebackType
-from typing import Any, Optional
+from typing import Any, Optional, Union
 
 if sys.version_info >= (3, 11):  # pragma: no cover
     from typing import Self
 else:  # pragma: no cover
     from typing_extensions import Self
 
-from sqlalchemy import Connection, CursorResult, Executable, text
+import greenlet  # type: ignore[import-untyped,unused-ignore]
+from sqlalchemy import Connection, CursorResult, Engine, Executable, text
+from sqlalchemy.engine.interfaces import DBAPIConnection, DBAPICursor, ExecuteStyle, ExecutionContext
 from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection
 
-from pytest_capsqlalchemy.expression import SQLExpression
-from pytest_capsqlalchemy.utils import temp_sqlalchemy_event
+from pytest_capsqlalchemy.expression import CursorExecution, SQLExpression
+from pytest_capsqlalchemy.latency import SimulatedLatency
+from pytest_capsqlalchemy.orm import IdentityMapSample, SessionFlush
+from pytest_capsqlalchemy.pool import ConnectionCheckout
+from pytest_capsqlalchemy.timeout import StatementTimeout
+from pytest_capsqlalchemy.utils import (
+    get_call_site,
+    get_task_name,
+    is_autoflush,
+    is_flushing,
+    temp_sqlalchemy_event,
+)
+
+DEFAULT_ENGINE_NAME = "default"
+"""The name of the engine when a single engine is captured."""
+
+AnyEngine = Union[Engine, AsyncEngine]
+"""A SQLAlchemy engine which can be captured, either sync or async."""
+
+
+@dataclass
+class _StatementTiming:
+    """Timing information of a statement, collected from the cursor execute events."""
+
+    started_at: float
+    cursor_started_at: float
+    duration: float = 0.0
+    cursor_executions: list[CursorExecution] = field(default_factory=list)
 
 
 class SQLAlchemyCaptureContext:
-    """Captures expressions executed on a SQLAlchemy engine within a specific context.
+    """Captures expressions executed on one or more SQLAlchemy engines within a specific context.
 
     These expressions include:
 
@@ -32,39 +65,298 @@ class SQLAlchemyCaptureContext:
     Every expression is captured as a SQLExpression object, allowing it to be parsed correctly
     and compared against.
 
+    Optionally, the details of where and how each expression was executed can be captured as well:
+    when it was executed and how long the database took (measured around the DBAPI cursor calls, so
+    it doesn't include SQLAlchemy's own overhead), the executions on the DBAPI cursor it needed, the
+    location in the application code which executed it, its connection and its asyncio task, as well
+    as the connection checkouts from the pools of the captured engines. They're needed for the lock
+    analysis, Chrome traces and workloads, but add to the cost of every statement.
+
+    Both sync and async engines are supported. When several engines are captured at once (e.g. a
+    primary database and its read replicas), they're passed as a mapping from a name to the engine
+    and every captured expression is tagged with the name of the engine which executed it. A single
+    engine is captured under the name `"default"`.
+
+    Optionally, the flushes of ORM sessions bound to the captured engines can be captured as well,
+    together with the statements each flush executed and the size of the sessions' identity maps, and
+    the rows the application consumes from the results of the statements can be counted.
+
+    To make the cost of extra round trips visible against a local database, a network latency can
+    be simulated for the captured engines -- see
+    [`SimulatedLatency`][pytest_capsqlalchemy.latency.SimulatedLatency]. Similarly, a timeout can be
+    enforced on every statement, so that a runaway query fails quickly instead of hanging the tests --
+    see [`StatementTimeout`][pytest_capsqlalchemy.timeout.StatementTimeout].
+
     See [`SQLAlchemyCapturer`][pytest_capsqlalchemy.capturer.SQLAlchemyCapturer] for the available
     assertions on the captured expressions.
     """
 
-    _engine: AsyncEngine
+    _engines: dict[str, AnyEngine]
+    _engine_names: dict[Engine, str]
     _captured_expressions: list[SQLExpression]
+    _statement_timings: dict[ExecutionContext, _StatementTiming]
+    _connection_checkouts: list[ConnectionCheckout]
+    _open_checkouts: dict[ConnectionPoolEntry, ConnectionCheckout]
+    _flushes: list[SessionFlush]
+    _active_flushes: dict[Any, tuple[Session, SessionFlush]]
+    _identity_map_sizes: list[IdentityMapSample]
+    _max_identity_map_sizes: dict[str, int]
+
+    def __init__(
+        self,
+        engine: Union[AnyEngine, Mapping[str, AnyEngine]],
+        *,
+        capture_sessions: bool = False,
+        capture_details: bool = False,
+        count_rows: bool = False,
+        simulated_latency: Union[float, SimulatedLatency, None] = None,
+        statement_timeout: Union[float, StatementTimeout, None] = None,
+    ):
+        """Create a new SQLAlchemyCaptureContext instance.
+
+        Args:
+            engine: The engine to capture, or a mapping of names to the engines to capture.
+            capture_sessions: Whether to also capture the flushes and identity map sizes of the ORM
+                sessions bound to the captured engines. Sessions using the `binds` argument to bind
+                to several engines are not captured.
+            capture_details: Whether to also capture the timings (`started_at` and `duration`), DBAPI cursor
+                executions (`cursor_executions`), `call_site`, `connection_id` and `task` of every expression,
+                and the checkouts of connections from the pools of the captured engines.
+            count_rows: Whether to count the rows the application consumes from the results of the
+                captured statements (`SQLExpression.rows_consumed`), which adds a small cost to every
+                row fetched.
+            simulated_latency: The network latency to simulate for every round trip to the captured
+                engines, either in seconds or as a `SimulatedLatency` (e.g. to add jitter). When the
+                same `SimulatedLatency` is used by nested contexts, round trips are delayed only once.
+            statement_timeout: The maximum time a statement executed on the captured engines may take,
+                either in seconds or as a `StatementTimeout`. Slower statements fail with a
+                `StatementTimeoutError`.
+
+        Raises:
+            ValueError: If an empty mapping of engines is given, or the same engine is given under
+                several names.
+        """
+        if isinstance(engine, (Engine, AsyncEngine)):
+            self._engines = {DEFAULT_ENGINE_NAME: engine}
+        elif engine:
+            self._engines = dict(engine)
+        else:
+            raise ValueError(f"{self.__class__.__name__}: at least one engine to capture is required")
+
+        self._capture_sessions = capture_sessions
+        self._capture_details = capture_details
+        self._count_rows = count_rows
+        self._simulated_latency = (
+            SimulatedLatency(simulated_latency) if isinstance(simulated_latency, (int, float)) else simulated_latency
+        )
+        self._statement_timeout = (
+            StatementTimeout(statement_timeout) if isinstance(statement_timeout, (int, float)) else statement_timeout
+        )
+        self._engine_names = {}
+
+        for engine_name, engine in self._engines.items():
+            sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+
+            # Its statements would be captured once per name, with no way to tell which name they belong to
+            if sync_engine in self._engine_names:
+                raise ValueError(
+                    f"{self.__class__.__name__}: the same engine can't be captured under several names, "
+                    f"got it as both {self._engine_names[sync_engine]!r} and {engine_name!r}"
+                )
+
+            self._engine_names[sync_engine] = engine_name
 
-    def __init__(self, engine: AsyncEngine):
-        """Create a new SQLAlchemyCaptureContext instance."""
-        self._engine = engine
         self._captured_expressions = []
+        self._statement_timings = {}
+        self._connection_checkouts = []
+        self._open_checkouts = {}
+        self._flushes = []
+        self._active_flushes = {}
+        self._identity_map_sizes = []
+        self._max_identity_map_sizes = {}
         self._sqlaclhemy_events_stack = contextlib.ExitStack()
 
+    @property
+    def engines(self) -> Mapping[str, AnyEngine]:
+        """The engines being captured, by name."""
+        return self._engines
+
     @property
     def captured_expressions(self) -> list[SQLExpression]:
         """Returns all SQL expressions captured in the current context."""
         return self._captured_expressions
 
+    @property
+    def connection_checkouts(self) -> list[ConnectionCheckout]:
+        """All checkouts of connections from the pools of the captured engines in the current context.
+
+        Connection checkouts are only captured along with the details of the expressions.
+        """
+        return self._connection_checkouts
+
+    @property
+    def capture_sessions(self) -> bool:
+        """Whether the flushes and identity map sizes of ORM sessions are captured."""
+        return self._capture_sessions
+
+    @property
+    def capture_details(self) -> bool:
+        """Whether the timings, call sites, connections and tasks of the expressions are captured."""
+        return self._capture_details
+
+    @property
+    def count_rows(self) -> bool:
+        """Whether the rows consumed from the results of the captured statements are counted."""
+        return self._count_rows
+
+    @property
+    def simulated_latency(self) -> Optional[SimulatedLatency]:
+        """The network latency simulated for the captured engines, if any."""
+        return self._simulated_latency
+
+    @property
+    def statement_timeout(self) -> Optional[StatementTimeout]:
+        """The timeout enforced on the statements of the captured engines, if any."""
+        return self._statement_timeout
+
+    @property
+    def flushes(self) -> list[SessionFlush]:
+        """All ORM session flushes captured in the current context."""
+        return self._flushes
+
+    @property
+    def identity_map_sizes(self) -> list[IdentityMapSample]:
+        """The identity map sizes of the ORM sessions, sampled before every ORM statement and after every flush."""
+        return self._identity_map_sizes
+
+    def get_max_identity_map_size(self, engine_name: Optional[str] = None) -> int:
+        """Get the largest identity map size any ORM session reached in the current context.
+
+        Unlike `identity_map_sizes`, this is tracked every time an object is added to an identity map,
+        so it includes objects loaded by the last statement of the context as well.
+
+        Args:
+            engine_name: The name of the engine to get the size for the sessions of. When `None` the
+                sessions of all captured engines are considered.
+
+        Returns:
+            The largest number of objects in the identity map of a single session, or 0 if no
+            session was captured.
+        """
+        if engine_name is not None:
+            return self._max_identity_map_sizes.get(engine_name, 0)
+
+        return max(self._max_identity_map_sizes.values(), default=0)
+
     def clear(self) -> None:
-        """Clear all SQL expressions captured so far in the current context."""
+        """Clear all SQL expressions, connection checkouts and flushes captured so far in the current context."""
         self._captured_expressions = []
+        self._connection_checkouts = []
+        self._flushes = []
+        self._identity_map_sizes = []
+        self._max_identity_map_sizes = {}
+
+    def _on_begin(self, engine_name: str, conn: Connection) -> None:
+        self._captured_expressions.append(self._make_tcl_expression("BEGIN", engine_name, conn))
+
+    def _on_commit(self, engine_name: str, conn: Connection) -> None:
+        self._captured_expressions.append(self._make_tcl_expression("COMMIT", engine_name, conn))
 
-    def _on_begin(self, conn: Connection) -> None:
-        self._captured_expressions.append(SQLExpression(executable=text("BEGIN")))
+    def _on_rollback(self, engine_name: str, conn: Connection) -> None:
+        self._captured_expressions.append(self._make_tcl_expression("ROLLBACK", engine_name, conn))
+
+    def _make_tcl_expression(self, statement: str, engine_name: str, conn: Connection) -> SQLExpression:
+        # BEGIN is sent along with the first statement of the transaction, it's not a round trip of its own
+        if self._simulated_latency is not None and statement != "BEGIN":
+            simulated_latency = self._simulated_latency.get_tcl_latency(conn)
+        else:
+            simulated_latency = None
+
+        expression = SQLExpression(
+            executable=text(statement),
+            dialect=conn.dialect,
+            engine_name=engine_name,
+            simulated_latency=simulated_latency,
+        )
+
+        if self._capture_details:
+            self._add_details(expression, conn)
+            expression.started_at = time.perf_counter()
+
+        return expression
+
+    @staticmethod
+    def _add_details(expression: SQLExpression, conn: Connection) -> None:
+        expression.call_site = get_call_site()
+        expression.connection_id = id(conn)
+        expression.task = get_task_name()
+
+    def _on_checkout(
+        self,
+        engine_name: str,
+        dbapi_connection: DBAPIConnection,
+        connection_record: ConnectionPoolEntry,
+        connection_proxy: PoolProxiedConnection,
+    ) -> None:
+        checkout = ConnectionCheckout(engine_name=engine_name, task=get_task_name(), started_at=time.perf_counter())
 
-    def _on_commit(self, conn: Connection) -> None:
-        self._captured_expressions.append(SQLExpression(executable=text("COMMIT")))
+        self._connection_checkouts.append(checkout)
+        self._open_checkouts[connection_record] = checkout
 
-    def _on_rollback(self, conn: Connection) -> None:
-        self._captured_expressions.append(SQLExpression(executable=text("ROLLBACK")))
+    def _on_checkin(self, dbapi_connection: Optional[DBAPIConnection], connection_record: ConnectionPoolEntry) -> None:
+        checkout = self._open_checkouts.pop(connection_record, None)
+
+        if checkout is not None:
+            checkout.duration = time.perf_counter() - checkout.started_at
+
+    def _on_before_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        if context is None:  # pragma: no cover
+            return
+
+        # The batches of "insertmanyvalues" are reported as executemany, but each is a single execution
+        if executemany and context.execute_style is ExecuteStyle.INSERTMANYVALUES:
+            executemany = False
+        # Without the details, the cursor executions are only kept for the statements which the dialect
+        # rewrites before sending them, as they're needed to get the SQL that was actually sent
+        elif not self._capture_details:
+            return
+
+        now = time.perf_counter()
+        timing = self._statement_timings.get(context)
+
+        # A single statement may need several cursor executions (e.g. batched "insertmanyvalues")
+        if timing is None:
+            timing = self._statement_timings[context] = _StatementTiming(started_at=now, cursor_started_at=now)
+        else:
+            timing.cursor_started_at = now
+
+        timing.cursor_executions.append(CursorExecution(statement, parameters, executemany))
+
+    def _on_after_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        timing = self._statement_timings.get(context) if context is not None else None
+
+        if timing is not None:
+            timing.duration += time.perf_counter() - timing.cursor_started_at
 
     def _on_after_execute(
         self,
+        engine_name: str,
         conn: Connection,
         clauseelement: Executable,
         multiparams: list[dict[str, Any]],
@@ -72,26 +364,192 @@ class SQLAlchemyCaptureContext:
         execution_options: Mapping[str, Any],
         result: CursorResult,
     ) -> None:
-        self._captured_expressions.append(
-            SQLExpression(executable=clauseelement, params=params, multiparams=multiparams)
+        timing = self._statement_timings.pop(result.context, None)
+
+        expression = SQLExpression(
+            executable=clauseelement,
+            params=params,
+            multiparams=multiparams,
+            dialect=conn.dialect,
+            statement=result.context.statement,
+            dbapi_parameters=result.context.parameters,
+            cursor_executions=timing.cursor_executions if timing is not None else [],
+            engine_name=engine_name,
+            simulated_latency=(
+                self._simulated_latency.get_statement_latency(result.context)
+                if self._simulated_latency is not None
+                else None
+            ),
+            # The same check SQLAlchemy makes when creating the cursor, except for the deprecated
+            # `server_side_cursors` engine argument
+            streamed=(
+                conn.dialect.supports_server_side_cursors
+                and bool(result.context.execution_options.get("stream_results", False))
+            ),
+        )
+
+        if self._capture_details:
+            self._add_details(expression, conn)
+
+            if timing is not None:
+                expression.started_at = timing.started_at
+                expression.duration = timing.duration
+
+        self._captured_expressions.append(expression)
+
+        if self._count_rows and result.returns_rows:
+            self._count_consumed_rows(expression, result)
+
+        # Flushes run synchronously within the greenlet (or thread) of the session, so any statement
+        # executed in the same greenlet while its session is flushing was executed by the flush
+        active_flush = self._active_flushes.get(greenlet.getcurrent())
+
+        if active_flush is not None and is_flushing(active_flush[0]):
+            active_flush[1].expressions.append(expression)
+
+    @staticmethod
+    def _count_consumed_rows(expression: SQLExpression, result: CursorResult) -> None:
+        expression.rows_consumed = 0
+
+        fetchone, fetchmany, fetchall, fetchiter = (
+            result._fetchone_impl,
+            result._fetchmany_impl,
+            result._fetchall_impl,
+            result._fetchiter_impl,
+        )
+
+        def count_rows(rows: list[Any]) -> list[Any]:
+            expression.rows_consumed = (expression.rows_consumed or 0) + len(rows)
+            return rows
+
+        def fetchone_counted(hard_close: bool = False) -> Any:
+            row = fetchone(hard_close)
+
+            if row is not None:
+                count_rows([row])
+
+            return row
+
+        def fetchiter_counted() -> Iterator[Any]:
+            for row in fetchiter():
+                count_rows([row])
+                yield row
+
+        # Every way of consuming the rows of a result (including by the ORM) goes through these private
+        # methods, there's no public hook for the rows being fetched
+        result._fetchone_impl = fetchone_counted  # type: ignore[method-assign]
+        result._fetchmany_impl = lambda size=None: count_rows(fetchmany(size))  # type: ignore[method-assign]
+        result._fetchall_impl = lambda: count_rows(fetchall())  # type: ignore[method-assign]
+        result._fetchiter_impl = fetchiter_counted  # type: ignore[method-assign]
+
+    def _get_session_engine_name(self, session: Session) -> Optional[str]:
+        bind = session.bind
+
+        if isinstance(bind, Connection):
+            bind = bind.engine
+
+        return self._engine_names.get(bind) if bind is not None else None
+
+    def _record_identity_map_size(self, session: Session, *, sample: bool) -> None:
+        engine_name = self._get_session_engine_name(session)
+
+        if engine_name is None:
+            return
+
+        size = len(session.identity_map)
+
+        if size > self._max_identity_map_sizes.get(engine_name, 0):
+            self._max_identity_map_sizes[engine_name] = size
+
+        if sample:
+            self._identity_map_sizes.append(IdentityMapSample(time.perf_counter(), engine_name, size))
+
+    def _on_before_flush(self, session: Session, flush_context: UOWTransaction, instances: Optional[object]) -> None:
+        engine_name = self._get_session_engine_name(session)
+
+        if engine_name is None:
+            return
+
+        # The flush is only recorded once it's complete, as it may turn out to have no work to do
+        self._active_flushes[greenlet.getcurrent()] = (
+            session,
+            SessionFlush(
+                engine_name=engine_name,
+                autoflush=is_autoflush(),
+                new=len(session.new),
+                dirty=len(session.dirty),
+                deleted=len(session.deleted),
+                started_at=time.perf_counter(),
+                call_site=get_call_site() if self._capture_details else None,
+                task=get_task_name() if self._capture_details else None,
+            ),
         )
 
+    def _on_after_flush_postexec(self, session: Session, flush_context: UOWTransaction) -> None:
+        active_flush = self._active_flushes.pop(greenlet.getcurrent(), None)
+
+        if active_flush is None or active_flush[0] is not session:
+            return
+
+        flush = active_flush[1]
+        flush.duration = time.perf_counter() - flush.started_at
+        flush.identity_map_size = len(session.identity_map)
+        self._flushes.append(flush)
+
+        self._record_identity_map_size(session, sample=True)
+
+    def _on_do_orm_execute(self, orm_execute_state: ORMExecuteState) -> None:
+        self._record_identity_map_size(orm_execute_state.session, sample=True)
+
+    def _on_object_persistent(self, session: Session, instance: object) -> None:
+        self._record_identity_map_size(session, sample=False)
+
     def __enter__(self) -> Self:
         events_stack = self._sqlaclhemy_events_stack.__enter__()
 
-        for event_name, listener in (
-            ("begin", self._on_begin),
-            ("commit", self._on_commit),
-            ("rollback", self._on_rollback),
-            ("after_execute", self._on_after_execute),
-        ):
-            events_stack.enter_context(
-                temp_sqlalchemy_event(
-                    self._engine.sync_engine,
-                    event_name,
-                    listener,
+        for sync_engine, engine_name in self._engine_names.items():
+            # Applied before the listeners below, so that the delays are not included in the timings
+            if self._simulated_latency is not None:
+                events_stack.enter_context(self._simulated_latency.apply(sync_engine))
+
+            if self._statement_timeout is not None:
+                events_stack.enter_context(self._statement_timeout.apply(sync_engine))
+
+            listeners: list[tuple[str, Callable[..., None]]] = [
+                ("begin", functools.partial(self._on_begin, engine_name)),
+                ("commit", functools.partial(self._on_commit, engine_name)),
+                ("rollback", functools.partial(self._on_rollback, engine_name)),
+                ("before_cursor_execute", self._on_before_cursor_execute),
+                ("after_execute", functools.partial(self._on_after_execute, engine_name)),
+            ]
+
+            if self._capture_details:
+                listeners += [
+                    ("after_cursor_execute", self._on_after_cursor_execute),
+                    ("checkout", functools.partial(self._on_checkout, engine_name)),
+                    ("checkin", self._on_checkin),
+                ]
+
+            for event_name, listener in listeners:
+                events_stack.enter_context(
+                    temp_sqlalchemy_event(
+                        sync_engine,
+                        event_name,
+                        listener,
+                    )
                 )
-            )
+
+        if self._capture_sessions:
+            for event_name, session_listener in (
+                ("before_flush", self._on_before_flush),
+                ("after_flush_postexec", self._on_after_flush_postexec),
+                ("do_orm_execute", self._on_do_orm_execute),
+                ("loaded_as_persistent", self._on_object_persistent),
+                ("pending_to_persistent", self._on_object_persistent),
+                ("detached_to_persistent", self._on_object_persistent),
+                ("deleted_to_persistent", self._on_object_persistent),
+            ):
+                events_stack.enter_context(temp_sqlalchemy_event(Session, event_name, session_listener))
 
         return self
 
@@ -101,4 +559,9 @@ class SQLAlchemyCaptureContext:
         exc_value: Optional[BaseException],
         traceback: Optional[TracebackType],
     ) -> Optional[bool]:
+        # Statements which failed never reach "after_execute", so their timings are discarded here
+        self._statement_timings.clear()
+        self._active_flushes.clear()
+        self._open_checkouts.clear()
+
         return self._sqlaclhemy_events_stack.__exit__(exc_type, exc_value, traceback)
@@ -1,8 +1,28 @@
 import enum
+import functools
+import os
+import re
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, NamedTuple, Optional
 
-from sqlalchemy import ClauseElement, Executable, Insert, TextClause, text
+from sqlalchemy import ClauseElement, Dialect, Executable, Insert, TextClause, literal, text
+from sqlalchemy.sql.cache_key import CacheKey
+from sqlalchemy.sql.util import find_tables
+
+# The bind parameter placeholders of each DBAPI paramstyle, matched along with string literals so that
+# placeholder-like text within them is skipped
+_PLACEHOLDER_RES = {
+    paramstyle: re.compile(rf"'(?:[^']|'')*'|{placeholder}")
+    for paramstyle, placeholder in (
+        ("qmark", r"\?"),
+        ("format", r"%s"),
+        ("numeric", r":(?P<index>\d+)"),
+        ("numeric_dollar", r"\$(?P<index>\d+)"),
+        ("named", r":(?P<name>\w+)"),
+        ("pyformat", r"%\((?P<name>\w+)\)s"),
+    )
+}
 
 
 class SQLExpressionType(str, enum.Enum):
@@ -23,6 +43,35 @@ class SQLExpressionType(str, enum.Enum):
         return self in {SQLExpressionType.BEGIN, SQLExpressionType.COMMIT, SQLExpressionType.ROLLBACK}
 
 
+class CallSite(NamedTuple):
+    """The location in the application code which executed a SQL expression."""
+
+    filename: str
+    lineno: int
+    function: str
+
+    def __str__(self) -> str:
+        try:
+            filename = os.path.relpath(self.filename)
+        except ValueError:  # pragma: no cover
+            # On Windows paths on different drives can't be made relative
+            filename = self.filename
+
+        return f"{filename}:{self.lineno} in {self.function}"
+
+
+class CursorExecution(NamedTuple):
+    """A single execution of a statement on the DBAPI cursor, exactly as it was sent to the database.
+
+    A statement may need several of them, e.g. an ORM flush inserting many rows with RETURNING sends
+    one expanded "insertmanyvalues" INSERT per batch of rows.
+    """
+
+    statement: str
+    parameters: Any
+    executemany: bool
+
+
 @dataclass
 class SQLExpression:
     """A representation of a single SQL expression captured by SQLAlchemy.
@@ -30,15 +79,66 @@ class SQLExpression:
     Stores the SQLAlchemy `Executable` object and any parameters used in the query, so that it can be
     compared against expected queries in tests. This is useful for performing specific assertions
     on the captured expressions which cannot be easily achieved with the provided assert methods.
+
+    Attributes:
+        executable: The SQLAlchemy statement which was executed.
+        params: The parameters of a single execution.
+        multiparams: The parameters of each row of an `executemany` execution.
+        dialect: The dialect of the engine the expression was captured from.
+        statement: The SQL string SQLAlchemy sent to the database.
+        dbapi_parameters: The parameters passed to the DBAPI cursor, one entry per execution.
+        cursor_executions: Every execution on the DBAPI cursor the statement needed. Always captured
+            when the dialect rewrote the statement (e.g. "insertmanyvalues"), otherwise only with
+            `capture_details`.
+        started_at: When the expression was executed, as a `time.perf_counter()` value. Only captured
+            with `capture_details`.
+        duration: How long the database took to execute the expression, in seconds. Only captured
+            with `capture_details`.
+        engine_name: The name of the engine the expression was executed on.
+        call_site: The location in the application code which executed the expression. Only captured
+            with `capture_details`.
+        simulated_latency: The delay added to the round trips of the expression when network latency
+            is simulated, in seconds.
+        connection_id: An identifier of the connection the expression was executed on, shared by the
+            statements of the same transaction. Only captured with `capture_details`.
+        task: The name of the asyncio task, or thread outside of asyncio, which executed the
+            expression. Only captured with `capture_details`.
+        streamed: For statements returning rows, whether they were streamed from a server-side cursor
+            (e.g. with `stream_results`, `yield_per` or `AsyncSession.stream()`) instead of being
+            buffered completely.
+        rows_consumed: How many rows the application has consumed so far. Only counted with
+            `count_rows`.
     """
 
     executable: Executable
     params: dict[str, Any] = field(default_factory=dict)
     multiparams: list[dict[str, Any]] = field(default_factory=list)
+    dialect: Optional[Dialect] = None
+    statement: Optional[str] = None
+    dbapi_parameters: Optional[Sequence[Any]] = None
+    cursor_executions: list[CursorExecution] = field(default_factory=list)
+    started_at: Optional[float] = None
+    duration: Optional[float] = None
+    engine_name: Optional[str] = None
+    call_site: Optional[CallSite] = None
+    simulated_latency: Optional[float] = None
+    connection_id: Optional[int] = None
+    task: Optional[str] = None
+    streamed: Optional[bool] = None
+    rows_consumed: Optional[int] = None
 
     def get_sql(self, *, bind_params: bool = False) -> str:
         """Get the SQL string generated by SQLAlchemy of the captured expression.
 
+        The SQL is rendered for the dialect of the engine the expression was captured from. When the
+        expression has no dialect (e.g. it was created manually) SQLAlchemy's default string dialect
+        is used instead.
+
+        When the dialect rewrote the statement before sending it (e.g. an ORM flush inserting many rows
+        with RETURNING, which sends one "insertmanyvalues" INSERT per batch of rows), the statements
+        from its `cursor_executions` are returned instead, separated by `;` and a newline, with the
+        parameters of each rendered into it when `bind_params` is True.
+
         Args:
             bind_params: If True, the SQL string will include the bound parameters in the query. Otherwise the
                 SQL string will contain placeholders for the bound parameters.
@@ -46,6 +146,22 @@ class SQLExpression:
         Returns:
             The SQL string of the captured expression
         """
+        if self.statement is not None and any(
+            execution.statement != self.statement for execution in self.cursor_executions
+        ):
+            # The dialect rewrote the statement before sending it (e.g. expanding the VALUES of an
+            # "insertmanyvalues" INSERT for each batch of rows), so only the executions show what was sent
+            return ";\n".join(
+                self._render_parameters(execution.statement, execution.parameters)
+                if bind_params
+                else execution.statement
+                for execution in self.cursor_executions
+            )
+
+        if not bind_params and self.statement is not None:
+            # The statement that was actually executed, no need to compile it again
+            return self.statement
+
         assert isinstance(self.executable, ClauseElement)
 
         if self.executable.is_insert:
@@ -64,7 +180,118 @@ class SQLExpression:
         if bind_params:
             compile_kwargs["literal_binds"] = True
 
-        return str(expr.compile(compile_kwargs=compile_kwargs))
+        return str(expr.compile(dialect=self.dialect, compile_kwargs=compile_kwargs))
+
+    def _render_parameters(self, statement: str, parameters: Any) -> str:
+        assert self.dialect is not None
+
+        placeholder_re = _PLACEHOLDER_RES[self.dialect.paramstyle]
+        positional_parameters = iter(parameters) if not isinstance(parameters, Mapping) else iter(())
+
+        def render(match: re.Match[str]) -> str:
+            if match[0].startswith("'"):
+                return match[0]
+
+            groups = match.groupdict()
+
+            if groups.get("index") is not None:
+                value = parameters[int(groups["index"]) - 1]
+            elif groups.get("name") is not None:
+                value = parameters[groups["name"]]
+            else:
+                value = next(positional_parameters)
+
+            return str(literal(value).compile(dialect=self.dialect, compile_kwargs={"literal_binds": True}))
+
+        return placeholder_re.sub(render, statement)
+
+    @functools.cached_property
+    def tables(self) -> tuple[str, ...]:
+        """The names of the tables the SQL expression reads from or writes to, in order of appearance.
+
+        For INSERT, UPDATE and DELETE statements the table being written to always comes first. Raw
+        SQL text expressions don't have any table information, so they never report any tables.
+        """
+        if not isinstance(self.executable, ClauseElement):  # pragma: no cover
+            return ()
+
+        table_names = dict.fromkeys(
+            table.name for table in find_tables(self.executable, check_columns=True, include_crud=True)
+        )
+
+        dml_table = getattr(self.executable, "table", None)
+        if dml_table is not None and getattr(dml_table, "name", None) in table_names:
+            table_names = {dml_table.name: None, **table_names}
+
+        return tuple(table_names)
+
+    @functools.cached_property
+    def cache_key(self) -> Optional[CacheKey]:
+        """The structural cache key of the executable, as used by SQLAlchemy's compiled SQL cache.
+
+        Statements with the same cache key have the same structure and compile to the same SQL,
+        regardless of their bind values. `None` for executables which don't support caching.
+        """
+        if not isinstance(self.executable, ClauseElement):  # pragma: no cover
+            return None
+
+        return self.executable._generate_cache_key()
+
+    def matches(self, executable: Executable, *, ignore_bind_values: bool = False) -> bool:
+        """Check if the captured expression is the same statement as the given executable.
+
+        The statements are compared by their structural cache keys, without compiling them to SQL.
+        Parameters passed to `execute()` separately from the statement (e.g. the values of the objects
+        flushed by the ORM) are part of the bind values of the captured expression, while the given
+        executable has none.
+
+        Args:
+            executable: The statement to compare the captured expression with.
+            ignore_bind_values: If True, only the structure of the statements is compared. Otherwise
+                their bind values must be equal as well.
+
+        Returns:
+            Whether the captured expression matches the executable.
+        """
+        other = SQLExpression(executable)
+
+        if self.cache_key is None or other.cache_key is None:
+            if not isinstance(self.executable, ClauseElement) or not isinstance(executable, ClauseElement):
+                return False
+
+            # Not cacheable, so fall back to comparing the statements clause by clause
+            return self.executable.compare(executable, compare_values=not ignore_bind_values) and (
+                ignore_bind_values or (self.params, self.multiparams) == (other.params, other.multiparams)
+            )
+
+        if self.cache_key.key != other.cache_key.key:
+            return False
+
+        return ignore_bind_values or self.bind_values == other.bind_values
+
+    @property
+    def bind_values(self) -> list[Any]:
+        """All the values bound to the expression, in a form which can be compared with `==`.
+
+        These are the values of the bind parameters of the executable (as collected in its `cache_key`),
+        followed by the `params` and `multiparams` passed to `execute()`. Executables which don't support
+        caching only have the latter.
+        """
+        bindparams = self.cache_key.bindparams if self.cache_key is not None else []
+
+        return [*(bind.effective_value for bind in bindparams), self.params, self.multiparams]
+
+    @property
+    def projected_duration(self) -> Optional[float]:
+        """The time the expression is projected to take against a remote database, in seconds.
+
+        This is the measured `duration` plus the `simulated_latency` of its round trips, or just the
+        `duration` when no latency is simulated.
+        """
+        if self.simulated_latency is None:
+            return self.duration
+
+        return (self.duration or 0.0) + self.simulated_latency
 
     @property
     def type(self) -> SQLExpressionType:
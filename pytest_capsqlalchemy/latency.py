@@ -0,0 +1,154 @@
+import asyncio
+import contextlib
+import random
+import time
+import weakref
+from collections.abc import Generator
+from typing import Any, Optional
+
+from sqlalchemy import Connection, Engine
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from sqlalchemy.util import await_only
+
+from pytest_capsqlalchemy.utils import temp_sqlalchemy_event
+
+
+class SimulatedLatency:
+    """Simulates the network latency to a remote database by delaying every DBAPI round trip.
+
+    Tests usually run against a local database with round trips of a few microseconds, which hides
+    the cost of chatty code paths that are slow in production, where the database is a few
+    milliseconds away. Every cursor execution, COMMIT and ROLLBACK is delayed by `delay` seconds,
+    plus or minus a random `jitter`.
+
+    With async engines the delay is awaited, so other tasks keep running in the meantime -- just like
+    they would while waiting for a remote database.
+
+    The delays are not included in the measured `duration` of the captured expressions, but are
+    reported separately in their `simulated_latency`, together with the resulting `projected_duration`.
+
+    A single instance can be applied to the same engine by several (nested) capture contexts at
+    once, and every round trip is still delayed only once.
+    """
+
+    delay: float
+    jitter: float
+
+    _statement_latencies: "weakref.WeakKeyDictionary[ExecutionContext, float]"
+    _tcl_latencies: "weakref.WeakKeyDictionary[Connection, float]"
+    _applied_engines: dict[Engine, tuple[contextlib.ExitStack, int]]
+
+    def __init__(self, delay: float, *, jitter: float = 0.0, seed: Optional[int] = None):
+        """Create a new SimulatedLatency instance.
+
+        Args:
+            delay: The delay added to each round trip, in seconds.
+            jitter: The maximum random deviation from `delay`, in seconds. Each round trip is delayed
+                by a value picked uniformly between `delay - jitter` and `delay + jitter` (but never
+                less than 0).
+            seed: The seed of the random number generator for the jitter, to make the delays reproducible.
+
+        Raises:
+            ValueError: If `delay` or `jitter` is negative.
+        """
+        if delay < 0 or jitter < 0:
+            raise ValueError(
+                f"{self.__class__.__name__}: the delay and jitter can't be negative, got {delay=}, {jitter=}"
+            )
+
+        self.delay = delay
+        self.jitter = jitter
+
+        self._random = random.Random(seed)  # noqa: S311
+        self._statement_latencies = weakref.WeakKeyDictionary()
+        self._tcl_latencies = weakref.WeakKeyDictionary()
+        self._applied_engines = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(delay={self.delay}, jitter={self.jitter})"
+
+    def get_statement_latency(self, context: ExecutionContext) -> Optional[float]:
+        """Get the total latency simulated for all the round trips of a statement.
+
+        Args:
+            context: The execution context of the statement.
+
+        Returns:
+            The simulated latency in seconds, or `None` if the statement wasn't delayed.
+        """
+        return self._statement_latencies.get(context)
+
+    def get_tcl_latency(self, conn: Connection) -> Optional[float]:
+        """Get the latency simulated for the last COMMIT or ROLLBACK of a connection.
+
+        Args:
+            conn: The connection which executed the COMMIT or ROLLBACK.
+
+        Returns:
+            The simulated latency in seconds, or `None` if no COMMIT or ROLLBACK was delayed.
+        """
+        return self._tcl_latencies.get(conn)
+
+    def _sleep(self, conn: Connection) -> float:
+        delay = max(0.0, self.delay + self._random.uniform(-self.jitter, self.jitter)) if self.jitter else self.delay
+
+        if conn.dialect.is_async:
+            # Events of async engines run in a greenlet, from where SQLAlchemy can await on the event loop
+            await_only(asyncio.sleep(delay))
+        else:
+            time.sleep(delay)
+
+        return delay
+
+    def _on_before_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        delay = self._sleep(conn)
+
+        if context is not None:
+            # A single statement may need several round trips (e.g. batched "insertmanyvalues")
+            self._statement_latencies[context] = self._statement_latencies.get(context, 0.0) + delay
+
+    def _on_tcl(self, conn: Connection) -> None:
+        self._tcl_latencies[conn] = self._sleep(conn)
+
+    @contextlib.contextmanager
+    def apply(self, engine: Engine) -> Generator[None, None, None]:
+        """Delay the round trips of the given engine while the context manager is active.
+
+        Applying the same instance to an engine which it's already applied to has no further effect.
+
+        Args:
+            engine: The sync engine to delay the round trips of. For async engines, pass their `sync_engine`.
+        """
+        if engine not in self._applied_engines:
+            events_stack = contextlib.ExitStack()
+
+            for event_name, listener in (
+                ("before_cursor_execute", self._on_before_cursor_execute),
+                ("commit", self._on_tcl),
+                ("rollback", self._on_tcl),
+            ):
+                events_stack.enter_context(temp_sqlalchemy_event(engine, event_name, listener))
+
+            self._applied_engines[engine] = (events_stack, 0)
+
+        events_stack, applied_count = self._applied_engines[engine]
+        self._applied_engines[engine] = (events_stack, applied_count + 1)
+
+        try:
+            yield
+        finally:
+            events_stack, applied_count = self._applied_engines[engine]
+
+            if applied_count > 1:
+                self._applied_engines[engine] = (events_stack, applied_count - 1)
+            else:
+                del self._applied_engines[engine]
+                events_stack.close()
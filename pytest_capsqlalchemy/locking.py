@@ -0,0 +1,287 @@
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import Select, TextClause
+from sqlalchemy.sql.util import find_tables
+
+from pytest_capsqlalchemy.expression import CallSite, SQLExpression, SQLExpressionType
+from pytest_capsqlalchemy.utils import get_for_update_arg
+
+_LOCK_TABLE_RE = re.compile(
+    r"^\s*LOCK\s+(?:TABLE\s+)?(?:ONLY\s+)?(?P<tables>.+?)(?:\s+IN\s+(?P<mode>[\w\s]+?)\s+MODE)?(?:\s+NOWAIT)?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_FOR_CLAUSE_RE = re.compile(
+    r"\bFOR\s+(?P<mode>NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b"
+    r"(?:\s+OF\s+(?P<tables>[\w.\"]+(?:\s*,\s*[\w.\"]+)*))?",
+    re.IGNORECASE,
+)
+_FROM_TABLE_RE = re.compile(r"\bFROM\s+(?P<table>[\w.\"]+)", re.IGNORECASE)
+
+
+@dataclass
+class Lock:
+    """A lock taken on rows of a table, or on the whole table, by a captured statement.
+
+    Explicit locks are taken by `SELECT ... FOR UPDATE/SHARE` (e.g. `with_for_update()`) and `LOCK`
+    statements, implicit ones by the rows changed by UPDATE and DELETE statements. All of them are
+    held until the end of the transaction.
+    """
+
+    table: str
+    mode: str
+    explicit: bool
+    expression: SQLExpression = field(repr=False)
+    released_at: Optional[float] = None
+
+    @property
+    def acquired_at(self) -> Optional[float]:
+        """When the statement taking the lock started executing, as a `time.perf_counter()` value."""
+        return self.expression.started_at
+
+    @property
+    def hold_time(self) -> Optional[float]:
+        """How long the lock was held until its transaction ended, in seconds.
+
+        `None` when the transaction didn't end while being captured.
+        """
+        if self.acquired_at is None or self.released_at is None:
+            return None
+
+        return self.released_at - self.acquired_at
+
+    @property
+    def call_site(self) -> Optional[CallSite]:
+        """The location in the application code which executed the statement taking the lock."""
+        return self.expression.call_site
+
+    def __str__(self) -> str:
+        hold_time = f" held for {self.hold_time:.6f}s" if self.hold_time is not None else ""
+        location = f" at {self.call_site}" if self.call_site is not None else ""
+
+        return f"{self.mode} lock on {self.table}{hold_time}{location}"
+
+
+@dataclass
+class LockingTransaction:
+    """A captured transaction which took at least one lock."""
+
+    engine_name: Optional[str]
+    connection_id: Optional[int]
+    locks: list[Lock] = field(default_factory=list)
+    ended_by: Optional[SQLExpressionType] = None
+
+    @property
+    def table_order(self) -> tuple[str, ...]:
+        """The names of the locked tables, in the order they were first locked."""
+        return tuple(dict.fromkeys(lock.table for lock in self.locks))
+
+    def __str__(self) -> str:
+        return f"transaction locking {', '.join(self.table_order)} on engine {self.engine_name!r}"
+
+
+@dataclass
+class LockOrderConflict:
+    """Two transactions which locked the same pair of tables in the opposite order.
+
+    When such transactions run concurrently, each of them can end up waiting for the lock held by
+    the other one -- a deadlock.
+    """
+
+    first_table: str
+    second_table: str
+    transaction: LockingTransaction = field(repr=False)
+    conflicting_transaction: LockingTransaction = field(repr=False)
+
+    def _get_lock(self, transaction: LockingTransaction, table: str) -> Lock:
+        return next(lock for lock in transaction.locks if lock.table == table)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.first_table} before {self.second_table} "
+            f"({self._get_lock(self.transaction, self.second_table)}), "
+            f"but {self.second_table} before {self.first_table} "
+            f"({self._get_lock(self.conflicting_transaction, self.first_table)})"
+        )
+
+
+def _split_table_names(table_names: str) -> list[str]:
+    return [table_name.strip().strip('"').rsplit(".", 1)[-1].strip('"') for table_name in table_names.split(",")]
+
+
+def _get_text_locks(sql: str) -> list[tuple[str, str]]:
+    lock_table_match = _LOCK_TABLE_RE.match(sql)
+
+    if lock_table_match is not None:
+        mode = " ".join((lock_table_match["mode"] or "ACCESS EXCLUSIVE").upper().split())
+        return [(table, f"LOCK {mode}") for table in _split_table_names(lock_table_match["tables"])]
+
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+
+    for_clause_match = _FOR_CLAUSE_RE.search(sql)
+
+    if for_clause_match is None:
+        return []
+
+    mode = "FOR " + " ".join(for_clause_match["mode"].upper().split())
+
+    if for_clause_match["tables"] is not None:
+        return [(table, mode) for table in _split_table_names(for_clause_match["tables"])]
+
+    # Raw SQL has no table information, so assuming the rows of the first table are locked
+    from_table_match = _FROM_TABLE_RE.search(sql)
+
+    return [(table, mode) for table in _split_table_names(from_table_match["table"])] if from_table_match else []
+
+
+def _get_locks(expression: SQLExpression, *, include_writes: bool) -> list[tuple[str, str]]:
+    executable = expression.executable
+
+    if isinstance(executable, Select):
+        for_update = get_for_update_arg(executable)
+
+        if for_update is None:
+            return []
+
+        if for_update.read:
+            mode = "FOR KEY SHARE" if for_update.key_share else "FOR SHARE"
+        else:
+            mode = "FOR NO KEY UPDATE" if for_update.key_share else "FOR UPDATE"
+
+        if for_update.of:
+            table_names = dict.fromkeys(
+                table.name for of in for_update.of for table in find_tables(of, check_columns=True)
+            )
+            return [(table_name, mode) for table_name in table_names]
+
+        return [(table_name, mode) for table_name in expression.tables]
+
+    if isinstance(executable, TextClause):
+        return [] if expression.type.is_tcl else _get_text_locks(executable.text)
+
+    if include_writes and expression.type in {SQLExpressionType.UPDATE, SQLExpressionType.DELETE}:
+        return [(expression.tables[0], expression.type._value_)] if expression.tables else []
+
+    return []
+
+
+def takes_explicit_locks(expression: SQLExpression) -> bool:
+    """Check whether a captured expression takes explicit locks.
+
+    These are the row locks of `SELECT ... FOR UPDATE/SHARE` (e.g. `with_for_update()`) and the table
+    locks of `LOCK` statements, but not the row locks taken implicitly by UPDATE and DELETE statements.
+
+    Args:
+        expression: The captured SQL expression to check.
+
+    Returns:
+        Whether the expression takes at least one explicit lock.
+    """
+    return bool(_get_locks(expression, include_writes=False))
+
+
+def find_locking_transactions(
+    expressions: Iterable[SQLExpression],
+    *,
+    include_writes: bool = True,
+) -> list[LockingTransaction]:
+    """Find the transactions which took row or table locks, and the locks they took.
+
+    The statements are assigned to transactions by the connection they were executed on, from their
+    BEGIN to their COMMIT or ROLLBACK, which releases all of their locks. Statements executed before
+    the BEGIN of their transaction was captured are assigned to an implicitly started transaction.
+
+    Args:
+        expressions: The captured SQL expressions to analyze, in the order they were executed.
+        include_writes: Whether to include the row locks taken implicitly by UPDATE and DELETE statements.
+
+    Returns:
+        The transactions which took at least one lock, in the order they started.
+    """
+    transactions = []
+    open_transactions: dict[tuple[Optional[str], Optional[int]], LockingTransaction] = {}
+
+    for expression in expressions:
+        connection = (expression.engine_name, expression.connection_id)
+
+        if expression.type == SQLExpressionType.BEGIN:
+            open_transactions[connection] = LockingTransaction(expression.engine_name, expression.connection_id)
+            transactions.append(open_transactions[connection])
+            continue
+
+        if expression.type.is_tcl:
+            transaction = open_transactions.pop(connection, None)
+
+            if transaction is not None:
+                transaction.ended_by = expression.type
+
+                for lock in transaction.locks:
+                    lock.released_at = expression.started_at
+
+            continue
+
+        locks = _get_locks(expression, include_writes=include_writes)
+
+        if not locks:
+            continue
+
+        if connection not in open_transactions:
+            open_transactions[connection] = LockingTransaction(expression.engine_name, expression.connection_id)
+            transactions.append(open_transactions[connection])
+
+        open_transactions[connection].locks += [
+            Lock(table=table, mode=mode, explicit=mode not in {"UPDATE", "DELETE"}, expression=expression)
+            for table, mode in locks
+        ]
+
+    return [transaction for transaction in transactions if transaction.locks]
+
+
+def find_lock_order_conflicts(transactions: Iterable[LockingTransaction]) -> list[LockOrderConflict]:
+    """Find pairs of tables which were locked in the opposite order by different transactions.
+
+    Tables locked by the same statement are locked at the same time, so they are never considered to
+    be locked in a specific order.
+
+    Args:
+        transactions: The transactions to analyze, as returned by `find_locking_transactions`.
+
+    Returns:
+        A conflict for each pair of tables locked in both orders, with the first transactions which
+        locked them in each of the orders.
+    """
+    table_orders: dict[tuple[str, str], LockingTransaction] = {}
+    conflicts = []
+
+    for transaction in transactions:
+        # The index of the statement which first locked each table, the locks of a statement are contiguous
+        first_locks: dict[str, int] = {}
+        statement_index = -1
+        previous_expression: Optional[SQLExpression] = None
+
+        for lock in transaction.locks:
+            if lock.expression is not previous_expression:
+                statement_index += 1
+                previous_expression = lock.expression
+
+            first_locks.setdefault(lock.table, statement_index)
+
+        for first_table, first_index in first_locks.items():
+            for second_table, second_index in first_locks.items():
+                if first_index < second_index and (first_table, second_table) not in table_orders:
+                    table_orders[first_table, second_table] = transaction
+
+                    if (second_table, first_table) in table_orders:
+                        conflicts.append(
+                            LockOrderConflict(
+                                first_table=second_table,
+                                second_table=first_table,
+                                transaction=table_orders[second_table, first_table],
+                                conflicting_transaction=transaction,
+                            )
+                        )
+
+    return conflicts
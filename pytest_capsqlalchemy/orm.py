@@ -0,0 +1,46 @@
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+from pytest_capsqlalchemy.expression import CallSite, SQLExpression
+
+
+class IdentityMapSample(NamedTuple):
+    """The size of a session's identity map at a specific point in time."""
+
+    timestamp: float
+    engine_name: str
+    size: int
+
+
+@dataclass
+class SessionFlush:
+    """A flush of an ORM session, captured from the session's flush events.
+
+    The object counts are taken right before the flush, the identity map size right after it.
+    """
+
+    engine_name: str
+    autoflush: bool
+    new: int
+    dirty: int
+    deleted: int
+    started_at: float
+    duration: float = 0.0
+    identity_map_size: int = 0
+    call_site: Optional[CallSite] = None
+    task: Optional[str] = None
+    expressions: list[SQLExpression] = field(default_factory=list, repr=False)
+
+    @property
+    def object_count(self) -> int:
+        """The total number of objects written by the flush."""
+        return self.new + self.dirty + self.deleted
+
+    def __str__(self) -> str:
+        kind = "autoflush" if self.autoflush else "flush"
+        location = f" at {self.call_site}" if self.call_site is not None else ""
+
+        return (
+            f"{kind} of {self.object_count} object(s) ({self.new} new, {self.dirty} dirty, {self.deleted} deleted), "
+            f"{len(self.expressions)} statement(s){location}"
+        )
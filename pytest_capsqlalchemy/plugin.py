@@ -1,26 +1,137 @@
-from collections.abc import Generator
+import os
+import re
+from collections.abc import Generator, Mapping
+from typing import TYPE_CHECKING
 
 import pytest
-from sqlalchemy.ext.asyncio import AsyncEngine
 
-from pytest_capsqlalchemy import SQLAlchemyCaptureContext, SQLAlchemyCapturer
+# This module is imported by the pytest11 entry point in every pytest process, so SQLAlchemy and
+# the capture machinery are only imported once a test requests one of the fixtures
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_capsqlalchemy.capturer import SQLAlchemyCapturer
+    from pytest_capsqlalchemy.context import AnyEngine, SQLAlchemyCaptureContext
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Register the command line options of the plugin."""
+    group = parser.getgroup("capsqlalchemy")
+    group.addoption(
+        "--capsqlalchemy-trace-dir",
+        dest="capsqlalchemy_trace_dir",
+        default=None,
+        metavar="DIR",
+        help="Write a Chrome trace file of the database activity of each test using capsqlalchemy to DIR.",
+    )
+    group.addoption(
+        "--capsqlalchemy-capture-details",
+        dest="capsqlalchemy_capture_details",
+        action="store_true",
+        default=False,
+        help="Capture the timings, call sites, connections and tasks of the statements in tests using "
+        "capsqlalchemy, unless overridden by the capsqlalchemy marker.",
+    )
+    group.addoption(
+        "--capsqlalchemy-statement-timeout",
+        dest="capsqlalchemy_statement_timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Fail any statement taking longer than SECONDS in tests using capsqlalchemy, "
+        "unless overridden by the capsqlalchemy marker.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register the `capsqlalchemy` marker."""
+    config.addinivalue_line(
+        "markers",
+        "capsqlalchemy(**options): options of the capture context of the test, e.g. capture_sessions=True",
+    )
+
+
+@pytest.fixture
+def capsqlalchemy_engines(db_engine: "AnyEngine") -> Mapping[str, "AnyEngine"]:
+    """The engines captured by the plugin, by name.
+
+    By default only the `db_engine` fixture is captured, under the name `"default"`. Override this
+    fixture to capture several engines at once, e.g. a primary database and its read replicas:
+
+    ```python
+    @pytest.fixture
+    def capsqlalchemy_engines(primary_engine, replica_engine):
+        return {"primary": primary_engine, "replica": replica_engine}
+    ```
+
+    The names can then be used to filter the assertions, e.g. `assert_query_count(1, engine="replica")`.
+
+    Returns:
+        A mapping of names to the sync or async engines to capture.
+    """
+    from pytest_capsqlalchemy.context import DEFAULT_ENGINE_NAME
+
+    return {DEFAULT_ENGINE_NAME: db_engine}
 
 
 @pytest.fixture
-def capsqlalchemy_context(db_engine: AsyncEngine) -> Generator[SQLAlchemyCaptureContext]:
+def capsqlalchemy_context(
+    request: pytest.FixtureRequest,
+    capsqlalchemy_engines: Mapping[str, "AnyEngine"],
+) -> Generator["SQLAlchemyCaptureContext"]:
     """The main fixture to get the [`SQLAlchemyCaptureContext`][pytest_capsqlalchemy.context.SQLAlchemyCaptureContext].
 
-    This is the context for the full test, which captures all SQL expressions executed during the test.
+    This is the context for the full test, which captures all SQL expressions executed during the test
+    on the engines from the [`capsqlalchemy_engines`][pytest_capsqlalchemy.plugin.capsqlalchemy_engines] fixture.
 
     To capture only the SQL expressions executed within a specific block, use the
     [`capsqlalchemy`][pytest_capsqlalchemy.plugin.capsqlalchemy] fixture.
+
+    The keyword arguments of the `capsqlalchemy` marker closest to the test are passed on to the context,
+    e.g. to capture the flushes of ORM sessions as well:
+
+    ```python
+    @pytest.mark.capsqlalchemy(capture_sessions=True)
+    async def test_import_orders(db_session, capsqlalchemy): ...
+    ```
+
+    When pytest runs with `--capsqlalchemy-statement-timeout=SECONDS`, every statement of the test has to
+    finish within that time (see [`StatementTimeout`][pytest_capsqlalchemy.timeout.StatementTimeout]),
+    unless the marker sets a different `statement_timeout`.
+
+    When pytest runs with `--capsqlalchemy-capture-details`, the details of the statements (see
+    [`SQLAlchemyCaptureContext`][pytest_capsqlalchemy.context.SQLAlchemyCaptureContext]) are captured
+    in every test, unless the marker sets `capture_details=False`.
+
+    When pytest runs with `--capsqlalchemy-trace-dir=DIR`, a Chrome trace file with the timeline of the
+    database activity of the test is written to `DIR` once the test is done. The details of the
+    statements are captured for it, unless the marker sets `capture_details=False`.
     """
-    with SQLAlchemyCaptureContext(db_engine) as capsqlalchemy_ctx:
+    from pytest_capsqlalchemy.context import SQLAlchemyCaptureContext
+    from pytest_capsqlalchemy.trace import write_chrome_trace
+
+    marker = request.node.get_closest_marker("capsqlalchemy")
+    options = dict(marker.kwargs) if marker is not None else {}
+
+    statement_timeout = request.config.getoption("capsqlalchemy_statement_timeout", default=None)
+
+    if statement_timeout is not None:
+        options.setdefault("statement_timeout", statement_timeout)
+
+    trace_dir = request.config.getoption("capsqlalchemy_trace_dir", default=None)
+
+    # The trace is built from the details of the statements
+    if trace_dir is not None or request.config.getoption("capsqlalchemy_capture_details", default=False):
+        options.setdefault("capture_details", True)
+
+    with SQLAlchemyCaptureContext(capsqlalchemy_engines, **options) as capsqlalchemy_ctx:
         yield capsqlalchemy_ctx
 
+    if trace_dir is not None:
+        trace_name = re.sub(r"[^\w.-]+", "_", request.node.nodeid).strip("_")
+        write_chrome_trace(capsqlalchemy_ctx, os.path.join(trace_dir, f"{trace_name}.json"))
+
 
 @pytest.fixture()
-def capsqlalchemy(capsqlalchemy_context: SQLAlchemyCaptureContext) -> SQLAlchemyCapturer:
+def capsqlalchemy(capsqlalchemy_context: "SQLAlchemyCaptureContext") -> "SQLAlchemyCapturer":
     """The main fixture to get the [`SQLAlchemyCapturer`][pytest_capsqlalchemy.capturer.SQLAlchemyCapturer].
 
     Example Usage:
@@ -41,4 +152,6 @@ def capsqlalchemy(capsqlalchemy_context: SQLAlchemyCaptureContext) -> SQLAlchemy
     Returns:
         The capturer object with the full test context already set up.
     """
+    from pytest_capsqlalchemy.capturer import SQLAlchemyCapturer
+
     return SQLAlchemyCapturer(capsqlalchemy_context)
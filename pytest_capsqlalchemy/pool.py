@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ConnectionCheckout:
+    """A checkout of a connection from the connection pool of a captured engine.
+
+    The `duration` (in seconds) is `None` while the connection is still checked out.
+    """
+
+    engine_name: str
+    task: str
+    started_at: float
+    duration: Optional[float] = None
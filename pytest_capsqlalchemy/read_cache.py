@@ -0,0 +1,186 @@
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass, field
+
+from sqlalchemy import TextClause
+
+from pytest_capsqlalchemy.expression import SQLExpression, SQLExpressionType
+from pytest_capsqlalchemy.locking import takes_explicit_locks
+from pytest_capsqlalchemy.report import get_fingerprint, to_line
+
+_WRITE_TYPES = frozenset({SQLExpressionType.INSERT, SQLExpressionType.UPDATE, SQLExpressionType.DELETE})
+
+
+@dataclass
+class CachedReadStats:
+    """How a group of reads with the same fingerprint would have performed with a read cache."""
+
+    fingerprint: str
+    sql: str
+    reads: int = 0
+    hits: int = 0
+    read_time: float = 0.0
+    saved_time: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        """The fraction of the reads which would have been served from the cache."""
+        return self.hits / self.reads if self.reads else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.fingerprint}  {self.hits}/{self.reads} hits ({self.hit_ratio:.1%}), "
+            f"{self.saved_time:.6f}s saved  {self.sql}"
+        )
+
+
+@dataclass
+class ReadCacheSimulation:
+    """The result of replaying captured statements through a simulated read cache.
+
+    See [`simulate_read_cache`][pytest_capsqlalchemy.read_cache.simulate_read_cache].
+    """
+
+    max_size: int
+    statistics: list[CachedReadStats] = field(default_factory=list)
+
+    @property
+    def reads(self) -> int:
+        """The number of reads which were replayed."""
+        return sum(stats.reads for stats in self.statistics)
+
+    @property
+    def hits(self) -> int:
+        """The number of reads which would have been served from the cache."""
+        return sum(stats.hits for stats in self.statistics)
+
+    @property
+    def hit_ratio(self) -> float:
+        """The fraction of all the reads which would have been served from the cache."""
+        return self.hits / self.reads if self.reads else 0.0
+
+    @property
+    def read_time(self) -> float:
+        """The time the database spent on all the reads, in seconds."""
+        return sum(stats.read_time for stats in self.statistics)
+
+    @property
+    def saved_time(self) -> float:
+        """The database time which the cache would have saved, in seconds."""
+        return sum(stats.saved_time for stats in self.statistics)
+
+    def __str__(self) -> str:
+        lines = [
+            f"Read cache of {self.max_size} entries: {self.hits}/{self.reads} hits ({self.hit_ratio:.1%}), "
+            f"{self.saved_time:.6f}s of {self.read_time:.6f}s saved"
+        ]
+        lines += [f"  {stats}" for stats in self.statistics]
+
+        return "\n".join(lines)
+
+
+def _is_read(expression: SQLExpression) -> bool:
+    if expression.type == SQLExpressionType.SELECT:
+        return True
+
+    executable = expression.executable
+
+    return isinstance(executable, TextClause) and executable.text.lstrip().upper().startswith("SELECT")
+
+
+def _is_cacheable(expression: SQLExpression) -> bool:
+    # Locking reads (SELECT ... FOR UPDATE) are made to get the current rows within a write transaction
+    if takes_explicit_locks(expression):
+        return False
+
+    return bool(expression.tables)
+
+
+def _get_cache_key(expression: SQLExpression) -> Hashable:
+    # The values are compared by their representation, as they aren't necessarily hashable (e.g. lists)
+    statement = expression.cache_key.key if expression.cache_key is not None else expression.get_sql()
+
+    return (expression.engine_name, statement, repr(expression.bind_values))
+
+
+def _invalidate(cache: OrderedDict[Hashable, tuple[str, ...]], expression: SQLExpression) -> None:
+    # Only the first table of a write is written to, any other ones are only read from (e.g. in subqueries)
+    written_table = expression.tables[0] if expression.type in _WRITE_TYPES and expression.tables else None
+
+    if written_table is None:
+        cache.clear()
+        return
+
+    for key, tables in list(cache.items()):
+        if written_table in tables:
+            del cache[key]
+
+
+def simulate_read_cache(expressions: Iterable[SQLExpression], *, max_size: int = 128) -> ReadCacheSimulation:
+    """Replay captured statements through a simulated application-level read cache.
+
+    This answers "what if these reads were cached?" before spending any effort on a real cache. Each
+    SELECT is looked up in a least recently used cache of `max_size` entries, keyed by its structure
+    and bind values, and every hit saves the time the database spent on the read (including any
+    simulated latency). Writes invalidate the cached reads of the tables they write to, on all the
+    engines, as a write to a primary database makes the reads of its replicas stale as well.
+
+    The simulation errs on the side of fewer hits: raw SQL reads have no table information to be
+    invalidated by and locking reads (`SELECT ... FOR UPDATE`) need the current rows, so neither of
+    them is ever cached, while raw SQL which isn't a read (e.g. a text UPDATE or a DDL statement)
+    invalidates the whole cache.
+
+    Args:
+        expressions: The captured SQL expressions to replay, in the order they were executed.
+        max_size: The maximum number of reads the cache holds at once.
+
+    Returns:
+        The statistics of the reads, grouped by their fingerprint (see
+        [`get_fingerprint`][pytest_capsqlalchemy.report.get_fingerprint]) and sorted by the time the
+        cache would have saved.
+
+    Raises:
+        ValueError: If `max_size` is less than 1.
+    """
+    if max_size < 1:
+        raise ValueError(f"The read cache must hold at least one entry, got {max_size=}")
+
+    cache: OrderedDict[Hashable, tuple[str, ...]] = OrderedDict()
+    statistics: dict[str, CachedReadStats] = {}
+
+    for expression in expressions:
+        if expression.type.is_tcl:
+            continue
+
+        if not _is_read(expression):
+            _invalidate(cache, expression)
+            continue
+
+        sql = expression.get_sql()
+        fingerprint = get_fingerprint(sql)
+        stats = statistics.setdefault(fingerprint, CachedReadStats(fingerprint=fingerprint, sql=to_line(sql)))
+        duration = expression.projected_duration or 0.0
+
+        stats.reads += 1
+        stats.read_time += duration
+
+        if not _is_cacheable(expression):
+            continue
+
+        key = _get_cache_key(expression)
+
+        if key in cache:
+            cache.move_to_end(key)
+            stats.hits += 1
+            stats.saved_time += duration
+            continue
+
+        cache[key] = expression.tables
+
+        if len(cache) > max_size:
+            cache.popitem(last=False)
+
+    return ReadCacheSimulation(
+        max_size=max_size,
+        statistics=sorted(statistics.values(), key=lambda stats: (-stats.saved_time, -stats.hits)),
+    )
@@ -0,0 +1,181 @@
+import difflib
+import hashlib
+import re
+from collections import Counter
+from collections.abc import Sequence
+
+MAX_LINE_LENGTH = 200
+"""Statements longer than this are truncated in failure reports."""
+
+MAX_GROUPS = 10
+"""The maximum number of statement groups listed in the summary of a failure report."""
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def to_line(sql: str) -> str:
+    """Collapse a SQL statement onto a single line, as it's shown in failure reports.
+
+    Args:
+        sql: The SQL statement.
+
+    Returns:
+        The statement with all its whitespace collapsed to single spaces, truncated to `MAX_LINE_LENGTH`.
+    """
+    line = " ".join(sql.split())
+
+    return line if len(line) <= MAX_LINE_LENGTH else line[: MAX_LINE_LENGTH - 3] + "..."
+
+
+def _normalize(sql: str) -> str:
+    return " ".join(_LITERAL_RE.sub("?", sql).split())
+
+
+def _hash(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode(), usedforsecurity=False).hexdigest()[:8]
+
+
+def get_fingerprint(sql: str) -> str:
+    """Get a short identifier of a SQL statement, which ignores its formatting and literal values.
+
+    Statements which only differ in the values they were rendered with (e.g. the queries of an N+1
+    loop with `bind_params=True`) have the same fingerprint.
+
+    Args:
+        sql: The SQL statement.
+
+    Returns:
+        The fingerprint, 8 hexadecimal characters.
+    """
+    return _hash(_normalize(sql))
+
+
+def _render_group_counts(expected: Sequence[str], actual: Sequence[str], *, group_by_fingerprint: bool) -> list[str]:
+    def group_key(sql: str) -> tuple[str, str]:
+        statement_type = sql.split(None, 1)[0].upper() if sql.strip() else ""
+
+        return (statement_type, _normalize(sql) if group_by_fingerprint else statement_type)
+
+    expected_counts = Counter(map(group_key, expected))
+    actual_counts = Counter(map(group_key, actual))
+
+    different_groups = [
+        (group, expected_counts[group], actual_counts[group])
+        for group in dict.fromkeys([*expected_counts, *actual_counts])
+        if expected_counts[group] != actual_counts[group]
+    ]
+
+    if not different_groups:
+        return ["The same statements were captured, but in a different order"]
+
+    lines = ["Statements with different counts (expected -> captured):"]
+
+    for (statement_type, normalized_sql), expected_count, actual_count in different_groups[:MAX_GROUPS]:
+        if group_by_fingerprint:
+            lines.append(
+                f"  {statement_type:<8} {_hash(normalized_sql)}  {expected_count} -> {actual_count}  "
+                f"{to_line(normalized_sql)}"
+            )
+        else:
+            lines.append(f"  {statement_type:<8} {expected_count} -> {actual_count}")
+
+    if len(different_groups) > MAX_GROUPS:
+        lines.append(f"  ... and {len(different_groups) - MAX_GROUPS} more")
+
+    return lines
+
+
+def _render_first_difference(expected: Sequence[str], actual: Sequence[str], *, context: int, window: int) -> list[str]:
+    first_index = next(
+        (index for index, (expected_sql, actual_sql) in enumerate(zip(expected, actual)) if expected_sql != actual_sql),
+        min(len(expected), len(actual)),
+    )
+
+    lines = [f"First difference at captured statement {first_index}:"]
+    lines += [
+        f"    {index:>5}  {to_line(actual[index])}" for index in range(max(0, first_index - context), first_index)
+    ]
+
+    # Only diffing a window after the first difference keeps the cost bounded for any number of statements.
+    # The slices are larger than the window, so the statements cut off at their ends don't show up as changes.
+    expected_slice = expected[first_index : first_index + 2 * window]
+    actual_slice = actual[first_index : first_index + 2 * window]
+
+    # Each diff line is a (prefix, index, statement, is_expected, is_captured) tuple
+    diff_lines: list[tuple[str, int, str, bool, bool]] = []
+    matcher = difflib.SequenceMatcher(None, expected_slice, actual_slice, autojunk=False)
+
+    for tag, expected_start, expected_end, actual_start, actual_end in matcher.get_opcodes():
+        if tag == "equal":
+            diff_lines += [
+                (" ", first_index + index, actual_slice[index], True, True) for index in range(actual_start, actual_end)
+            ]
+            continue
+
+        diff_lines += [
+            ("-", first_index + index, expected_slice[index], True, False)
+            for index in range(expected_start, expected_end)
+        ]
+        diff_lines += [
+            ("+", first_index + index, actual_slice[index], False, True) for index in range(actual_start, actual_end)
+        ]
+
+    shown_lines = diff_lines[:window]
+    lines += [f"  {prefix} {index:>5}  {to_line(sql)}" for prefix, index, sql, _, _ in shown_lines]
+
+    remaining_expected = len(expected) - first_index - sum(1 for *_, is_expected, _ in shown_lines if is_expected)
+    remaining_actual = len(actual) - first_index - sum(1 for *_, is_captured in shown_lines if is_captured)
+
+    if remaining_expected or remaining_actual:
+        lines.append(f"    ... {remaining_expected} more expected and {remaining_actual} more captured not shown")
+
+    return lines
+
+
+def render_sequence_mismatch(
+    title: str,
+    expected: Sequence[str],
+    actual: Sequence[str],
+    *,
+    group_by_fingerprint: bool = True,
+    context: int = 3,
+    window: int = 10,
+) -> str:
+    """Render a readable report of the differences between the expected and the captured statements.
+
+    Instead of a full diff, which is slow to compute and impossible to read for captures with
+    thousands of statements, the report summarizes which statements were captured more or fewer
+    times than expected, grouped by type and fingerprint (see `get_fingerprint`), and only shows the
+    first diverging window of statements together with the statements preceding it:
+
+    ```text
+    Captured queries don't match the expected ones: expected 1200, captured 1201
+
+    Statements with different counts (expected -> captured):
+      SELECT   1c0ff3a2  100 -> 102  SELECT orders.id FROM orders WHERE orders.id = $?::INTEGER
+      UPDATE   9e4b27d0  1 -> 0  UPDATE orders SET recipient=$?::VARCHAR WHERE orders.id = $?::INTEGER
+
+    First difference at captured statement 57:
+            56  SELECT orders.id FROM orders WHERE orders.id = $1::INTEGER
+      -     57  UPDATE orders SET recipient=$1::VARCHAR WHERE orders.id = $2::INTEGER
+      +     57  SELECT orders.id FROM orders WHERE orders.id = $1::INTEGER
+    ```
+
+    Args:
+        title: The first line of the report.
+        expected: The expected statements, as SQL strings or query types.
+        actual: The captured statements, in the same format as `expected`.
+        group_by_fingerprint: Whether to group the statements by their fingerprint in the summary, or
+            only by their type (e.g. when comparing query types).
+        context: The number of matching statements to show before the first difference.
+        window: The maximum number of diff lines to show from the first difference onwards.
+
+    Returns:
+        The report, to be used as the message of an `AssertionError`.
+    """
+    lines = [f"{title}: expected {len(expected)}, captured {len(actual)}", ""]
+    lines += _render_group_counts(expected, actual, group_by_fingerprint=group_by_fingerprint)
+    lines.append("")
+    lines += _render_first_difference(expected, actual, context=context, window=window)
+
+    return "\n".join(lines)
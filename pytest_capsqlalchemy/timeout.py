@@ -0,0 +1,193 @@
+import contextlib
+import time
+import weakref
+from collections.abc import Generator
+from typing import Any, Optional
+
+from sqlalchemy import Connection, Engine
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+
+from pytest_capsqlalchemy.expression import CallSite
+from pytest_capsqlalchemy.utils import get_call_site, temp_sqlalchemy_event
+
+_QUERY_CANCELED_SQLSTATE = "57014"
+"""The SQLSTATE of PostgreSQL statements cancelled because of the `statement_timeout`."""
+
+
+class StatementTimeoutError(AssertionError):
+    """Raised when a statement executed on a captured engine exceeds the statement timeout."""
+
+    statement: str
+    elapsed: float
+    timeout: float
+    call_site: Optional[CallSite]
+
+    def __init__(self, statement: str, *, elapsed: float, timeout: float, call_site: Optional[CallSite] = None):
+        """Create a new StatementTimeoutError instance.
+
+        Args:
+            statement: The SQL of the statement which exceeded the timeout.
+            elapsed: How long the statement took until it returned or was cancelled, in seconds.
+            timeout: The timeout which was exceeded, in seconds.
+            call_site: The location in the application code which executed the statement.
+        """
+        self.statement = statement
+        self.elapsed = elapsed
+        self.timeout = timeout
+        self.call_site = call_site
+
+        location = f" at {call_site}" if call_site is not None else ""
+
+        super().__init__(
+            f"Statement exceeded the timeout of {timeout:.3f}s after {elapsed:.3f}s{location}:\n{statement}"
+        )
+
+
+class StatementTimeout:
+    """Fails every statement which takes longer than a deadline, so a runaway query can't hang the tests.
+
+    On PostgreSQL the deadline is enforced by the database with a `SET LOCAL statement_timeout`,
+    issued once per transaction on the connection executing the statement, so the statement is
+    cancelled as soon as it's exceeded. On other databases (e.g. SQLite) the elapsed time is checked
+    once the DBAPI cursor returns instead. Either way a
+    [`StatementTimeoutError`][pytest_capsqlalchemy.timeout.StatementTimeoutError] with the offending
+    SQL and the elapsed time is raised.
+
+    Statements executed outside of a transaction (e.g. with the `AUTOCOMMIT` isolation level) are
+    only checked once they return, as `SET LOCAL` has no effect there.
+
+    A single instance can be applied to the same engine by several (nested) capture contexts at
+    once, and every statement is still checked only once.
+    """
+
+    timeout: float
+
+    _started_at: "weakref.WeakKeyDictionary[ExecutionContext, float]"
+    _timed_out_connections: "weakref.WeakSet[Connection]"
+    _applied_engines: dict[Engine, tuple[contextlib.ExitStack, int]]
+
+    def __init__(self, timeout: float):
+        """Create a new StatementTimeout instance.
+
+        Args:
+            timeout: The maximum time a statement may take, in seconds.
+
+        Raises:
+            ValueError: If `timeout` is not positive.
+        """
+        if timeout <= 0:
+            raise ValueError(f"{self.__class__.__name__}: the timeout must be positive, got {timeout=}")
+
+        self.timeout = timeout
+
+        self._started_at = weakref.WeakKeyDictionary()
+        self._timed_out_connections = weakref.WeakSet()
+        self._applied_engines = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(timeout={self.timeout})"
+
+    def _on_before_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        if conn.dialect.name == "postgresql" and conn.in_transaction() and conn not in self._timed_out_connections:
+            # Executed on a DBAPI cursor directly, so it's neither captured nor delayed by a simulated latency.
+            # Not on the cursor of the statement, as a server-side one (e.g. for a streamed result) wouldn't
+            # apply the setting to the connection
+            timeout_cursor = conn.connection.cursor()
+
+            try:
+                timeout_cursor.execute(f"SET LOCAL statement_timeout = {max(1, round(self.timeout * 1000))}")
+            finally:
+                timeout_cursor.close()
+
+            self._timed_out_connections.add(conn)
+
+        if context is not None:
+            self._started_at[context] = time.perf_counter()
+
+    def _on_after_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        started_at = self._started_at.get(context) if context is not None else None
+
+        if started_at is None:  # pragma: no cover
+            return
+
+        elapsed = time.perf_counter() - started_at
+
+        if elapsed > self.timeout:
+            raise StatementTimeoutError(statement, elapsed=elapsed, timeout=self.timeout, call_site=get_call_site())
+
+    def _on_handle_error(self, exception_context: ExceptionContext) -> Optional[BaseException]:
+        original_exception = exception_context.original_exception
+        execution_context = exception_context.execution_context
+
+        if getattr(original_exception, "pgcode", None) != _QUERY_CANCELED_SQLSTATE or execution_context is None:
+            return None
+
+        started_at = self._started_at.get(execution_context)
+
+        if started_at is None:  # pragma: no cover
+            return None
+
+        return StatementTimeoutError(
+            exception_context.statement or "",
+            elapsed=time.perf_counter() - started_at,
+            timeout=self.timeout,
+            call_site=get_call_site(),
+        )
+
+    def _on_transaction_end(self, conn: Connection) -> None:
+        # SET LOCAL only lasts until the end of the transaction
+        self._timed_out_connections.discard(conn)
+
+    @contextlib.contextmanager
+    def apply(self, engine: Engine) -> Generator[None, None, None]:
+        """Enforce the timeout on the statements of the given engine while the context manager is active.
+
+        Applying the same instance to an engine which it's already applied to has no further effect.
+
+        Args:
+            engine: The sync engine to enforce the timeout on. For async engines, pass their `sync_engine`.
+        """
+        if engine not in self._applied_engines:
+            events_stack = contextlib.ExitStack()
+
+            for event_name, listener in (
+                ("before_cursor_execute", self._on_before_cursor_execute),
+                ("after_cursor_execute", self._on_after_cursor_execute),
+                ("handle_error", self._on_handle_error),
+                ("commit", self._on_transaction_end),
+                ("rollback", self._on_transaction_end),
+            ):
+                events_stack.enter_context(temp_sqlalchemy_event(engine, event_name, listener))
+
+            self._applied_engines[engine] = (events_stack, 0)
+
+        events_stack, applied_count = self._applied_engines[engine]
+        self._applied_engines[engine] = (events_stack, applied_count + 1)
+
+        try:
+            yield
+        finally:
+            events_stack, applied_count = self._applied_engines[engine]
+
+            if applied_count > 1:
+                self._applied_engines[engine] = (events_stack, applied_count - 1)
+            else:
+                del self._applied_engines[engine]
+                events_stack.close()
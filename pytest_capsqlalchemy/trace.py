@@ -0,0 +1,183 @@
+import json
+import os
+from collections.abc import Sequence
+from typing import Any, Optional, Union
+
+from pytest_capsqlalchemy.context import SQLAlchemyCaptureContext
+from pytest_capsqlalchemy.expression import SQLExpression, SQLExpressionType
+from pytest_capsqlalchemy.orm import SessionFlush
+from pytest_capsqlalchemy.pool import ConnectionCheckout
+
+
+class _ChromeTraceBuilder:
+    """Collects the events of a Chrome trace, assigning a process per engine and a thread per task."""
+
+    def __init__(self, context: SQLAlchemyCaptureContext):
+        self._pids = {engine_name: pid for pid, engine_name in enumerate(context.engines, start=1)}
+        self._tids: dict[tuple[int, str], int] = {}
+        self._events: list[dict[str, Any]] = []
+
+        timestamps = [expr.started_at for expr in context.captured_expressions if expr.started_at is not None]
+        timestamps += [checkout.started_at for checkout in context.connection_checkouts]
+        timestamps += [flush.started_at for flush in context.flushes]
+        self._origin = min(timestamps, default=0.0)
+
+    def _get_pid_and_tid(self, engine_name: Optional[str], task: Optional[str]) -> tuple[int, int]:
+        pid = self._pids.get(engine_name or "", 0)
+        tid = self._tids.setdefault((pid, task or ""), len(self._tids) + 1)
+
+        return pid, tid
+
+    def add_span(
+        self,
+        *,
+        name: str,
+        category: str,
+        engine_name: Optional[str],
+        task: Optional[str],
+        started_at: float,
+        duration: float,
+        args: dict[str, Any],
+    ) -> None:
+        pid, tid = self._get_pid_and_tid(engine_name, task)
+
+        self._events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            # The trace event format expects all timestamps and durations in microseconds
+            "ts": round((started_at - self._origin) * 1_000_000, 3),
+            "dur": round(duration * 1_000_000, 3),
+            "pid": pid,
+            "tid": tid,
+            "args": args,
+        })
+
+    def add_expressions(self, expressions: Sequence[SQLExpression]) -> None:
+        open_transactions: dict[Optional[int], SQLExpression] = {}
+
+        for expr in expressions:
+            if expr.started_at is None:  # pragma: no cover
+                continue
+
+            if expr.type == SQLExpressionType.BEGIN:
+                open_transactions[expr.connection_id] = expr
+            elif expr.type.is_tcl:
+                begin_expr = open_transactions.pop(expr.connection_id, None)
+
+                if begin_expr is not None and begin_expr.started_at is not None:
+                    self.add_span(
+                        name="transaction",
+                        category="transaction",
+                        engine_name=begin_expr.engine_name,
+                        task=begin_expr.task,
+                        started_at=begin_expr.started_at,
+                        duration=expr.started_at - begin_expr.started_at,
+                        args={"outcome": expr.type._value_},
+                    )
+            else:
+                self.add_span(
+                    name=" ".join([expr.type._value_, *expr.tables[:1]]),
+                    category="statement",
+                    engine_name=expr.engine_name,
+                    task=expr.task,
+                    started_at=expr.started_at,
+                    duration=expr.duration or 0.0,
+                    args=self._get_statement_args(expr),
+                )
+
+    @staticmethod
+    def _get_statement_args(expr: SQLExpression) -> dict[str, Any]:
+        args: dict[str, Any] = {"sql": expr.get_sql()}
+
+        if expr.call_site is not None:
+            args["call_site"] = str(expr.call_site)
+
+        if expr.simulated_latency is not None:
+            args["simulated_latency_ms"] = expr.simulated_latency * 1000
+
+        return args
+
+    def add_connection_checkouts(self, checkouts: Sequence[ConnectionCheckout]) -> None:
+        for checkout in checkouts:
+            if checkout.duration is not None:
+                self.add_span(
+                    name="connection checkout",
+                    category="connection",
+                    engine_name=checkout.engine_name,
+                    task=checkout.task,
+                    started_at=checkout.started_at,
+                    duration=checkout.duration,
+                    args={},
+                )
+
+    def add_flushes(self, flushes: Sequence[SessionFlush]) -> None:
+        for flush in flushes:
+            self.add_span(
+                name="autoflush" if flush.autoflush else "flush",
+                category="flush",
+                engine_name=flush.engine_name,
+                task=flush.task,
+                started_at=flush.started_at,
+                duration=flush.duration,
+                args={"new": flush.new, "dirty": flush.dirty, "deleted": flush.deleted},
+            )
+
+    def build(self) -> dict[str, Any]:
+        metadata_events: list[dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"engine: {engine_name}"}}
+            for engine_name, pid in self._pids.items()
+        ]
+        metadata_events += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": task}}
+            for (pid, task), tid in self._tids.items()
+        ]
+
+        return {
+            "traceEvents": metadata_events + sorted(self._events, key=lambda event: event["ts"]),
+            "displayTimeUnit": "ms",
+        }
+
+
+def build_chrome_trace(context: SQLAlchemyCaptureContext) -> dict[str, Any]:
+    """Build a timeline of the database activity captured by a context in the Chrome trace event format.
+
+    The timeline shows each captured engine as a process and each asyncio task (or thread) which used
+    it as a thread, so the statements of concurrent tasks (e.g. from `asyncio.gather`) are shown side by
+    side. It contains a span for:
+
+        * every statement, lasting as long as the database took to execute it
+        * every transaction, from its BEGIN to its COMMIT or ROLLBACK
+        * every connection checkout from the connection pool, until the connection was returned
+        * every ORM session flush, if sessions were captured
+
+    The format can be loaded by [Perfetto](https://ui.perfetto.dev), [speedscope](https://www.speedscope.app)
+    or `chrome://tracing`, all of which work offline.
+
+    Args:
+        context: The capture context to build the timeline for.
+
+    Returns:
+        The trace as a JSON serializable dictionary.
+    """
+    builder = _ChromeTraceBuilder(context)
+    builder.add_expressions(context.captured_expressions)
+    builder.add_connection_checkouts(context.connection_checkouts)
+    builder.add_flushes(context.flushes)
+
+    return builder.build()
+
+
+def write_chrome_trace(context: SQLAlchemyCaptureContext, path: Union[str, "os.PathLike[str]"]) -> None:
+    """Write a timeline of the database activity captured by a context to a Chrome trace file.
+
+    See [`build_chrome_trace`][pytest_capsqlalchemy.trace.build_chrome_trace] for the contents of the trace.
+
+    Args:
+        context: The capture context to write the timeline of.
+        path: The path of the JSON file to write. Missing parent directories are created.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as trace_file:
+        json.dump(build_chrome_trace(context), trace_file)
@@ -1,8 +1,32 @@
+import asyncio
 import contextlib
+import os
+import sys
+import threading
 from collections.abc import Callable, Generator
-from typing import Any
+from types import FrameType
+from typing import Any, Optional
 
-from sqlalchemy import event
+import greenlet  # type: ignore[import-untyped,unused-ignore]
+import sqlalchemy
+from sqlalchemy import Executable, Insert, Select, event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.selectable import ForUpdateArg
+
+from pytest_capsqlalchemy.expression import CallSite
+
+# Frames from these paths are never considered to be part of the application code. The contextlib module
+# is matched by its file, as its directory is the whole standard library (which may include site-packages)
+_LIBRARY_PATHS = (
+    os.path.dirname(asyncio.__file__) + os.sep,
+    os.path.dirname(sqlalchemy.__file__) + os.sep,
+    os.path.dirname(__file__) + os.sep,
+    contextlib.__file__,
+)
+
+# Whether each file seen by `get_call_site` is library code, as matching the path of every frame of the
+# stack against all the library paths for every statement is a significant part of the capture overhead
+_IS_LIBRARY_FILE: dict[str, bool] = {}
 
 
 @contextlib.contextmanager
@@ -23,3 +47,139 @@ def temp_sqlalchemy_event(
         yield
     finally:
         event.remove(target, identifier, fn)
+
+
+def get_call_site() -> Optional[CallSite]:
+    """Find the location in the application code which caused the current SQLAlchemy event.
+
+    Walks the stack up to the first frame outside of SQLAlchemy, asyncio and this plugin, skipping
+    the code SQLAlchemy generates at runtime (e.g. for its decorators) as well. When
+    running in a greenlet spawned by SQLAlchemy's asyncio extension, the stack of the greenlet
+    only reaches the point where it was spawned, so the walk continues in its parent greenlets.
+
+    Returns:
+        The first call site outside the library code, or `None` if there isn't one.
+    """
+    frame: Optional[FrameType] = sys._getframe(1)
+    current_greenlet = greenlet.getcurrent()
+
+    while current_greenlet is not None:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            is_library_file = _IS_LIBRARY_FILE.get(filename)
+
+            if is_library_file is None:
+                is_library_file = filename.startswith(_LIBRARY_PATHS) or filename == "<string>"
+                _IS_LIBRARY_FILE[filename] = is_library_file
+
+            if not is_library_file:
+                return CallSite(filename, frame.f_lineno, frame.f_code.co_name)
+
+            frame = frame.f_back
+
+        current_greenlet = current_greenlet.parent
+        frame = current_greenlet.gr_frame if current_greenlet is not None else None
+
+    return None
+
+
+def is_autoflush() -> bool:
+    """Check whether the ORM session flush currently in progress was triggered by autoflush.
+
+    Autoflush happens implicitly before a query is executed (e.g. when accessing a lazy loaded
+    relationship), as opposed to explicit calls to `Session.flush` or `Session.commit`.
+
+    SQLAlchemy has no public way to tell them apart, so this relies on `Session.flush` being called
+    by the private `Session._autoflush` method, as verified for the SQLAlchemy versions pinned in
+    `tests/test_orm.py::test_supported_sqlalchemy_version`.
+
+    Returns:
+        Whether the caller is running within a flush called by `Session._autoflush`.
+    """
+    frame: Optional[FrameType] = sys._getframe(1)
+
+    while frame is not None:
+        if frame.f_code is Session.flush.__code__:
+            return frame.f_back is not None and frame.f_back.f_code is Session._autoflush.__code__
+
+        frame = frame.f_back
+
+    return False
+
+
+def is_flushing(session: Session) -> bool:
+    """Check whether an ORM session is flushing right now.
+
+    The flush events don't mark the end of a flush which turned out to have nothing to write, so
+    this relies on the private `Session._flushing` flag instead, as verified for the SQLAlchemy
+    versions pinned in `tests/test_orm.py::test_supported_sqlalchemy_version`.
+
+    Args:
+        session: The session to check.
+
+    Returns:
+        Whether `Session.flush` is in progress for the session.
+    """
+    return bool(session._flushing)
+
+
+def get_for_update_arg(select: Select[Any]) -> Optional[ForUpdateArg]:
+    """Get the locking clause of a SELECT statement, as set by `Select.with_for_update`.
+
+    SQLAlchemy has no public accessor for it, so this relies on the private `Select._for_update_arg`
+    attribute, as verified for the SQLAlchemy versions pinned in
+    `tests/test_orm.py::test_supported_sqlalchemy_version`.
+
+    Args:
+        select: The statement to get the locking clause of.
+
+    Returns:
+        The locking clause of the statement, or `None` if it doesn't lock any rows.
+    """
+    return select._for_update_arg
+
+
+def get_values_columns(statement: Executable) -> list[str]:
+    """Get the names of the columns given values directly by a statement, e.g. with `insert(...).values(...)`.
+
+    Such values are part of the statement rather than of its parameters. SQLAlchemy has no public
+    accessor for them, so this relies on the private `ValuesBase._values` attribute, as verified for
+    the SQLAlchemy versions pinned in `tests/test_orm.py::test_supported_sqlalchemy_version`.
+
+    Args:
+        statement: The statement to get the columns of.
+
+    Returns:
+        The names of the columns, which is empty for statements without values (e.g. SELECT or DELETE).
+    """
+    return [getattr(column, "key", column) for column in getattr(statement, "_values", None) or ()]
+
+
+def has_multi_values(insert: Insert) -> bool:
+    """Check whether an INSERT statement inserts multiple rows with `insert(...).values([...])`.
+
+    SQLAlchemy has no public accessor for it, so this relies on the private `Insert._multi_values`
+    attribute, as verified for the SQLAlchemy versions pinned in
+    `tests/test_orm.py::test_supported_sqlalchemy_version`.
+
+    Args:
+        insert: The statement to check.
+
+    Returns:
+        Whether the statement has a VALUES clause with multiple rows.
+    """
+    return bool(insert._multi_values)
+
+
+def get_task_name() -> str:
+    """Get the name of the asyncio task (or thread, outside of asyncio) currently running.
+
+    Returns:
+        The name of the current asyncio task, or of the current thread if there's no task running.
+    """
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:  # No running event loop
+        task = None
+
+    return task.get_name() if task is not None else threading.current_thread().name
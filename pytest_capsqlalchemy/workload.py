@@ -0,0 +1,376 @@
+import asyncio
+import base64
+import datetime
+import decimal
+import json
+import os
+import sys
+import time
+import uuid
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any, Union
+
+if sys.version_info >= (3, 11):  # pragma: no cover
+    from typing import Self
+else:  # pragma: no cover
+    from typing_extensions import Self
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from pytest_capsqlalchemy.benchmark import BenchmarkStats
+from pytest_capsqlalchemy.expression import SQLExpression, SQLExpressionType
+
+WORKLOAD_FORMAT_VERSION = 1
+"""The version of the workload file format, bumped on incompatible changes."""
+
+_TYPE_KEY = "$type"
+
+ParameterSet = Union[tuple[Any, ...], dict[str, Any]]
+"""The parameters of a single execution of a statement, as passed to the DBAPI cursor."""
+
+
+def _encode_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(item) for item in value]
+
+    # datetime is a subclass of date, so it has to be checked first
+    if isinstance(value, datetime.datetime):
+        return {_TYPE_KEY: "datetime", "value": value.isoformat()}
+
+    if isinstance(value, datetime.date):
+        return {_TYPE_KEY: "date", "value": value.isoformat()}
+
+    if isinstance(value, datetime.time):
+        return {_TYPE_KEY: "time", "value": value.isoformat()}
+
+    if isinstance(value, datetime.timedelta):
+        return {_TYPE_KEY: "timedelta", "value": value.total_seconds()}
+
+    if isinstance(value, decimal.Decimal):
+        return {_TYPE_KEY: "decimal", "value": str(value)}
+
+    if isinstance(value, uuid.UUID):
+        return {_TYPE_KEY: "uuid", "value": str(value)}
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {_TYPE_KEY: "bytes", "value": base64.b64encode(bytes(value)).decode("ascii")}
+
+    raise TypeError(f"Parameters of type {type(value).__name__} can't be saved in a workload file")
+
+
+_DECODERS: dict[str, Callable[[Any], Any]] = {
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "timedelta": lambda value: datetime.timedelta(seconds=value),
+    "decimal": decimal.Decimal,
+    "uuid": uuid.UUID,
+    "bytes": base64.b64decode,
+}
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+
+    if isinstance(value, dict):
+        return _DECODERS[value[_TYPE_KEY]](value["value"])
+
+    return value
+
+
+def _encode_parameter_set(parameter_set: ParameterSet) -> Union[list[Any], dict[str, Any]]:
+    if isinstance(parameter_set, dict):
+        return {key: _encode_value(value) for key, value in parameter_set.items()}
+
+    return _encode_value(parameter_set)  # type: ignore[no-any-return]
+
+
+def _decode_parameter_set(parameter_set: Union[list[Any], dict[str, Any]]) -> ParameterSet:
+    if isinstance(parameter_set, dict):
+        return {key: _decode_value(value) for key, value in parameter_set.items()}
+
+    return tuple(_decode_value(value) for value in parameter_set)
+
+
+def _to_parameter_set(parameters: Any) -> ParameterSet:
+    # Some drivers are given positional parameters as a list, which would be executed as many parameter sets
+    return dict(parameters) if isinstance(parameters, Mapping) else tuple(parameters)
+
+
+@dataclass(frozen=True)
+class WorkloadStatement:
+    """A single statement of a workload, as it was sent to the database.
+
+    Transaction control statements (BEGIN, COMMIT, ROLLBACK) have no `sql`, as they're replayed
+    through the connection's transaction methods instead.
+    """
+
+    type: SQLExpressionType
+    sql: str = ""
+    parameters: list[ParameterSet] = field(default_factory=list)
+
+    @classmethod
+    def from_expression(cls, expression: SQLExpression) -> list[Self]:
+        """Create the workload statements of a captured SQL expression.
+
+        The statements are created from the executions on the DBAPI cursor, rather than from the SQL
+        expression itself, as a single expression may be sent as several statements which differ from
+        its SQL, e.g. the expanded "insertmanyvalues" INSERT of every batch of rows of an ORM flush.
+
+        Args:
+            expression: The captured expression, which must have been captured from an engine.
+
+        Returns:
+            A workload statement for every execution of the expression on the DBAPI cursor.
+
+        Raises:
+            ValueError: If the expression wasn't captured from an engine.
+        """
+        if expression.type.is_tcl:
+            return [cls(type=expression.type)]
+
+        if not expression.cursor_executions:
+            raise ValueError(f"Only expressions captured from an engine can be added to a workload: {expression}")
+
+        return [
+            cls(
+                type=expression.type,
+                sql=execution.statement,
+                parameters=[
+                    _to_parameter_set(parameter_set)
+                    for parameter_set in (execution.parameters if execution.executemany else [execution.parameters])
+                ],
+            )
+            for execution in expression.cursor_executions
+        ]
+
+
+@dataclass
+class Workload:
+    """A stream of statements captured from a test, which can be saved and replayed as a load test.
+
+    The statements are stored exactly as they were sent to the database (the SQL in the paramstyle of
+    the driver, together with the DBAPI parameters), so they can only be replayed on an engine using
+    the same dialect and driver.
+
+    See [`replay_workload`][pytest_capsqlalchemy.workload.replay_workload].
+    """
+
+    dialect: str
+    statements: list[WorkloadStatement]
+
+    @classmethod
+    def from_expressions(cls, expressions: Iterable[SQLExpression]) -> Self:
+        """Create a workload from captured SQL expressions.
+
+        Args:
+            expressions: The captured expressions, in the order they were executed.
+
+        Returns:
+            The workload with a statement for each of the expressions.
+
+        Raises:
+            ValueError: If there are no expressions, any of them wasn't captured from an engine, or
+                they were captured from engines with different dialects.
+        """
+        expressions = list(expressions)
+        dialects = {
+            f"{expression.dialect.name}+{expression.dialect.driver}"
+            for expression in expressions
+            if expression.dialect is not None
+        }
+
+        if len(dialects) != 1:
+            raise ValueError(
+                "A workload needs expressions captured from engines with exactly one dialect, "
+                f"got {', '.join(sorted(dialects)) or 'none'}"
+            )
+
+        return cls(
+            dialect=dialects.pop(),
+            statements=[
+                statement for expression in expressions for statement in WorkloadStatement.from_expression(expression)
+            ],
+        )
+
+    def save(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        """Save the workload to a JSON file.
+
+        Parameter values which JSON doesn't support natively (e.g. datetimes, decimals or UUIDs) are
+        stored with their type, so they are restored exactly when the workload is loaded.
+
+        Args:
+            path: The path of the file to write.
+
+        Raises:
+            TypeError: If any of the parameter values has a type which can't be saved.
+        """
+        data = {
+            "version": WORKLOAD_FORMAT_VERSION,
+            "dialect": self.dialect,
+            "statements": [
+                {
+                    "type": statement.type._value_,
+                    "sql": statement.sql,
+                    "parameters": [_encode_parameter_set(parameter_set) for parameter_set in statement.parameters],
+                }
+                for statement in self.statements
+            ],
+        }
+
+        with open(path, "w", encoding="utf-8") as workload_file:
+            json.dump(data, workload_file, indent=2)
+
+    @classmethod
+    def load(cls, path: Union[str, "os.PathLike[str]"]) -> Self:
+        """Load a workload from a JSON file written by `save`.
+
+        Args:
+            path: The path of the file to read.
+
+        Returns:
+            The loaded workload.
+
+        Raises:
+            ValueError: If the file was written with an unsupported version of the format.
+        """
+        with open(path, encoding="utf-8") as workload_file:
+            data = json.load(workload_file)
+
+        if data.get("version") != WORKLOAD_FORMAT_VERSION:
+            raise ValueError(f"Unsupported workload file version {data.get('version')!r} in {path}")
+
+        return cls(
+            dialect=data["dialect"],
+            statements=[
+                WorkloadStatement(
+                    type=SQLExpressionType(statement["type"]),
+                    sql=statement["sql"],
+                    parameters=[_decode_parameter_set(parameter_set) for parameter_set in statement["parameters"]],
+                )
+                for statement in data["statements"]
+            ],
+        )
+
+
+@dataclass
+class ReplayResult:
+    """The result of replaying a workload with [`replay_workload`][pytest_capsqlalchemy.workload.replay_workload].
+
+    The latencies are measured per statement, in seconds, and only include the statements which
+    succeeded.
+    """
+
+    workers: int
+    iterations: int
+    wall_time: float
+    statement_count: int
+    error_count: int
+    latency: BenchmarkStats
+
+    @property
+    def throughput(self) -> float:
+        """The number of statements executed per second, across all workers."""
+        return self.statement_count / self.wall_time if self.wall_time else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.statement_count} statements ({self.error_count} errors) in {self.wall_time:.3f}s "
+            f"by {self.workers} workers: {self.throughput:.1f} statements/s, latency {self.latency}"
+        )
+
+
+async def _replay_statement(conn: AsyncConnection, statement: WorkloadStatement) -> None:
+    if statement.type == SQLExpressionType.COMMIT:
+        await conn.commit()
+    elif statement.type == SQLExpressionType.ROLLBACK:
+        await conn.rollback()
+    else:
+        parameters = statement.parameters[0] if len(statement.parameters) == 1 else statement.parameters
+        await conn.exec_driver_sql(statement.sql, parameters)
+
+
+async def replay_workload(
+    engine: AsyncEngine,
+    workload: Workload,
+    *,
+    workers: int = 4,
+    iterations: int = 1,
+) -> ReplayResult:
+    """Replay a workload against an engine with several concurrent asyncio workers.
+
+    Every worker uses its own connection and executes all the statements of the workload in order,
+    `iterations` times. The workload's writes are executed for real, so this is meant to be used
+    against a disposable database (e.g. a local container). Statements which fail (e.g. because of a
+    unique constraint) roll back the worker's transaction and are counted as errors.
+
+    ```python
+    workload = Workload.load("workloads/checkout.json")
+    result = await replay_workload(engine, workload, workers=16, iterations=10)
+    print(result.throughput, result.latency.p95)
+    ```
+
+    Args:
+        engine: The async engine to replay the workload on. Must use the dialect and driver of the workload.
+        workload: The workload to replay.
+        workers: The number of concurrent workers.
+        iterations: The number of times each worker replays the workload.
+
+    Returns:
+        The throughput and the latency statistics of the replay.
+
+    Raises:
+        ValueError: If `workers` or `iterations` is less than 1, the engine's dialect doesn't match
+            the workload or the workload has no statements to execute.
+    """
+    if workers < 1 or iterations < 1:
+        raise ValueError(f"At least one worker and iteration are required, got {workers=}, {iterations=}")
+
+    engine_dialect = f"{engine.dialect.name}+{engine.dialect.driver}"
+
+    if engine_dialect != workload.dialect:
+        raise ValueError(f"The workload was captured with {workload.dialect}, can't replay it with {engine_dialect}")
+
+    # BEGIN is implicit when executing a statement, there's nothing to replay for it
+    statements = [statement for statement in workload.statements if statement.type != SQLExpressionType.BEGIN]
+
+    if not statements:
+        raise ValueError("The workload has no statements to replay")
+
+    latencies: list[float] = []
+    error_count = 0
+
+    async def run_worker() -> None:
+        nonlocal error_count
+
+        async with engine.connect() as conn:
+            for _ in range(iterations):
+                for statement in statements:
+                    started_at = time.perf_counter()
+
+                    try:
+                        await _replay_statement(conn, statement)
+                    except DBAPIError:
+                        error_count += 1
+                        await conn.rollback()
+                    else:
+                        latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(run_worker() for _ in range(workers)))
+    wall_time = time.perf_counter() - started_at
+
+    return ReplayResult(
+        workers=workers,
+        iterations=iterations,
+        wall_time=wall_time,
+        statement_count=len(latencies),
+        error_count=error_count,
+        latency=BenchmarkStats.from_samples(latencies or [0.0]),
+    )
@@ -3,7 +3,7 @@ from collections.abc import AsyncGenerator
 
 import pytest
 from pytest_asyncio import is_async_test
-from sqlalchemy import ForeignKey
+from sqlalchemy import Engine, ForeignKey, create_engine
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -39,6 +39,17 @@ def db_engine(db_url: str) -> AsyncEngine:
     return create_async_engine(db_url, future=True)
 
 
+@pytest.fixture(scope="session")
+def replica_db_engine(db_url: str) -> AsyncEngine:
+    # A separate engine (and connection pool) to the same database, standing in for a read replica
+    return create_async_engine(db_url, future=True)
+
+
+@pytest.fixture(scope="session")
+def sync_db_engine() -> Engine:
+    return create_engine("sqlite://")
+
+
 @pytest.fixture()
 async def db_session(db_engine: AsyncEngine) -> AsyncGenerator[AsyncSession, None]:
     Session = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
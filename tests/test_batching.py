@@ -0,0 +1,131 @@
+import re
+import sys
+
+import pytest
+from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pytest_capsqlalchemy import SQLAlchemyCapturer
+from pytest_capsqlalchemy.batching import find_unbatched_writes
+from pytest_capsqlalchemy.expression import CallSite, SQLExpression, SQLExpressionType
+from tests.conftest import Order, OrderItem
+
+
+def insert_order(recipient: str) -> SQLExpression:
+    return SQLExpression(insert(Order), params={"recipient": recipient}, engine_name="default")
+
+
+def test_find_unbatched_inserts() -> None:
+    expressions = [
+        SQLExpression(text("BEGIN")),
+        insert_order("John Doe"),
+        insert_order("Jane Doe"),
+        SQLExpression(text("COMMIT")),
+        SQLExpression(text("BEGIN")),
+        insert_order("Max Mustermann"),
+        SQLExpression(text("COMMIT")),
+    ]
+
+    (run,) = find_unbatched_writes(expressions)
+
+    assert run.type == SQLExpressionType.INSERT
+    assert run.table == "orders"
+    assert run.columns == ("recipient",)
+    assert run.engine_name == "default"
+    assert run.count == 3
+    assert run.expressions == [expressions[1], expressions[2], expressions[5]]
+    assert str(run) == "3 x INSERT orders (recipient)"
+
+
+def test_find_unbatched_writes_min_run() -> None:
+    expressions = [insert_order("John Doe"), insert_order("Jane Doe")]
+
+    assert find_unbatched_writes(expressions) == []
+    assert [run.count for run in find_unbatched_writes(expressions, min_run=2)] == [2]
+
+
+def test_find_unbatched_writes_invalid_min_run() -> None:
+    with pytest.raises(ValueError, match="needs at least 2 statements, got min_run=1"):
+        find_unbatched_writes([], min_run=1)
+
+
+def test_find_unbatched_writes_other_statements_break_runs() -> None:
+    expressions = [
+        insert_order("John Doe"),
+        insert_order("Jane Doe"),
+        SQLExpression(select(Order)),
+        insert_order("Max Mustermann"),
+        SQLExpression(insert(OrderItem), params={"item_name": "Bread", "price": 2.0, "order_id": 1}),
+        insert_order("Erika Mustermann"),
+    ]
+
+    assert find_unbatched_writes(expressions, min_run=2) == [
+        find_unbatched_writes(expressions[:2], min_run=2)[0],
+    ]
+
+
+def test_find_unbatched_writes_different_structure_breaks_runs() -> None:
+    expressions = [
+        SQLExpression(update(Order).where(Order.id == 1).values(recipient="John Doe")),
+        SQLExpression(update(Order).where(Order.id == 2).values(recipient="John Doe")),
+        SQLExpression(update(Order).where(Order.recipient == "Jane Doe").values(recipient="John Doe")),
+        SQLExpression(delete(Order).where(Order.id == 1)),
+        SQLExpression(delete(Order).where(Order.id == 2)),
+    ]
+
+    runs = find_unbatched_writes(expressions, min_run=2)
+
+    assert [str(run) for run in runs] == ["2 x UPDATE orders (recipient)", "2 x DELETE orders"]
+
+
+def test_find_unbatched_writes_ignores_batched_statements() -> None:
+    expressions = [
+        SQLExpression(insert(Order), multiparams=[{"recipient": "John Doe"}, {"recipient": "Jane Doe"}]),
+        SQLExpression(insert(Order), multiparams=[{"recipient": "John Doe"}, {"recipient": "Jane Doe"}]),
+        SQLExpression(insert(Order).values([{"recipient": "John Doe"}, {"recipient": "Jane Doe"}])),
+        SQLExpression(insert(Order).values([{"recipient": "John Doe"}, {"recipient": "Jane Doe"}])),
+    ]
+
+    assert find_unbatched_writes(expressions, min_run=2) == []
+
+
+def test_unbatched_write_run_call_site() -> None:
+    call_site = CallSite("/some/path/app.py", 42, "create_orders")
+    expression = SQLExpression(insert(Order), params={"recipient": "John Doe"}, call_site=call_site)
+
+    (run,) = find_unbatched_writes([expression] * 3)
+
+    assert run.call_site == call_site
+    assert str(run).startswith("3 x INSERT orders (recipient) at ")
+    assert str(run).endswith("app.py:42 in create_orders")
+
+
+async def test_assert_writes_batched(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    db_session.add_all([Order(recipient=f"Recipient {i}") for i in range(5)])
+    await db_session.commit()
+
+    order_ids = (await db_session.scalars(select(Order.id).limit(3))).all()
+    await db_session.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+
+    capsqlalchemy.assert_writes_batched()
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_assert_writes_batched_row_by_row(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    for i in range(5):
+        db_session.add(Order(recipient=f"Recipient {i}"))
+        flush_lineno = sys._getframe().f_lineno + 1
+        await db_session.flush()
+
+    await db_session.commit()
+
+    expected_message = (
+        "Found writes which could have been batched:\n"
+        f"  * 5 x INSERT orders (recipient) at tests/test_batching.py:{flush_lineno} in "
+        "test_assert_writes_batched_row_by_row"
+    )
+
+    with pytest.raises(AssertionError, match=re.escape(expected_message)):
+        capsqlalchemy.assert_writes_batched()
+
+    capsqlalchemy.assert_writes_batched(min_run=6)
@@ -0,0 +1,140 @@
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pytest_capsqlalchemy import SQLAlchemyCapturer
+from pytest_capsqlalchemy.benchmark import BenchmarkResult, BenchmarkRound, BenchmarkStats
+from tests.conftest import Order
+
+
+def make_result(*db_times: float) -> BenchmarkResult:
+    return BenchmarkResult(
+        rounds=[
+            BenchmarkRound(wall_time=db_time * 2, db_time=db_time, statement_count=1, captured_expressions=[])
+            for db_time in db_times
+        ]
+    )
+
+
+def test_benchmark_stats_from_samples() -> None:
+    stats = BenchmarkStats.from_samples([float(i) for i in range(1, 101)])
+
+    assert stats.min == pytest.approx(1.0)
+    assert stats.median == pytest.approx(50.5)
+    assert stats.p95 == pytest.approx(95.05)
+    assert stats.stdev == pytest.approx(29.011491975882016)
+
+
+def test_benchmark_stats_from_single_sample() -> None:
+    assert BenchmarkStats.from_samples([0.5]) == BenchmarkStats(min=0.5, median=0.5, p95=0.5, stdev=0.0)
+
+
+def test_benchmark_stats_from_no_samples() -> None:
+    with pytest.raises(ValueError, match="At least one sample is required"):
+        BenchmarkStats.from_samples([])
+
+
+def test_assert_p95_db_time_below() -> None:
+    result = make_result(*[0.01] * 39, 0.5)
+
+    result.assert_p95_db_time_below(0.1)
+
+    with pytest.raises(AssertionError, match=r"p95 DB time is 0\.010000s, expected below 0\.005000s"):
+        result.assert_p95_db_time_below(0.005)
+
+
+def test_assert_p95_wall_time_below() -> None:
+    result = make_result(*[0.01] * 39, 0.5)
+
+    result.assert_p95_wall_time_below(0.1)
+
+    with pytest.raises(AssertionError, match=r"p95 wall time is 0\.020000s, expected below 0\.010000s"):
+        result.assert_p95_wall_time_below(0.01)
+
+
+def test_assert_p95_projected_db_time_below() -> None:
+    result = make_result(*[0.01] * 39, 0.5)
+
+    for benchmark_round in result.rounds[:20]:
+        benchmark_round.projected_db_time = benchmark_round.db_time + 0.02
+
+    assert result.projected_db_time.min == pytest.approx(0.01)
+    assert result.projected_db_time.p95 == pytest.approx(0.03)
+
+    result.assert_p95_projected_db_time_below(0.1)
+
+    with pytest.raises(AssertionError, match=r"p95 projected DB time is 0\.030000s, expected below 0\.020000s"):
+        result.assert_p95_projected_db_time_below(0.02)
+
+
+async def test_benchmark_async_callable(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    calls = 0
+
+    async def fetch_order() -> None:
+        nonlocal calls
+        calls += 1
+
+        await db_session.execute(select(Order).where(Order.id == 1))
+        await db_session.execute(select(text("1")))
+        await db_session.commit()
+
+    result = await capsqlalchemy.benchmark(fetch_order, rounds=5, warmup=2)
+
+    assert calls == 7
+    assert len(result.rounds) == 5
+
+    for benchmark_round in result.rounds:
+        assert benchmark_round.statement_count == 4
+        assert [expr.type._value_ for expr in benchmark_round.captured_expressions] == [
+            "BEGIN",
+            "SELECT",
+            "SELECT",
+            "COMMIT",
+        ]
+        assert 0 < benchmark_round.db_time < benchmark_round.wall_time
+
+    assert result.statement_count == BenchmarkStats(min=4, median=4, p95=4, stdev=0.0)
+    result.assert_p95_db_time_below(10)
+
+    # The full test context still captures everything executed during the benchmark
+    capsqlalchemy.assert_query_count(7 * 2, include_tcl=False)
+
+
+async def test_benchmark_excluding_tcl(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    async def fetch_order() -> None:
+        await db_session.execute(select(Order).where(Order.id == 1))
+        await db_session.commit()
+
+    result = await capsqlalchemy.benchmark(fetch_order, rounds=3, include_tcl=False)
+
+    assert [benchmark_round.statement_count for benchmark_round in result.rounds] == [1, 1, 1]
+
+
+def test_benchmark_sync_callable(capsqlalchemy: SQLAlchemyCapturer) -> None:
+    calls = []
+
+    result = capsqlalchemy.benchmark(lambda: calls.append(1), rounds=3, warmup=0)
+
+    assert len(calls) == 3
+    assert [benchmark_round.statement_count for benchmark_round in result.rounds] == [0, 0, 0]
+    assert result.db_time == BenchmarkStats(min=0, median=0, p95=0, stdev=0)
+
+
+def test_benchmark_sync_callable_returning_coroutine(capsqlalchemy: SQLAlchemyCapturer) -> None:
+    async def do_nothing() -> None:
+        pass
+
+    with pytest.raises(TypeError, match="must be coroutine functions"):
+        capsqlalchemy.benchmark(lambda: do_nothing())
+
+
+@pytest.mark.parametrize(
+    ("rounds", "warmup", "error"),
+    [
+        (0, 1, "at least one benchmark round is required, got 0"),
+        (1, -1, "the number of warmup rounds can't be negative, got -1"),
+    ],
+)
+def test_benchmark_invalid_rounds(capsqlalchemy: SQLAlchemyCapturer, rounds: int, warmup: int, error: str) -> None:
+    with pytest.raises(ValueError, match=error):
+        capsqlalchemy.benchmark(lambda: None, rounds=rounds, warmup=warmup)
@@ -1,7 +1,8 @@
-from sqlalchemy import select, text
-from sqlalchemy.ext.asyncio import AsyncSession
+import pytest
+from sqlalchemy import Engine, PickleType, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
-from pytest_capsqlalchemy import SQLAlchemyCapturer
+from pytest_capsqlalchemy import SQLAlchemyCaptureContext, SQLAlchemyCapturer
 from pytest_capsqlalchemy.expression import SQLExpressionType
 from tests.conftest import Order, OrderItem
 
@@ -74,18 +75,18 @@ async def test_captured_queries(db_session: AsyncSession, capsqlalchemy: SQLAlch
         "SELECT order_items.id, order_items.item_name, order_items.price, order_items.order_id \nFROM order_items",
         "COMMIT",
         "BEGIN",
-        "SELECT orders.id, orders.recipient \nFROM orders \nWHERE orders.id = :id_1",
+        "SELECT orders.id, orders.recipient \nFROM orders \nWHERE orders.id = $1::INTEGER",
         "SELECT 1",
-        "INSERT INTO orders (recipient) VALUES (:recipient)",
+        "INSERT INTO orders (recipient) VALUES ($1::VARCHAR) RETURNING orders.id",
         "COMMIT",
     )
 
     capsqlalchemy.assert_captured_queries(
         "SELECT 1",
         "SELECT order_items.id, order_items.item_name, order_items.price, order_items.order_id \nFROM order_items",
-        "SELECT orders.id, orders.recipient \nFROM orders \nWHERE orders.id = :id_1",
+        "SELECT orders.id, orders.recipient \nFROM orders \nWHERE orders.id = $1::INTEGER",
         "SELECT 1",
-        "INSERT INTO orders (recipient) VALUES (:recipient)",
+        "INSERT INTO orders (recipient) VALUES ($1::VARCHAR) RETURNING orders.id",
         include_tcl=False,
     )
 
@@ -110,12 +111,68 @@ async def test_captured_queries_bind_params(db_session: AsyncSession, capsqlalch
         "BEGIN",
         "SELECT orders.id, orders.recipient \nFROM orders \nWHERE orders.id = 1",
         "SELECT 1",
-        "INSERT INTO orders (recipient) VALUES ('John Doe')",
+        "INSERT INTO orders (recipient) VALUES ('John Doe') RETURNING orders.id",
         "COMMIT",
         bind_params=True,
     )
 
 
+async def test_captured_statements(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    await db_session.execute(text("SELECT 1"))
+    await db_session.execute(select(OrderItem))
+
+    await db_session.commit()
+
+    async with db_session.begin():
+        await db_session.execute(select(Order).where(Order.id == 1))
+
+    capsqlalchemy.assert_captured_statements(
+        text("BEGIN"),
+        text("SELECT 1"),
+        select(OrderItem),
+        text("COMMIT"),
+        text("BEGIN"),
+        select(Order).where(Order.id == 1),
+        text("COMMIT"),
+    )
+
+    capsqlalchemy.assert_captured_statements(
+        text("SELECT 1"),
+        select(OrderItem),
+        select(Order).where(Order.id == 123),
+        include_tcl=False,
+        ignore_bind_values=True,
+    )
+
+
+async def test_captured_statements_mismatch(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    await db_session.execute(select(Order).where(Order.id == 1))
+
+    with pytest.raises(AssertionError, match=r"orders\.id = 2"):
+        capsqlalchemy.assert_captured_statements(select(Order).where(Order.id == 2), include_tcl=False)
+
+    with pytest.raises(AssertionError, match=r"orders\.id > \$1::INTEGER"):
+        capsqlalchemy.assert_captured_statements(
+            select(Order).where(Order.id > 1),
+            include_tcl=False,
+            ignore_bind_values=True,
+        )
+
+    with pytest.raises(AssertionError, match="Statement 0 compiles to the expected SQL, but its structure"):
+        capsqlalchemy.assert_captured_statements(select(Order.__table__).where(Order.id == 1), include_tcl=False)
+
+
+def test_captured_statements_mismatch_unrenderable_bind_values(sync_db_engine: Engine) -> None:
+    with SQLAlchemyCaptureContext(sync_db_engine) as capsqlalchemy_context, sync_db_engine.connect() as conn:
+        conn.execute(select(literal({"id": 1}, PickleType)))
+
+    capsqlalchemy = SQLAlchemyCapturer(capsqlalchemy_context)
+
+    # Pickled values can't be rendered as SQL literals, so the placeholders are compared instead
+    with pytest.raises(AssertionError, match=r"Statement 0 compiles to the expected SQL(.|\n)*SELECT \? AS anon_1"):
+        capsqlalchemy.assert_captured_statements(select(literal({"id": 2}, PickleType)), include_tcl=False)
+
+
 async def test_captured_query_types(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
     await db_session.execute(select(OrderItem))
 
@@ -147,6 +204,33 @@ async def test_captured_query_types(db_session: AsyncSession, capsqlalchemy: SQL
     )
 
 
+async def test_captured_query_types_mismatch(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    await db_session.execute(select(Order))
+    await db_session.execute(select(Order).where(Order.id == 1))
+
+    with pytest.raises(AssertionError) as exc_info:
+        capsqlalchemy.assert_query_types("SELECT", "INSERT", include_tcl=False)
+
+    assert str(exc_info.value) == (
+        "Captured query types don't match the expected ones: expected 2, captured 2\n"
+        "\n"
+        "Statements with different counts (expected -> captured):\n"
+        "  SELECT   1 -> 2\n"
+        "  INSERT   1 -> 0\n"
+        "\n"
+        "First difference at captured statement 1:\n"
+        "        0  SELECT\n"
+        "  -     1  INSERT\n"
+        "  +     1  SELECT"
+    )
+
+    with pytest.raises(AssertionError, match=r"\+     1  SELECT orders.id, orders.recipient FROM orders WHERE"):
+        capsqlalchemy.assert_captured_queries(
+            "SELECT orders.id, orders.recipient \nFROM orders",
+            include_tcl=False,
+        )
+
+
 async def test_captured_queries_insert_with_relationship(
     db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer
 ) -> None:
@@ -157,22 +241,99 @@ async def test_captured_queries_insert_with_relationship(
         db_session.add(OrderItem(item_name="Butter", price=3.50, order=order))
 
     capsqlalchemy.assert_captured_queries(
-        "INSERT INTO orders (recipient) VALUES (:recipient)",
+        "INSERT INTO orders (recipient) VALUES ($1::VARCHAR) RETURNING orders.id",
         (
-            "INSERT INTO order_items (item_name, price, order_id) VALUES "
-            "(:item_name_m0, :price_m0, :order_id_m0), "
-            "(:item_name_m1, :price_m1, :order_id_m1)"
+            "INSERT INTO order_items (item_name, price, order_id) "
+            "SELECT p0::VARCHAR, p1::FLOAT, p2::INTEGER "
+            "FROM (VALUES ($1::VARCHAR, $2::FLOAT, $3::INTEGER, 0), ($4::VARCHAR, $5::FLOAT, $6::INTEGER, 1)) "
+            "AS imp_sen(p0, p1, p2, sen_counter) ORDER BY sen_counter RETURNING order_items.id, order_items.id AS id__1"
         ),
         include_tcl=False,
     )
 
     capsqlalchemy.assert_captured_queries(
-        "INSERT INTO orders (recipient) VALUES ('John Doe')",
+        "INSERT INTO orders (recipient) VALUES ('John Doe') RETURNING orders.id",
         (
-            "INSERT INTO order_items (item_name, price, order_id) VALUES "  # noqa: S608
-            f"('Bread', 2.0, {order.id}), "
-            f"('Butter', 3.5, {order.id})"
+            "INSERT INTO order_items (item_name, price, order_id) "  # noqa: S608
+            "SELECT p0::VARCHAR, p1::FLOAT, p2::INTEGER FROM (VALUES "
+            f"('Bread'::VARCHAR, 2.0::FLOAT, {order.id}::INTEGER, 0), "
+            f"('Butter'::VARCHAR, 3.5::FLOAT, {order.id}::INTEGER, 1)) "
+            "AS imp_sen(p0, p1, p2, sen_counter) ORDER BY sen_counter RETURNING order_items.id, order_items.id AS id__1"
         ),
         include_tcl=False,
         bind_params=True,
     )
+
+
+@pytest.mark.capsqlalchemy(capture_details=True, count_rows=True)
+async def test_assert_streamed(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    db_session.add_all([Order(recipient=f"Streamed customer {i}") for i in range(5)])
+    await db_session.flush()
+
+    streamed_orders_query = select(Order).where(Order.recipient.startswith("Streamed"))
+
+    with capsqlalchemy:
+        streamed_result = await db_session.stream_scalars(streamed_orders_query.execution_options(yield_per=2))
+        assert len([order async for order in streamed_result]) == 5
+
+        capsqlalchemy.assert_streamed(min_rows=5)
+
+        assert len((await db_session.execute(streamed_orders_query.where(Order.id > 0))).scalars().all()) == 5
+
+        capsqlalchemy.assert_streamed(min_rows=6)
+
+        with pytest.raises(AssertionError) as exc_info:
+            capsqlalchemy.assert_streamed(min_rows=5)
+
+    assert str(exc_info.value).startswith(
+        "Found reads of at least 5 rows which weren't streamed:\n"
+        "  * 5 rows from SELECT orders.id, orders.recipient FROM orders "
+        "WHERE (orders.recipient LIKE $1::VARCHAR || '%') AND orders.id > $2::INTEGER at tests/test_capturer.py:"
+    )
+
+
+def test_assert_streamed_rows_not_counted(capsqlalchemy: SQLAlchemyCapturer) -> None:
+    with pytest.raises(RuntimeError, match="the consumed rows are not counted"):
+        capsqlalchemy.assert_streamed(min_rows=1)
+
+
+async def test_assertions_per_engine(
+    db_engine: AsyncEngine,
+    replica_db_engine: AsyncEngine,
+    sync_db_engine: Engine,
+) -> None:
+    engines = {"primary": db_engine, "replica": replica_db_engine, "jobs": sync_db_engine}
+
+    with SQLAlchemyCaptureContext(engines) as capsqlalchemy_context:
+        capsqlalchemy = SQLAlchemyCapturer(capsqlalchemy_context)
+
+        async with replica_db_engine.connect() as conn:
+            await conn.execute(select(Order).where(Order.id == 1))
+            await conn.execute(select(text("1")))
+
+        async with db_engine.begin() as conn:
+            await conn.execute(insert(Order).values(recipient="John Doe"))
+
+        with sync_db_engine.connect() as sync_conn:
+            sync_conn.execute(select(text("1")))
+
+        with capsqlalchemy:
+            async with replica_db_engine.connect() as conn:
+                await conn.execute(select(text("1")))
+
+            capsqlalchemy.assert_query_count(1, include_tcl=False, engine="replica")
+            capsqlalchemy.assert_query_count(0, include_tcl=False, engine="primary")
+
+    assert capsqlalchemy.engine is db_engine
+    assert capsqlalchemy.engines == engines
+
+    capsqlalchemy.assert_query_count(5, include_tcl=False)
+    capsqlalchemy.assert_query_count(3, include_tcl=False, engine="replica")
+    capsqlalchemy.assert_query_count(1, include_tcl=False, engine="primary")
+    capsqlalchemy.assert_query_count(1, include_tcl=False, engine="jobs")
+
+    capsqlalchemy.assert_query_types("BEGIN", "INSERT", "COMMIT", engine="primary")
+    capsqlalchemy.assert_captured_queries("SELECT 1", include_tcl=False, engine="jobs")
+
+    with pytest.raises(ValueError, match="unknown engine 'replcia', expected one of 'primary', 'replica', 'jobs'"):
+        capsqlalchemy.assert_query_count(3, engine="replcia")
@@ -1,6 +1,8 @@
-from sqlalchemy import select, text
-from sqlalchemy.ext.asyncio import AsyncSession
+import pytest
+from sqlalchemy import Engine, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
+from pytest_capsqlalchemy.capturer import SQLAlchemyCapturer
 from pytest_capsqlalchemy.context import SQLAlchemyCaptureContext
 from tests.conftest import Order
 
@@ -122,3 +124,197 @@ async def test_capture_session_update_orders(
         "recipient": "Jane Doe",
     }
     assert update_expr.multiparams == []
+
+
+async def test_capture_session_records_dialect_and_statement(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    db_session: AsyncSession,
+) -> None:
+    await db_session.execute(select(Order.id).where(Order.id == 1))
+
+    begin_expr, select_expr = capsqlalchemy_context.captured_expressions
+
+    assert begin_expr.dialect is db_session.bind.dialect
+    assert begin_expr.statement is None
+
+    assert select_expr.dialect is db_session.bind.dialect
+    assert select_expr.statement == "SELECT orders.id \nFROM orders \nWHERE orders.id = $1::INTEGER"
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_capture_session_records_timings(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    db_session: AsyncSession,
+) -> None:
+    await db_session.execute(select(text("1")))
+    await db_session.execute(select(text("pg_sleep(0.05)")))
+    await db_session.commit()
+
+    begin_expr, select_expr, sleep_expr, commit_expr = capsqlalchemy_context.captured_expressions
+
+    assert begin_expr.duration is None
+    assert commit_expr.duration is None
+    assert select_expr.duration is not None
+    assert sleep_expr.duration is not None
+    assert sleep_expr.duration >= 0.05
+
+    assert begin_expr.started_at < select_expr.started_at < sleep_expr.started_at < commit_expr.started_at
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_capture_session_records_call_site(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    db_session: AsyncSession,
+) -> None:
+    await db_session.execute(select(text("1")))
+
+    begin_expr, select_expr = capsqlalchemy_context.captured_expressions
+
+    for expr in (begin_expr, select_expr):
+        assert expr.call_site is not None
+        assert expr.call_site.filename == __file__
+        assert expr.call_site.function == "test_capture_session_records_call_site"
+
+    assert (
+        str(select_expr.call_site)
+        == f"tests/test_context.py:{select_expr.call_site.lineno} in {select_expr.call_site.function}"
+    )
+
+
+async def test_capture_details_disabled(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    capsqlalchemy: SQLAlchemyCapturer,
+    db_session: AsyncSession,
+) -> None:
+    await db_session.execute(select(text("1")))
+    await db_session.commit()
+
+    assert not capsqlalchemy_context.capture_details
+    assert capsqlalchemy_context.connection_checkouts == []
+
+    for expr in capsqlalchemy_context.captured_expressions:
+        assert expr.call_site is None
+        assert expr.task is None
+        assert expr.connection_id is None
+        assert expr.started_at is None
+        assert expr.duration is None
+        assert expr.cursor_executions == []
+
+    with pytest.raises(RuntimeError, match="details of the expressions are not captured"):
+        capsqlalchemy.export_chrome_trace("trace.json")
+
+    with pytest.raises(RuntimeError, match="details of the expressions are not captured"):
+        capsqlalchemy.assert_lock_order_consistent()
+
+
+@pytest.mark.capsqlalchemy(count_rows=True)
+async def test_capture_session_records_streamed_rows(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    db_session: AsyncSession,
+) -> None:
+    db_session.add_all([Order(recipient=f"Streamed customer {i}") for i in range(5)])
+    await db_session.flush()
+    capsqlalchemy_context.clear()
+
+    streamed_orders_query = select(Order).where(Order.recipient.startswith("Streamed"))
+
+    buffered_orders = (await db_session.execute(streamed_orders_query)).scalars().all()
+
+    streamed_result = await db_session.stream(streamed_orders_query.execution_options(yield_per=2))
+    streamed_orders = [order async for partition in streamed_result.scalars().partitions() for order in partition]
+
+    first_order = await db_session.scalar(select(Order).limit(1))
+    await db_session.execute(text("SELECT pg_sleep(0)"))
+
+    buffered_expr, streamed_expr, first_expr, sleep_expr = capsqlalchemy_context.captured_expressions
+
+    assert len(buffered_orders) == len(streamed_orders) == 5
+    assert first_order is not None
+
+    assert buffered_expr.streamed is False
+    assert buffered_expr.rows_consumed == 5
+    assert streamed_expr.streamed is True
+    assert streamed_expr.rows_consumed == 5
+    assert first_expr.streamed is False
+    assert first_expr.rows_consumed == 1
+
+    # Results are only counted as their rows are consumed
+    assert sleep_expr.rows_consumed == 0
+
+
+async def test_capture_session_rows_not_counted(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    db_session: AsyncSession,
+) -> None:
+    orders = (await db_session.execute(select(Order))).scalars().all()
+    streamed_result = await db_session.stream(select(Order).execution_options(yield_per=2))
+    streamed_orders = await streamed_result.scalars().all()
+
+    begin_expr, buffered_expr, streamed_expr = capsqlalchemy_context.captured_expressions
+
+    assert len(orders) == len(streamed_orders)
+    assert not capsqlalchemy_context.count_rows
+    assert begin_expr.streamed is None
+    assert buffered_expr.streamed is False
+    assert buffered_expr.rows_consumed is None
+    assert streamed_expr.streamed is True
+    assert streamed_expr.rows_consumed is None
+
+
+async def test_capture_multiple_engines(
+    db_engine: AsyncEngine,
+    replica_db_engine: AsyncEngine,
+    sync_db_engine: Engine,
+) -> None:
+    engines = {"primary": db_engine, "replica": replica_db_engine, "jobs": sync_db_engine}
+
+    with SQLAlchemyCaptureContext(engines) as capsqlalchemy_context:
+        async with db_engine.connect() as conn:
+            await conn.execute(select(text("1")))
+
+        async with replica_db_engine.connect() as conn:
+            await conn.execute(select(text("2")))
+
+        with sync_db_engine.connect() as sync_conn:
+            sync_conn.execute(select(text("3")))
+
+    assert capsqlalchemy_context.engines == engines
+
+    captured = [
+        (expr.engine_name, expr.type._value_, expr.get_sql()) for expr in capsqlalchemy_context.captured_expressions
+    ]
+    assert captured == [
+        ("primary", "BEGIN", "BEGIN"),
+        ("primary", "SELECT", "SELECT 1"),
+        ("primary", "ROLLBACK", "ROLLBACK"),
+        ("replica", "BEGIN", "BEGIN"),
+        ("replica", "SELECT", "SELECT 2"),
+        ("replica", "ROLLBACK", "ROLLBACK"),
+        ("jobs", "BEGIN", "BEGIN"),
+        ("jobs", "SELECT", "SELECT 3"),
+        ("jobs", "ROLLBACK", "ROLLBACK"),
+    ]
+
+
+def test_capture_single_sync_engine(sync_db_engine: Engine) -> None:
+    with SQLAlchemyCaptureContext(sync_db_engine) as capsqlalchemy_context, sync_db_engine.connect() as conn:
+        conn.execute(select(text("1")))
+
+    assert capsqlalchemy_context.engines == {"default": sync_db_engine}
+    assert [expr.engine_name for expr in capsqlalchemy_context.captured_expressions] == ["default"] * 3
+
+
+def test_capture_no_engines() -> None:
+    with pytest.raises(ValueError, match="at least one engine to capture is required"):
+        SQLAlchemyCaptureContext({})
+
+
+def test_capture_same_engine_under_several_names(db_engine: AsyncEngine) -> None:
+    with pytest.raises(
+        ValueError,
+        match="the same engine can't be captured under several names, got it as both 'primary' and 'replica'",
+    ):
+        SQLAlchemyCaptureContext({"primary": db_engine, "replica": db_engine})
+
+    with pytest.raises(ValueError, match="got it as both 'async' and 'sync'"):
+        SQLAlchemyCaptureContext({"async": db_engine, "sync": db_engine.sync_engine})
@@ -1,11 +1,14 @@
-from typing import Union
+from typing import Any, Union
 
 import pytest
-from sqlalchemy import Table, delete, insert, select, text, update
+from sqlalchemy import Executable, Table, delete, insert, literal_column, select, text, update
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg
 from sqlalchemy.sql.ddl import CreateTable
+from sqlalchemy.sql.elements import ColumnClause
 
-from pytest_capsqlalchemy.expression import SQLExpression, SQLExpressionType
-from tests.conftest import Order
+from pytest_capsqlalchemy.expression import CursorExecution, SQLExpression, SQLExpressionType
+from tests.conftest import Order, OrderItem
 
 
 @pytest.mark.parametrize(
@@ -130,3 +133,176 @@ def test_is_tcl_detection(sql_expression_type: SQLExpressionType, expected_is_tc
 )
 def test_get_sql(sql_expression: SQLExpression, bind_params: bool, expected_sql: str) -> None:
     assert sql_expression.get_sql(bind_params=bind_params) == expected_sql
+
+
+@pytest.mark.parametrize(
+    ("sql_expression", "bind_params", "expected_sql"),
+    [
+        pytest.param(
+            SQLExpression(select(Order.id).where(Order.id == 1), dialect=asyncpg.dialect()),
+            False,
+            "SELECT orders.id \nFROM orders \nWHERE orders.id = $1::INTEGER",
+            id="select_where_clause_no_bind_params",
+        ),
+        pytest.param(
+            SQLExpression(select(Order.id).where(Order.id == 1), dialect=asyncpg.dialect()),
+            True,
+            "SELECT orders.id \nFROM orders \nWHERE orders.id = 1",
+            id="select_where_clause_bind_params",
+        ),
+        pytest.param(
+            SQLExpression(insert(Order), params={"recipient": "John Doe"}, dialect=asyncpg.dialect()),
+            False,
+            "INSERT INTO orders (recipient) VALUES ($1::VARCHAR) RETURNING orders.id",
+            id="insert_single_row_no_bind_params",
+        ),
+    ],
+)
+def test_get_sql_with_dialect(sql_expression: SQLExpression, bind_params: bool, expected_sql: str) -> None:
+    assert sql_expression.get_sql(bind_params=bind_params) == expected_sql
+
+
+def test_get_sql_uses_executed_statement() -> None:
+    sql_expression = SQLExpression(
+        select(Order.id).where(Order.id == 1),
+        dialect=asyncpg.dialect(),
+        statement="SELECT orders.id FROM orders WHERE orders.id = $1::INTEGER",
+    )
+
+    assert sql_expression.get_sql() == "SELECT orders.id FROM orders WHERE orders.id = $1::INTEGER"
+    assert sql_expression.get_sql(bind_params=True) == "SELECT orders.id \nFROM orders \nWHERE orders.id = 1"
+
+
+@pytest.mark.parametrize(
+    ("sql_expression", "expected_sql", "expected_sql_with_bind_params"),
+    [
+        pytest.param(
+            SQLExpression(
+                insert(Order),
+                dialect=asyncpg.dialect(),
+                statement="INSERT INTO orders (recipient) VALUES ($1::VARCHAR) -- template",
+                cursor_executions=[
+                    CursorExecution(
+                        "INSERT INTO orders (recipient) VALUES ($1::VARCHAR), ($2::VARCHAR)", ["A", "B"], False
+                    ),
+                    CursorExecution("INSERT INTO orders (recipient) VALUES ($1::VARCHAR)", ["C"], False),
+                ],
+            ),
+            "INSERT INTO orders (recipient) VALUES ($1::VARCHAR), ($2::VARCHAR);\n"
+            "INSERT INTO orders (recipient) VALUES ($1::VARCHAR)",
+            "INSERT INTO orders (recipient) VALUES ('A'::VARCHAR), ('B'::VARCHAR);\n"
+            "INSERT INTO orders (recipient) VALUES ('C'::VARCHAR)",
+            id="numeric_dollar_batches",
+        ),
+        pytest.param(
+            SQLExpression(
+                insert(Order),
+                dialect=sqlite.dialect(),
+                statement="INSERT INTO orders (recipient) VALUES (?)",
+                cursor_executions=[
+                    CursorExecution(
+                        "INSERT INTO orders (recipient) VALUES ('?'), (?), (?)", ("John 'JD' Doe", None), False
+                    )
+                ],
+            ),
+            "INSERT INTO orders (recipient) VALUES ('?'), (?), (?)",
+            "INSERT INTO orders (recipient) VALUES ('?'), ('John ''JD'' Doe'), (NULL)",
+            id="qmark",
+        ),
+        pytest.param(
+            SQLExpression(
+                insert(Order),
+                dialect=psycopg.dialect(),
+                statement="INSERT INTO orders (recipient) VALUES (%(recipient)s)",
+                cursor_executions=[
+                    CursorExecution(
+                        "INSERT INTO orders (recipient) VALUES (%(recipient__0)s), (%(recipient__1)s)",
+                        {"recipient__0": "A", "recipient__1": "B"},
+                        False,
+                    )
+                ],
+            ),
+            "INSERT INTO orders (recipient) VALUES (%(recipient__0)s), (%(recipient__1)s)",
+            "INSERT INTO orders (recipient) VALUES ('A'), ('B')",
+            id="pyformat",
+        ),
+    ],
+)
+def test_get_sql_rewritten_statement(
+    sql_expression: SQLExpression, expected_sql: str, expected_sql_with_bind_params: str
+) -> None:
+    assert sql_expression.get_sql() == expected_sql
+    assert sql_expression.get_sql(bind_params=True) == expected_sql_with_bind_params
+
+
+@pytest.mark.parametrize(
+    ("sql_expression", "expected_tables"),
+    [
+        (SQLExpression(select(Order)), ("orders",)),
+        (SQLExpression(select(Order.id, OrderItem.id).join(OrderItem.order)), ("orders", "order_items")),
+        (
+            SQLExpression(insert(OrderItem).values(order_id=select(Order.id).scalar_subquery())),
+            ("order_items", "orders"),
+        ),
+        (SQLExpression(update(Order)), ("orders",)),
+        (SQLExpression(delete(Order)), ("orders",)),
+        (SQLExpression(text("BEGIN")), ()),
+    ],
+)
+def test_tables(sql_expression: SQLExpression, expected_tables: tuple[str, ...]) -> None:
+    assert sql_expression.tables == expected_tables
+
+
+class UncacheableColumn(ColumnClause[int]):
+    inherit_cache = False
+
+
+@pytest.mark.parametrize(
+    ("sql_expression", "executable", "ignore_bind_values", "expected_match"),
+    [
+        (SQLExpression(select(Order).where(Order.id == 1)), select(Order).where(Order.id == 1), False, True),
+        (SQLExpression(select(Order).where(Order.id == 1)), select(Order).where(Order.id == 2), False, False),
+        (SQLExpression(select(Order).where(Order.id == 1)), select(Order).where(Order.id == 2), True, True),
+        (SQLExpression(select(Order).where(Order.id == 1)), select(Order).where(Order.id > 1), True, False),
+        (SQLExpression(select(Order)), select(Order.__table__), True, False),
+        (SQLExpression(text("BEGIN")), text("BEGIN"), False, True),
+        (SQLExpression(insert(Order), params={"recipient": "John Doe"}), insert(Order), False, False),
+        (SQLExpression(insert(Order), params={"recipient": "John Doe"}), insert(Order), True, True),
+        (
+            SQLExpression(select(UncacheableColumn("id")).where(literal_column("id") == 1)),
+            select(UncacheableColumn("id")).where(literal_column("id") == 2),
+            False,
+            False,
+        ),
+        (
+            SQLExpression(select(UncacheableColumn("id")).where(literal_column("id") == 1)),
+            select(UncacheableColumn("id")).where(literal_column("id") == 2),
+            True,
+            True,
+        ),
+    ],
+)
+def test_matches(
+    sql_expression: SQLExpression,
+    executable: Executable,
+    ignore_bind_values: bool,
+    expected_match: bool,
+) -> None:
+    assert sql_expression.matches(executable, ignore_bind_values=ignore_bind_values) is expected_match
+
+
+@pytest.mark.parametrize(
+    ("sql_expression", "expected_bind_values"),
+    [
+        (SQLExpression(select(Order).where(Order.id == 1)), [1, {}, []]),
+        (SQLExpression(select(Order).where(Order.id.in_([1, 2]))), [[1, 2], {}, []]),
+        (SQLExpression(insert(Order), params={"recipient": "John Doe"}), [{"recipient": "John Doe"}, []]),
+        (
+            SQLExpression(insert(Order), multiparams=[{"recipient": "John Doe"}, {"recipient": "Jane Doe"}]),
+            [{}, [{"recipient": "John Doe"}, {"recipient": "Jane Doe"}]],
+        ),
+        (SQLExpression(select(UncacheableColumn("id")).where(literal_column("id") == 1)), [{}, []]),
+    ],
+)
+def test_bind_values(sql_expression: SQLExpression, expected_bind_values: list[Any]) -> None:
+    assert sql_expression.bind_values == expected_bind_values
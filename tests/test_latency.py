@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import Engine, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from pytest_capsqlalchemy import SQLAlchemyCaptureContext, SQLAlchemyCapturer
+from pytest_capsqlalchemy.latency import SimulatedLatency
+from tests.conftest import Order
+
+
+@pytest.mark.capsqlalchemy(capture_details=True, simulated_latency=0.02)
+async def test_simulated_latency(capsqlalchemy_context: SQLAlchemyCaptureContext, db_session: AsyncSession) -> None:
+    started_at = time.perf_counter()
+
+    await db_session.execute(select(text("1")))
+    await db_session.execute(select(Order).limit(1))
+    await db_session.commit()
+
+    elapsed = time.perf_counter() - started_at
+
+    assert capsqlalchemy_context.simulated_latency is not None
+    assert repr(capsqlalchemy_context.simulated_latency) == "SimulatedLatency(delay=0.02, jitter=0.0)"
+
+    latencies = [expr.simulated_latency for expr in capsqlalchemy_context.captured_expressions]
+    assert latencies == [None, 0.02, 0.02, 0.02]
+    assert elapsed >= 0.06
+
+    for expr in capsqlalchemy_context.captured_expressions[1:3]:
+        assert expr.duration is not None
+        assert expr.duration < 0.02
+        assert expr.projected_duration == pytest.approx(expr.duration + 0.02)
+
+    commit_expr = capsqlalchemy_context.captured_expressions[3]
+    assert commit_expr.projected_duration == pytest.approx(0.02)
+
+
+async def test_simulated_latency_does_not_block_event_loop(db_engine: AsyncEngine) -> None:
+    async def select_one() -> None:
+        async with db_engine.connect() as conn:
+            await conn.execute(select(text("1")))
+
+    ticks = 0
+
+    async def tick(until: asyncio.Future[None]) -> None:
+        nonlocal ticks
+
+        while not until.done():
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    # Make sure both connections are already in the pool before measuring
+    await asyncio.gather(select_one(), select_one())
+
+    with SQLAlchemyCaptureContext(db_engine, simulated_latency=0.05):
+        started_at = time.perf_counter()
+        selects = asyncio.gather(select_one(), select_one())
+        await asyncio.gather(selects, tick(selects))
+        elapsed = time.perf_counter() - started_at
+
+    # Each connection executes a SELECT and a ROLLBACK, so each of them is delayed by at least 0.1s. The
+    # other tasks keep running in the meantime, which a blocking delay would prevent
+    assert elapsed >= 0.1
+    assert ticks >= 5
+
+
+def test_simulated_latency_jitter(sync_db_engine: Engine) -> None:
+    def capture_latencies(seed: int) -> list[float]:
+        simulated_latency = SimulatedLatency(0.001, jitter=0.001, seed=seed)
+
+        capsqlalchemy_context = SQLAlchemyCaptureContext(sync_db_engine, simulated_latency=simulated_latency)
+
+        with capsqlalchemy_context, sync_db_engine.connect() as conn:
+            for _ in range(5):
+                conn.execute(select(text("1")))
+
+        return [
+            expr.simulated_latency
+            for expr in capsqlalchemy_context.captured_expressions
+            if expr.simulated_latency is not None
+        ]
+
+    latencies = capture_latencies(seed=42)
+
+    assert len(latencies) == 6
+    assert len(set(latencies)) == 6
+    assert all(0 <= latency <= 0.002 for latency in latencies)
+    assert capture_latencies(seed=42) == latencies
+
+
+@pytest.mark.capsqlalchemy(simulated_latency=0.01)
+async def test_simulated_latency_nested_contexts(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    with capsqlalchemy:
+        await db_session.execute(select(text("1")))
+
+        (inner_expr,) = capsqlalchemy.captured_expressions[1:]
+
+    (outer_expr,) = capsqlalchemy.captured_expressions[1:]
+
+    assert inner_expr.simulated_latency == outer_expr.simulated_latency == pytest.approx(0.01)
+
+
+@pytest.mark.capsqlalchemy(simulated_latency=0.005)
+async def test_benchmark_projected_db_time(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    async def fetch_order() -> None:
+        await db_session.execute(select(Order).limit(1))
+        await db_session.commit()
+
+    result = await capsqlalchemy.benchmark(fetch_order, rounds=3)
+
+    assert result.projected_db_time.min >= 0.01
+    assert result.db_time.median < result.projected_db_time.median
+
+    result.assert_p95_projected_db_time_below(1.0)
+
+
+@pytest.mark.parametrize(
+    ("delay", "jitter"),
+    [
+        (-0.001, 0.0),
+        (0.001, -0.001),
+    ],
+)
+def test_simulated_latency_invalid(delay: float, jitter: float) -> None:
+    with pytest.raises(ValueError, match="the delay and jitter can't be negative"):
+        SimulatedLatency(delay, jitter=jitter)
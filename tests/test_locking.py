@@ -0,0 +1,178 @@
+import asyncio
+import re
+from typing import Optional
+
+import pytest
+from sqlalchemy import Executable, delete, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from pytest_capsqlalchemy import SQLAlchemyCapturer
+from pytest_capsqlalchemy.expression import SQLExpression, SQLExpressionType
+from pytest_capsqlalchemy.locking import find_lock_order_conflicts, find_locking_transactions, takes_explicit_locks
+from tests.conftest import Order, OrderItem
+
+
+def make_expression(
+    executable: Executable, *, connection_id: int = 1, started_at: Optional[float] = None
+) -> SQLExpression:
+    return SQLExpression(executable, engine_name="default", connection_id=connection_id, started_at=started_at)
+
+
+@pytest.mark.parametrize(
+    ("executable", "expected_locks"),
+    [
+        (select(Order).with_for_update(), [("orders", "FOR UPDATE")]),
+        (select(Order).with_for_update(read=True), [("orders", "FOR SHARE")]),
+        (select(Order).with_for_update(key_share=True), [("orders", "FOR NO KEY UPDATE")]),
+        (select(Order).with_for_update(read=True, key_share=True), [("orders", "FOR KEY SHARE")]),
+        (
+            select(Order, OrderItem).join(Order.items).with_for_update(),
+            [("orders", "FOR UPDATE"), ("order_items", "FOR UPDATE")],
+        ),
+        (select(Order, OrderItem).join(Order.items).with_for_update(of=OrderItem), [("order_items", "FOR UPDATE")]),
+        (text("SELECT * FROM public.orders WHERE id = 1 FOR UPDATE"), [("orders", "FOR UPDATE")]),
+        (
+            text("select * from orders join order_items on true for no key update of orders, order_items skip locked"),
+            [("orders", "FOR NO KEY UPDATE"), ("order_items", "FOR NO KEY UPDATE")],
+        ),
+        (text("LOCK TABLE orders IN SHARE ROW EXCLUSIVE MODE NOWAIT"), [("orders", "LOCK SHARE ROW EXCLUSIVE")]),
+        (
+            text('LOCK "orders", public.order_items'),
+            [("orders", "LOCK ACCESS EXCLUSIVE"), ("order_items", "LOCK ACCESS EXCLUSIVE")],
+        ),
+        (update(Order).where(Order.id == 1).values(recipient="John Doe"), [("orders", "UPDATE")]),
+        (delete(OrderItem).where(OrderItem.order_id == 1), [("order_items", "DELETE")]),
+        (select(Order), []),
+        (insert(Order), []),
+        (text("SELECT 'FOR UPDATE'"), []),
+        (text("UPDATE orders SET recipient = 'FOR UPDATE'"), []),
+    ],
+)
+def test_find_locking_transactions_locks(executable: Executable, expected_locks: list[tuple[str, str]]) -> None:
+    transactions = find_locking_transactions([make_expression(executable)])
+
+    assert [(lock.table, lock.mode) for transaction in transactions for lock in transaction.locks] == expected_locks
+
+
+@pytest.mark.parametrize(
+    ("executable", "expected"),
+    [
+        (select(Order).with_for_update(), True),
+        (text("SELECT * FROM orders WHERE id = 1 FOR SHARE"), True),
+        (text("LOCK TABLE orders"), True),
+        (select(Order), False),
+        (update(Order).where(Order.id == 1).values(recipient="John Doe"), False),
+        (text("BEGIN"), False),
+    ],
+)
+def test_takes_explicit_locks(executable: Executable, expected: bool) -> None:
+    assert takes_explicit_locks(make_expression(executable)) is expected
+
+
+def test_find_locking_transactions() -> None:
+    expressions = [
+        make_expression(text("BEGIN"), connection_id=1, started_at=1.0),
+        make_expression(text("BEGIN"), connection_id=2, started_at=1.5),
+        make_expression(select(Order).with_for_update(), connection_id=1, started_at=2.0),
+        make_expression(update(OrderItem).values(price=1.0), connection_id=2, started_at=2.5),
+        make_expression(update(OrderItem).values(price=1.0), connection_id=1, started_at=3.0),
+        make_expression(text("COMMIT"), connection_id=1, started_at=5.0),
+        make_expression(text("ROLLBACK"), connection_id=2, started_at=6.0),
+        make_expression(text("BEGIN"), connection_id=1, started_at=7.0),
+        make_expression(select(Order), connection_id=1, started_at=8.0),
+        make_expression(text("COMMIT"), connection_id=1, started_at=9.0),
+        make_expression(delete(Order), connection_id=3, started_at=10.0),
+    ]
+
+    first, second, third = find_locking_transactions(expressions)
+
+    assert first.ended_by == SQLExpressionType.COMMIT
+    assert first.table_order == ("orders", "order_items")
+    assert [lock.hold_time for lock in first.locks] == [3.0, 2.0]
+    assert str(first) == "transaction locking orders, order_items on engine 'default'"
+    assert str(first.locks[0]) == "FOR UPDATE lock on orders held for 3.000000s"
+    assert [lock.explicit for lock in first.locks] == [True, False]
+
+    assert second.ended_by == SQLExpressionType.ROLLBACK
+    assert second.table_order == ("order_items",)
+    assert [lock.hold_time for lock in second.locks] == [3.5]
+
+    assert third.ended_by is None
+    assert third.connection_id == 3
+    assert [lock.hold_time for lock in third.locks] == [None]
+    assert str(third.locks[0]) == "DELETE lock on orders"
+
+    assert [
+        transaction.table_order for transaction in find_locking_transactions(expressions, include_writes=False)
+    ] == [("orders",)]
+
+
+def test_find_lock_order_conflicts() -> None:
+    expressions = [
+        make_expression(select(Order).with_for_update(), connection_id=1),
+        make_expression(update(OrderItem).values(price=1.0), connection_id=1),
+        make_expression(text("COMMIT"), connection_id=1),
+        make_expression(select(Order, OrderItem).join(Order.items).with_for_update(), connection_id=1),
+        make_expression(text("COMMIT"), connection_id=1),
+        make_expression(delete(OrderItem), connection_id=1),
+        make_expression(delete(Order), connection_id=1),
+        make_expression(text("COMMIT"), connection_id=1),
+    ]
+    transactions = find_locking_transactions(expressions)
+
+    (conflict,) = find_lock_order_conflicts(transactions)
+
+    assert (conflict.first_table, conflict.second_table) == ("orders", "order_items")
+    assert conflict.transaction is transactions[0]
+    assert conflict.conflicting_transaction is transactions[2]
+    assert str(conflict) == (
+        "orders before order_items (UPDATE lock on order_items), but order_items before orders (DELETE lock on orders)"
+    )
+
+    assert find_lock_order_conflicts(transactions[:2]) == []
+
+
+async def lock_orders_then_items(db_session: AsyncSession) -> None:
+    async with db_session.begin():
+        await db_session.execute(select(Order).where(Order.id == 1).with_for_update())
+        await db_session.execute(update(OrderItem).where(OrderItem.order_id == 1).values(price=1.0))
+
+
+async def lock_items_then_orders(db_session: AsyncSession) -> None:
+    async with db_session.begin():
+        await db_session.execute(select(OrderItem).where(OrderItem.order_id == 1).with_for_update())
+        await db_session.execute(update(Order).where(Order.id == 1).values(recipient="John Doe"))
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_assert_lock_order_consistent(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    await lock_orders_then_items(db_session)
+    await lock_orders_then_items(db_session)
+
+    capsqlalchemy.assert_lock_order_consistent()
+
+    await lock_items_then_orders(db_session)
+
+    with pytest.raises(
+        AssertionError, match=r"Found tables locked in an inconsistent order:\n  \* orders before order_items"
+    ):
+        capsqlalchemy.assert_lock_order_consistent()
+
+    with pytest.raises(ValueError, match="unknown engine"):
+        capsqlalchemy.assert_lock_order_consistent(engine="replica")
+
+    capsqlalchemy.assert_lock_order_consistent(include_writes=False)
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_assert_max_lock_hold_time(db_engine: AsyncEngine, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    async with db_engine.begin() as conn:
+        await conn.execute(text("LOCK TABLE orders IN SHARE MODE"))
+        await asyncio.sleep(0.05)
+
+    capsqlalchemy.assert_max_lock_hold_time(1)
+
+    expected_message = "Found locks held for longer than 0.010000s:\n  * LOCK SHARE lock on orders held for 0.0"
+
+    with pytest.raises(AssertionError, match=re.escape(expected_message)):
+        capsqlalchemy.assert_max_lock_hold_time(0.01)
@@ -0,0 +1,200 @@
+import inspect
+import re
+
+import pytest
+import sqlalchemy
+from packaging.version import Version
+from sqlalchemy import Engine, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from pytest_capsqlalchemy import SQLAlchemyCaptureContext, SQLAlchemyCapturer
+from pytest_capsqlalchemy.utils import get_for_update_arg, get_values_columns, has_multi_values
+from tests.conftest import Order
+
+
+@pytest.mark.capsqlalchemy(capture_details=True, capture_sessions=True)
+async def test_capture_flushes(capsqlalchemy_context: SQLAlchemyCaptureContext, db_session: AsyncSession) -> None:
+    orders = [Order(recipient="John Doe"), Order(recipient="Jane Doe")]
+    db_session.add_all(orders)
+    await db_session.flush()
+
+    order = Order(recipient="Max Mustermann")
+    db_session.add(order)
+    await db_session.commit()
+
+    order.recipient = "Erika Mustermann"
+    await db_session.commit()
+
+    first_flush, second_flush, third_flush = capsqlalchemy_context.flushes
+
+    assert not any(flush.autoflush for flush in capsqlalchemy_context.flushes)
+    assert [flush.engine_name for flush in capsqlalchemy_context.flushes] == ["default"] * 3
+    assert [(flush.new, flush.dirty, flush.deleted) for flush in capsqlalchemy_context.flushes] == [
+        (2, 0, 0),
+        (1, 0, 0),
+        (0, 1, 0),
+    ]
+    assert [flush.identity_map_size for flush in capsqlalchemy_context.flushes] == [2, 3, 3]
+
+    assert [expr.type._value_ for expr in first_flush.expressions] == ["INSERT"]
+    assert [expr.type._value_ for expr in second_flush.expressions] == ["INSERT"]
+    assert [expr.type._value_ for expr in third_flush.expressions] == ["UPDATE"]
+
+    assert first_flush.call_site is not None
+    assert first_flush.call_site.function == "test_capture_flushes"
+    assert first_flush.started_at < second_flush.started_at < third_flush.started_at
+    assert first_flush.duration > 0
+
+
+@pytest.mark.capsqlalchemy(capture_details=True, capture_sessions=True)
+async def test_capture_autoflush(capsqlalchemy_context: SQLAlchemyCaptureContext, db_session: AsyncSession) -> None:
+    db_session.add(Order(recipient="John Doe"))
+    await db_session.execute(select(Order).limit(1))
+
+    (flush,) = capsqlalchemy_context.flushes
+
+    assert flush.autoflush
+    assert flush.new == 1
+    assert [expr.type._value_ for expr in flush.expressions] == ["INSERT"]
+    assert [expr.type._value_ for expr in capsqlalchemy_context.captured_expressions] == ["BEGIN", "INSERT", "SELECT"]
+    assert str(flush).startswith("autoflush of 1 object(s) (1 new, 0 dirty, 0 deleted), 1 statement(s) at ")
+
+
+@pytest.mark.capsqlalchemy(capture_sessions=True)
+async def test_capture_identity_map_size(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    db_session: AsyncSession,
+) -> None:
+    new_orders = [Order(recipient=f"Recipient {i}") for i in range(5)]
+    db_session.add_all(new_orders)
+    await db_session.commit()
+    db_session.expunge_all()
+
+    loaded_orders = (await db_session.scalars(select(Order).limit(3))).all()
+
+    assert len(loaded_orders) == 3
+    assert [sample.size for sample in capsqlalchemy_context.identity_map_sizes] == [5, 0]
+    assert capsqlalchemy_context.get_max_identity_map_size() == 5
+    assert capsqlalchemy_context.get_max_identity_map_size("default") == 5
+    assert capsqlalchemy_context.get_max_identity_map_size("other") == 0
+
+    capsqlalchemy_context.clear()
+
+    assert capsqlalchemy_context.flushes == []
+    assert capsqlalchemy_context.identity_map_sizes == []
+    assert capsqlalchemy_context.get_max_identity_map_size() == 0
+
+
+def test_capture_sync_session_bound_to_connection(sync_db_engine: Engine) -> None:
+    capsqlalchemy_context = SQLAlchemyCaptureContext(sync_db_engine, capture_sessions=True)
+
+    with capsqlalchemy_context, sync_db_engine.connect() as conn, Session(bind=conn) as session:
+        Order.__table__.create(conn)
+
+        session.add(Order(recipient="John Doe"))
+        session.flush()
+
+    (flush,) = capsqlalchemy_context.flushes
+
+    assert flush.engine_name == "default"
+    assert not flush.autoflush
+    assert [expr.type._value_ for expr in flush.expressions] == ["INSERT"]
+
+
+async def test_capture_sessions_of_other_engines_ignored(db_session: AsyncSession, sync_db_engine: Engine) -> None:
+    with SQLAlchemyCaptureContext(sync_db_engine, capture_sessions=True) as capsqlalchemy_context:
+        db_session.add(Order(recipient="John Doe"))
+        await db_session.flush()
+        await db_session.scalars(select(Order).limit(1))
+
+    assert capsqlalchemy_context.flushes == []
+    assert capsqlalchemy_context.identity_map_sizes == []
+    assert capsqlalchemy_context.get_max_identity_map_size() == 0
+
+
+async def test_capture_sessions_disabled(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    capsqlalchemy: SQLAlchemyCapturer,
+    db_session: AsyncSession,
+) -> None:
+    db_session.add(Order(recipient="John Doe"))
+    await db_session.flush()
+
+    assert not capsqlalchemy_context.capture_sessions
+    assert capsqlalchemy_context.flushes == []
+
+    with pytest.raises(RuntimeError, match="ORM sessions are not captured"):
+        capsqlalchemy.assert_max_flushes(1)
+
+    with pytest.raises(RuntimeError, match="ORM sessions are not captured"):
+        capsqlalchemy.assert_max_identity_map_size(1)
+
+
+@pytest.mark.capsqlalchemy(capture_sessions=True)
+async def test_assert_max_flushes(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    for i in range(3):
+        db_session.add(Order(recipient=f"Recipient {i}"))
+        await db_session.scalars(select(Order).limit(1))
+
+    await db_session.commit()
+
+    capsqlalchemy.assert_max_flushes(3)
+    capsqlalchemy.assert_max_flushes(0, include_autoflush=False)
+
+    expected_message = "Expected at most 2 flushes, got 3:\n  * autoflush of 1 object(s) (1 new, 0 dirty, 0 deleted)"
+
+    with pytest.raises(AssertionError, match=re.escape(expected_message)):
+        capsqlalchemy.assert_max_flushes(2)
+
+    with capsqlalchemy:
+        db_session.add(Order(recipient="John Doe"))
+        await db_session.commit()
+
+        assert len(capsqlalchemy.flushes) == 1
+        capsqlalchemy.assert_max_flushes(1, engine="default")
+
+    assert len(capsqlalchemy.flushes) == 4
+
+
+@pytest.mark.capsqlalchemy(capture_sessions=True)
+async def test_assert_max_identity_map_size(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    orders = [Order(recipient=f"Recipient {i}") for i in range(3)]
+    db_session.add_all(orders)
+    await db_session.commit()
+
+    capsqlalchemy.assert_max_identity_map_size(3)
+
+    with pytest.raises(AssertionError, match="Expected the identity map to hold at most 2 objects, but it grew to 3"):
+        capsqlalchemy.assert_max_identity_map_size(2, engine="default")
+
+
+def test_supported_sqlalchemy_version() -> None:
+    # Autoflush and flush tracking rely on private Session internals (see `is_autoflush` and `is_flushing`), while
+    # lock and batching detection rely on private attributes of statements (see `get_for_update_arg`,
+    # `get_values_columns` and `has_multi_values`), which were verified for these versions. Verify them again
+    # before extending the range.
+    assert Version("2.0.38") <= Version(sqlalchemy.__version__) < Version("2.1"), (
+        f"the private SQLAlchemy internals in pytest_capsqlalchemy.utils aren't verified for {sqlalchemy.__version__}"
+    )
+
+    session = Session()
+
+    assert session._flushing is False
+    assert "self.flush()" in inspect.getsource(Session._autoflush)
+
+    assert get_for_update_arg(select(Order)) is None
+
+    for_update = get_for_update_arg(select(Order).with_for_update(read=True, key_share=True, of=Order))
+    assert for_update is not None
+    assert for_update.read is True
+    assert for_update.key_share is True
+    assert for_update.of == [Order.__table__]
+
+    assert get_values_columns(select(Order)) == []
+    assert get_values_columns(insert(Order)) == []
+    assert get_values_columns(insert(Order).values(recipient="John Doe")) == ["recipient"]
+    assert get_values_columns(update(Order).values({Order.recipient: "John Doe"})) == ["recipient"]
+
+    assert not has_multi_values(insert(Order).values(recipient="John Doe"))
+    assert has_multi_values(insert(Order).values([{"recipient": "John Doe"}, {"recipient": "Jane Doe"}]))
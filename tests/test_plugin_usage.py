@@ -1,3 +1,5 @@
+import sys
+
 import pytest
 from pytest import Pytester
 
@@ -27,3 +29,40 @@ def test_plugin_setup_with_async_db_engine_fixture(pytester: Pytester) -> None:
     result = pytester.runpytest()
 
     result.assert_outcomes(passed=3)
+
+
+def test_plugin_setup_with_multiple_engines(pytester: Pytester) -> None:
+    pytester.copy_example("test_plugin_setup_with_multiple_engines.py")
+    result = pytester.runpytest()
+
+    result.assert_outcomes(passed=2)
+
+
+def test_plugin_writes_chrome_traces(pytester: Pytester) -> None:
+    pytester.copy_example("test_plugin_setup_with_multiple_engines.py")
+    result = pytester.runpytest("--capsqlalchemy-trace-dir=traces")
+
+    result.assert_outcomes(passed=2)
+    assert sorted(path.name for path in (pytester.path / "traces").iterdir()) == [
+        "test_plugin_setup_with_multiple_engines.py_test_capsqlalchemy_counts_per_engine.json",
+        "test_plugin_setup_with_multiple_engines.py_test_capsqlalchemy_setup.json",
+    ]
+
+
+def test_plugin_statement_timeout(pytester: Pytester) -> None:
+    pytester.copy_example("test_plugin_setup_with_async_db_engine_fixture.py")
+    result = pytester.runpytest("--capsqlalchemy-statement-timeout=0.000001")
+
+    result.assert_outcomes(passed=2, failed=1)
+    assert "StatementTimeoutError: Statement exceeded the timeout of 0.000s" in result.stdout.str()
+
+
+def test_plugin_import_is_lazy(pytester: Pytester) -> None:
+    result = pytester.run(
+        sys.executable,
+        "-c",
+        "import sys, pytest_capsqlalchemy.plugin; print(sorted(name for name in sys.modules if 'sqlalchemy' in name))",
+    )
+
+    assert result.ret == 0
+    assert result.outlines == ["['pytest_capsqlalchemy', 'pytest_capsqlalchemy.plugin']"]
@@ -0,0 +1,128 @@
+import pytest
+from sqlalchemy import Executable, delete, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pytest_capsqlalchemy import SQLAlchemyCapturer
+from pytest_capsqlalchemy.expression import SQLExpression
+from pytest_capsqlalchemy.read_cache import simulate_read_cache
+from pytest_capsqlalchemy.report import get_fingerprint
+from tests.conftest import Order, OrderItem
+
+
+def make_expression(executable: Executable, *, engine_name: str = "default", duration: float = 0.01) -> SQLExpression:
+    return SQLExpression(executable, engine_name=engine_name, duration=duration)
+
+
+def test_simulate_read_cache() -> None:
+    simulation = simulate_read_cache([
+        make_expression(text("BEGIN")),
+        make_expression(select(Order).where(Order.id == 1)),
+        make_expression(select(Order).where(Order.id == 1)),
+        make_expression(select(Order).where(Order.id == 2)),
+        make_expression(select(OrderItem).where(OrderItem.order_id == 1), duration=0.1),
+        make_expression(update(Order).where(Order.id == 1).values(recipient="Jane Doe")),
+        make_expression(select(Order).where(Order.id == 1)),
+        make_expression(select(OrderItem).where(OrderItem.order_id == 1), duration=0.1),
+        make_expression(text("COMMIT")),
+    ])
+
+    order_sql = "SELECT orders.id, orders.recipient \nFROM orders \nWHERE orders.id = :id_1"
+    order_item_sql = (
+        "SELECT order_items.id, order_items.item_name, order_items.price, order_items.order_id \n"
+        "FROM order_items \nWHERE order_items.order_id = :order_id_1"
+    )
+
+    assert [
+        (stats.fingerprint, stats.reads, stats.hits, stats.read_time, stats.saved_time)
+        for stats in simulation.statistics
+    ] == [
+        (get_fingerprint(order_item_sql), 2, 1, pytest.approx(0.2), pytest.approx(0.1)),
+        (get_fingerprint(order_sql), 4, 1, pytest.approx(0.04), pytest.approx(0.01)),
+    ]
+    assert simulation.reads == 6
+    assert simulation.hits == 2
+    assert simulation.hit_ratio == pytest.approx(1 / 3)
+    assert simulation.read_time == pytest.approx(0.24)
+    assert simulation.saved_time == pytest.approx(0.11)
+
+    assert str(simulation) == (
+        "Read cache of 128 entries: 2/6 hits (33.3%), 0.110000s of 0.240000s saved\n"
+        f"  {get_fingerprint(order_item_sql)}  1/2 hits (50.0%), 0.100000s saved  {' '.join(order_item_sql.split())}\n"
+        f"  {get_fingerprint(order_sql)}  1/4 hits (25.0%), 0.010000s saved  {' '.join(order_sql.split())}"
+    )
+
+
+@pytest.mark.parametrize(
+    ("statement", "expected_hits"),
+    [
+        (insert(Order).values(recipient="John Doe"), 1),
+        (delete(OrderItem).where(OrderItem.id == 1), 1),
+        (update(OrderItem).where(OrderItem.order_id == select(Order.id).scalar_subquery()).values(price=1.0), 1),
+        (text("UPDATE orders SET recipient = 'John Doe'"), 0),
+        (text("SELECT 1"), 2),
+    ],
+)
+def test_simulate_read_cache_invalidation(statement: Executable, expected_hits: int) -> None:
+    simulation = simulate_read_cache([
+        make_expression(select(Order).where(Order.id == 1)),
+        make_expression(select(OrderItem).where(OrderItem.id == 1)),
+        make_expression(statement),
+        make_expression(select(Order).where(Order.id == 1)),
+        make_expression(select(OrderItem).where(OrderItem.id == 1)),
+    ])
+
+    assert simulation.hits == expected_hits
+
+
+def test_simulate_read_cache_uncacheable_reads() -> None:
+    simulation = simulate_read_cache(
+        [make_expression(text("SELECT * FROM orders WHERE id = 1"))] * 2
+        + [make_expression(select(Order).where(Order.id == 1).with_for_update())] * 2
+    )
+
+    assert simulation.reads == 4
+    assert simulation.hits == 0
+
+
+def test_simulate_read_cache_eviction() -> None:
+    reads = [make_expression(select(Order).where(Order.id == order_id)) for order_id in (1, 2, 1, 3, 2, 1)]
+
+    # The least recently used read is evicted: 1, 2, 1 (hit), 3 (evicts 2), 2 (evicts 1), 1
+    assert simulate_read_cache(reads, max_size=2).hits == 1
+    assert simulate_read_cache(reads, max_size=3).hits == 3
+
+    with pytest.raises(ValueError, match="The read cache must hold at least one entry, got max_size=0"):
+        simulate_read_cache(reads, max_size=0)
+
+
+def test_simulate_read_cache_per_engine() -> None:
+    simulation = simulate_read_cache([
+        make_expression(select(Order).where(Order.id == 1), engine_name="replica"),
+        make_expression(select(Order).where(Order.id == 1), engine_name="default"),
+        make_expression(select(Order).where(Order.id == 1), engine_name="replica"),
+        make_expression(update(Order).values(recipient="John Doe"), engine_name="default"),
+        make_expression(select(Order).where(Order.id == 1), engine_name="replica"),
+    ])
+
+    # Reads are cached per engine, but writes invalidate the reads of all the engines
+    assert simulation.reads == 4
+    assert simulation.hits == 1
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_capturer_simulate_read_cache(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    for _ in range(3):
+        await db_session.get(Order, 1, populate_existing=True)
+
+    await db_session.execute(update(Order).where(Order.id == 1).values(recipient="John Doe"))
+    await db_session.get(Order, 1, populate_existing=True)
+
+    simulation = capsqlalchemy.simulate_read_cache(max_size=16)
+
+    assert simulation.max_size == 16
+    assert simulation.reads == 4
+    assert simulation.hits == 2
+    assert simulation.saved_time > 0
+    assert simulation.statistics[0].sql == (
+        "SELECT orders.id AS orders_id, orders.recipient AS orders_recipient FROM orders WHERE orders.id = $1::INTEGER"
+    )
@@ -0,0 +1,91 @@
+import time
+
+from pytest_capsqlalchemy.report import MAX_LINE_LENGTH, get_fingerprint, render_sequence_mismatch, to_line
+
+
+def test_get_fingerprint() -> None:
+    fingerprint = get_fingerprint("SELECT orders.id FROM orders WHERE orders.id = 1")
+
+    assert len(fingerprint) == 8
+    assert get_fingerprint("SELECT orders.id\nFROM orders WHERE orders.id = 23") == fingerprint
+    assert get_fingerprint(
+        "SELECT orders.id FROM orders WHERE orders.recipient = 'John ''JD'' Doe'"
+    ) == get_fingerprint("SELECT orders.id FROM orders WHERE orders.recipient = 'Jane Doe'")
+    assert get_fingerprint("SELECT orders.id FROM orders WHERE orders.id > 1") != fingerprint
+
+
+def test_to_line() -> None:
+    assert to_line("SELECT orders.id \nFROM orders\n\tWHERE orders.id = 1") == (
+        "SELECT orders.id FROM orders WHERE orders.id = 1"
+    )
+
+    columns = ", ".join(f"orders.column_{i}" for i in range(100))
+    long_line = to_line(f"SELECT {columns}\nFROM orders")
+
+    assert len(long_line) == MAX_LINE_LENGTH
+    assert long_line.startswith("SELECT orders.column_0, orders.column_1")
+    assert long_line.endswith("...")
+
+
+def test_render_sequence_mismatch() -> None:
+    expected = [f"SELECT orders.id FROM orders WHERE orders.id = {index}" for index in range(10)]  # noqa: S608
+    actual = [*expected[:5], "UPDATE orders SET recipient='John Doe'", *expected[5:]]
+
+    assert render_sequence_mismatch("Captured queries don't match", expected, actual, context=2) == (
+        "Captured queries don't match: expected 10, captured 11\n"  # noqa: S608
+        "\n"
+        "Statements with different counts (expected -> captured):\n"
+        f"  UPDATE   {get_fingerprint(actual[5])}  0 -> 1  UPDATE orders SET recipient=?\n"
+        "\n"
+        "First difference at captured statement 5:\n"
+        "        3  SELECT orders.id FROM orders WHERE orders.id = 3\n"
+        "        4  SELECT orders.id FROM orders WHERE orders.id = 4\n"
+        "  +     5  UPDATE orders SET recipient='John Doe'\n"
+        "        6  SELECT orders.id FROM orders WHERE orders.id = 5\n"
+        "        7  SELECT orders.id FROM orders WHERE orders.id = 6\n"
+        "        8  SELECT orders.id FROM orders WHERE orders.id = 7\n"
+        "        9  SELECT orders.id FROM orders WHERE orders.id = 8\n"
+        "       10  SELECT orders.id FROM orders WHERE orders.id = 9"
+    )
+
+
+def test_render_sequence_mismatch_query_types() -> None:
+    assert render_sequence_mismatch(
+        "Captured query types don't match",
+        ["BEGIN", "SELECT", "INSERT", "COMMIT"],
+        ["BEGIN", "INSERT", "SELECT", "COMMIT"],
+        group_by_fingerprint=False,
+    ) == (
+        "Captured query types don't match: expected 4, captured 4\n"
+        "\n"
+        "The same statements were captured, but in a different order\n"
+        "\n"
+        "First difference at captured statement 1:\n"
+        "        0  BEGIN\n"
+        "  +     1  INSERT\n"
+        "        2  SELECT\n"
+        "  -     2  INSERT\n"
+        "        3  COMMIT"
+    )
+
+
+def test_render_sequence_mismatch_large_capture() -> None:
+    expected = [f"SELECT orders.id FROM orders WHERE orders.id = {index}" for index in range(10_000)]  # noqa: S608
+    expected += [f"INSERT INTO table_{index} (id) VALUES (1)" for index in range(20)]  # noqa: S608
+    actual = [*expected[:5000], "SELECT orders.id FROM orders WHERE orders.id = 0", *expected[5000:10_000]]
+    actual[-1] = "SELECT " + "orders.recipient, " * 50 + "orders.id FROM orders"
+
+    started_at = time.perf_counter()
+    report = render_sequence_mismatch("Captured queries don't match", expected, actual)
+
+    assert time.perf_counter() - started_at < 1
+    assert len(report.splitlines()) < 40
+    assert "Captured queries don't match: expected 10020, captured 10001\n" in report
+    assert f"  INSERT   {get_fingerprint(expected[10_000])}  1 -> 0  INSERT INTO table_0 (id) VALUES (?)\n" in report  # noqa: S608
+    assert f"  INSERT   {get_fingerprint(expected[-1])}  1 -> 0  INSERT INTO table_19 (id) VALUES (?)\n" not in report  # noqa: S608
+    assert "  ... and 11 more\n" in report
+    assert "First difference at captured statement 5000:\n" in report
+    assert "  +  5000  SELECT orders.id FROM orders WHERE orders.id = 0\n" in report
+    assert "     5009  SELECT orders.id FROM orders WHERE orders.id = 5008\n" in report
+    assert report.endswith("    ... 5011 more expected and 4991 more captured not shown")
+    assert all(len(line) < 250 for line in report.splitlines())
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from sqlalchemy import Engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from pytest_capsqlalchemy import SQLAlchemyCaptureContext, SQLAlchemyCapturer, StatementTimeout, StatementTimeoutError
+
+
+@pytest.mark.capsqlalchemy(statement_timeout=0.2)
+async def test_statement_timeout(capsqlalchemy_context: SQLAlchemyCaptureContext, db_session: AsyncSession) -> None:
+    assert repr(capsqlalchemy_context.statement_timeout) == "StatementTimeout(timeout=0.2)"
+
+    await db_session.execute(text("SELECT 1"))
+
+    started_at = time.perf_counter()
+
+    with pytest.raises(StatementTimeoutError, match=r"exceeded the timeout of 0\.200s after 0\.\d{3}s at ") as exc_info:
+        await db_session.execute(text("SELECT pg_sleep(5)"))
+
+    # The statement was cancelled by the database, instead of running to completion
+    assert time.perf_counter() - started_at < 2
+    assert exc_info.value.statement == "SELECT pg_sleep(5)"
+    assert exc_info.value.timeout == pytest.approx(0.2)
+    assert exc_info.value.elapsed >= 0.2
+    assert exc_info.value.call_site is not None
+    assert exc_info.value.call_site.function == "test_statement_timeout"
+
+    await db_session.rollback()
+
+    # The timeout is applied again in the next transaction
+    with pytest.raises(StatementTimeoutError):
+        await db_session.execute(text("SELECT pg_sleep(5)"))
+
+    await db_session.rollback()
+
+
+async def test_statement_timeout_only_applies_to_context(db_engine: AsyncEngine) -> None:
+    with SQLAlchemyCaptureContext(db_engine, statement_timeout=0.5):
+        async with db_engine.connect() as conn:
+            assert (await conn.execute(text("SHOW statement_timeout"))).scalar() == "500ms"
+            await conn.commit()
+
+            assert (await conn.execute(text("SHOW statement_timeout"))).scalar() == "500ms"
+
+    async with db_engine.connect() as conn:
+        assert (await conn.execute(text("SHOW statement_timeout"))).scalar() == "0"
+
+
+async def test_statement_timeout_streamed_first_statement(db_engine: AsyncEngine) -> None:
+    with SQLAlchemyCaptureContext(db_engine, statement_timeout=0.3):
+        async with db_engine.connect() as conn:
+            # The first statement of the transaction uses a server-side cursor
+            streamed_result = await conn.stream(text("SELECT 1"))
+            assert await streamed_result.all() == [(1,)]
+
+            assert (await conn.execute(text("SHOW statement_timeout"))).scalar() == "300ms"
+
+            started_at = time.perf_counter()
+
+            with pytest.raises(StatementTimeoutError):
+                await conn.execute(text("SELECT pg_sleep(5)"))
+
+            # The statement was cancelled by the database, instead of running to completion
+            assert time.perf_counter() - started_at < 2
+
+
+@pytest.mark.capsqlalchemy(statement_timeout=0.2)
+async def test_statement_timeout_nested_contexts(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    with capsqlalchemy:
+        with pytest.raises(StatementTimeoutError) as exc_info:
+            await db_session.execute(text("SELECT pg_sleep(5)"))
+
+        await db_session.rollback()
+
+    assert exc_info.value.timeout == pytest.approx(0.2)
+    assert "SELECT pg_sleep(5)" not in [expr.get_sql() for expr in capsqlalchemy.captured_expressions]
+
+
+def test_statement_timeout_client_side(sync_db_engine: Engine) -> None:
+    capsqlalchemy_context = SQLAlchemyCaptureContext(sync_db_engine, statement_timeout=StatementTimeout(0.05))
+
+    with capsqlalchemy_context, sync_db_engine.connect() as conn:
+        conn.connection.driver_connection.create_function("sleep", 1, time.sleep)  # type: ignore[union-attr]
+
+        conn.execute(text("SELECT sleep(0.01)"))
+
+        # SQLite can't cancel the statement, so it fails once it returns
+        with pytest.raises(StatementTimeoutError, match=r"after 0\.\d{3}s at .*:\nSELECT sleep\(0\.1\)"):
+            conn.execute(text("SELECT sleep(0.1)"))
+
+
+@pytest.mark.parametrize("timeout", [0, -1])
+def test_statement_timeout_invalid(timeout: float) -> None:
+    with pytest.raises(ValueError, match=f"StatementTimeout: the timeout must be positive, got timeout={timeout}"):
+        StatementTimeout(timeout)
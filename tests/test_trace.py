@@ -0,0 +1,107 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlalchemy import Engine, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from pytest_capsqlalchemy import SQLAlchemyCaptureContext, SQLAlchemyCapturer
+from pytest_capsqlalchemy.trace import build_chrome_trace
+from tests.conftest import Order
+
+
+def get_spans(trace: dict[str, Any], category: str) -> list[dict[str, Any]]:
+    return [event for event in trace["traceEvents"] if event["ph"] == "X" and event["cat"] == category]
+
+
+async def test_build_chrome_trace_concurrent_tasks(db_engine: AsyncEngine) -> None:
+    async def select_one() -> None:
+        async with db_engine.connect() as conn:
+            await conn.execute(select(text("1")))
+
+    with SQLAlchemyCaptureContext(db_engine, capture_details=True) as capsqlalchemy_context:
+        await asyncio.gather(
+            asyncio.create_task(select_one(), name="first-task"),
+            asyncio.create_task(select_one(), name="second-task"),
+        )
+
+    trace = build_chrome_trace(capsqlalchemy_context)
+    metadata = {
+        (event["name"], event["tid"]): event["args"]["name"] for event in trace["traceEvents"] if event["ph"] == "M"
+    }
+
+    assert trace["displayTimeUnit"] == "ms"
+    assert metadata.pop(("process_name", 0)) == "engine: default"
+    assert sorted(metadata.values()) == ["first-task", "second-task"]
+    assert sorted(tid for _, tid in metadata) == [1, 2]
+
+    statement_spans = get_spans(trace, "statement")
+    transaction_spans = get_spans(trace, "transaction")
+    checkout_spans = get_spans(trace, "connection")
+
+    assert [(span["name"], span["pid"]) for span in statement_spans] == [("SELECT", 1), ("SELECT", 1)]
+    assert [span["args"]["outcome"] for span in transaction_spans] == ["ROLLBACK", "ROLLBACK"]
+    assert len(checkout_spans) == 2
+
+    assert {span["tid"] for span in statement_spans} == {1, 2}
+    assert all(span["args"]["sql"] == "SELECT 1" for span in statement_spans)
+    assert all(span["ts"] >= 0 and span["dur"] >= 0 for span in trace["traceEvents"] if span["ph"] == "X")
+
+    for statement_span in statement_spans:
+        (transaction_span,) = [span for span in transaction_spans if span["tid"] == statement_span["tid"]]
+        (checkout_span,) = [span for span in checkout_spans if span["tid"] == statement_span["tid"]]
+
+        assert checkout_span["ts"] <= transaction_span["ts"] <= statement_span["ts"]
+        assert statement_span["ts"] + statement_span["dur"] <= transaction_span["ts"] + transaction_span["dur"]
+
+
+@pytest.mark.capsqlalchemy(capture_details=True, capture_sessions=True, simulated_latency=0.001)
+async def test_build_chrome_trace_flushes(
+    capsqlalchemy_context: SQLAlchemyCaptureContext,
+    db_session: AsyncSession,
+) -> None:
+    db_session.add(Order(recipient="John Doe"))
+    await db_session.commit()
+
+    trace = build_chrome_trace(capsqlalchemy_context)
+
+    (flush_span,) = get_spans(trace, "flush")
+    (insert_span,) = get_spans(trace, "statement")
+
+    assert flush_span["name"] == "flush"
+    assert flush_span["args"] == {"new": 1, "dirty": 0, "deleted": 0}
+    assert flush_span["tid"] == insert_span["tid"]
+
+    assert insert_span["name"] == "INSERT orders"
+    assert insert_span["args"]["call_site"].startswith("tests/test_trace.py:")
+    assert insert_span["args"]["simulated_latency_ms"] == pytest.approx(1.0)
+
+
+def test_build_chrome_trace_empty(sync_db_engine: Engine) -> None:
+    with SQLAlchemyCaptureContext({"primary": sync_db_engine}) as capsqlalchemy_context:
+        pass
+
+    assert build_chrome_trace(capsqlalchemy_context) == {
+        "traceEvents": [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": "engine: primary"}}],
+        "displayTimeUnit": "ms",
+    }
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_export_chrome_trace(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer, tmp_path: Path) -> None:
+    await db_session.execute(select(text("1")))
+
+    with capsqlalchemy:
+        await db_session.execute(select(text("2")))
+
+        capsqlalchemy.export_chrome_trace(tmp_path / "partial" / "trace.json")
+
+    capsqlalchemy.export_chrome_trace(tmp_path / "trace.json")
+
+    partial_trace = json.loads((tmp_path / "partial" / "trace.json").read_text())
+    full_trace = json.loads((tmp_path / "trace.json").read_text())
+
+    assert [span["args"]["sql"] for span in get_spans(partial_trace, "statement")] == ["SELECT 2"]
+    assert [span["args"]["sql"] for span in get_spans(full_trace, "statement")] == ["SELECT 1", "SELECT 2"]
@@ -0,0 +1,199 @@
+import datetime
+import decimal
+import json
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from pytest_capsqlalchemy import SQLAlchemyCapturer
+from pytest_capsqlalchemy.expression import SQLExpression, SQLExpressionType
+from pytest_capsqlalchemy.workload import Workload, WorkloadStatement, replay_workload
+from tests.conftest import Order
+
+DIALECT = "postgresql+asyncpg"
+
+
+async def capture_workload(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> Workload:
+    db_session.add(Order(recipient="John Doe"))
+    await db_session.commit()
+
+    await db_session.execute(select(Order).where(Order.recipient == "John Doe").limit(1))
+    await db_session.execute(insert(Order), [{"recipient": "Jane Doe"}, {"recipient": "Max Mustermann"}])
+    await db_session.commit()
+
+    return Workload.from_expressions(capsqlalchemy.captured_expressions)
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_workload_from_expressions(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer) -> None:
+    workload = await capture_workload(db_session, capsqlalchemy)
+
+    assert workload.dialect == DIALECT
+    assert workload.statements == [
+        WorkloadStatement(SQLExpressionType.BEGIN),
+        WorkloadStatement(
+            SQLExpressionType.INSERT,
+            "INSERT INTO orders (recipient) VALUES ($1::VARCHAR) RETURNING orders.id",
+            [("John Doe",)],
+        ),
+        WorkloadStatement(SQLExpressionType.COMMIT),
+        WorkloadStatement(SQLExpressionType.BEGIN),
+        WorkloadStatement(
+            SQLExpressionType.SELECT,
+            "SELECT orders.id, orders.recipient \nFROM orders \n"
+            "WHERE orders.recipient = $1::VARCHAR \n LIMIT $2::INTEGER",
+            [("John Doe", 1)],
+        ),
+        WorkloadStatement(
+            SQLExpressionType.INSERT,
+            "INSERT INTO orders (recipient) VALUES ($1::VARCHAR)",
+            [("Jane Doe",), ("Max Mustermann",)],
+        ),
+        WorkloadStatement(SQLExpressionType.COMMIT),
+    ]
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_save_workload(db_session: AsyncSession, capsqlalchemy: SQLAlchemyCapturer, tmp_path: Path) -> None:
+    workload = await capture_workload(db_session, capsqlalchemy)
+
+    capsqlalchemy.save_workload(tmp_path / "workload.json")
+
+    assert Workload.load(tmp_path / "workload.json") == workload
+
+
+def test_save_and_load_workload_parameter_types(tmp_path: Path) -> None:
+    parameters = (
+        None,
+        True,
+        1,
+        1.5,
+        "text",
+        [1, 2, 3],
+        datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        datetime.date(2024, 1, 2),
+        datetime.time(3, 4, 5),
+        datetime.timedelta(hours=1, microseconds=5),
+        decimal.Decimal("1.10"),
+        uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        b"\x00\xff",
+    )
+    workload = Workload(
+        dialect=DIALECT,
+        statements=[
+            WorkloadStatement(SQLExpressionType.SELECT, "SELECT 1", [parameters]),
+            WorkloadStatement(SQLExpressionType.SELECT, "SELECT 2", [{"name": decimal.Decimal("2.5")}]),
+        ],
+    )
+
+    workload.save(tmp_path / "workload.json")
+
+    assert json.loads((tmp_path / "workload.json").read_text())["version"] == 1
+    assert Workload.load(tmp_path / "workload.json") == workload
+
+
+def test_save_workload_unsupported_parameter(tmp_path: Path) -> None:
+    workload = Workload(DIALECT, [WorkloadStatement(SQLExpressionType.SELECT, "SELECT 1", [(object(),)])])
+
+    with pytest.raises(TypeError, match="Parameters of type object can't be saved in a workload file"):
+        workload.save(tmp_path / "workload.json")
+
+
+def test_load_workload_unsupported_version(tmp_path: Path) -> None:
+    (tmp_path / "workload.json").write_text(json.dumps({"version": 2, "dialect": DIALECT, "statements": []}))
+
+    with pytest.raises(ValueError, match="Unsupported workload file version 2"):
+        Workload.load(tmp_path / "workload.json")
+
+
+def test_workload_from_expressions_not_captured_from_engine() -> None:
+    with pytest.raises(ValueError, match="exactly one dialect, got none"):
+        Workload.from_expressions([SQLExpression(select(Order))])
+
+    with pytest.raises(ValueError, match="Only expressions captured from an engine can be added to a workload"):
+        WorkloadStatement.from_expression(SQLExpression(select(Order)))
+
+
+@pytest.mark.capsqlalchemy(capture_details=True)
+async def test_replay_workload(
+    db_engine: AsyncEngine,
+    db_session: AsyncSession,
+    capsqlalchemy: SQLAlchemyCapturer,
+) -> None:
+    workload = await capture_workload(db_session, capsqlalchemy)
+
+    result = await replay_workload(db_engine, workload, workers=3, iterations=2)
+
+    assert result.workers == 3
+    assert result.iterations == 2
+    assert result.error_count == 0
+    assert result.statement_count == 5 * 3 * 2
+    assert result.throughput > 0
+    assert result.latency.p95 >= result.latency.median >= result.latency.min > 0
+    assert str(result).startswith("30 statements (0 errors) in ")
+
+
+async def test_replay_workload_orm_flush_of_many_rows(
+    db_engine: AsyncEngine,
+    db_session: AsyncSession,
+    capsqlalchemy: SQLAlchemyCapturer,
+) -> None:
+    db_session.add_all([Order(recipient="A"), Order(recipient="B")])
+    await db_session.flush()
+
+    # The rows are inserted with a single "insertmanyvalues" INSERT, expanded for the rows of each batch
+    _, insert_statement = Workload.from_expressions(capsqlalchemy.captured_expressions).statements
+
+    assert insert_statement.sql.startswith(
+        "INSERT INTO orders (recipient) SELECT p0::VARCHAR FROM (VALUES ($1::VARCHAR, 0), ($2::VARCHAR, 1))"
+    )
+    assert insert_statement.parameters == [("A", "B")]
+
+    result = await replay_workload(db_engine, Workload.from_expressions(capsqlalchemy.captured_expressions), workers=2)
+
+    assert result.error_count == 0
+    assert result.statement_count == 2
+
+
+async def test_replay_workload_errors(db_engine: AsyncEngine) -> None:
+    workload = Workload(
+        DIALECT,
+        [
+            WorkloadStatement(SQLExpressionType.SELECT, "SELECT 1 FROM missing_table", [()]),
+            WorkloadStatement(SQLExpressionType.SELECT, "SELECT $1::INTEGER", [(1,)]),
+            WorkloadStatement(SQLExpressionType.ROLLBACK),
+        ],
+    )
+
+    result = await replay_workload(db_engine, workload, workers=2)
+
+    assert result.error_count == 2
+    assert result.statement_count == 4
+
+
+@pytest.mark.parametrize(
+    ("workload", "workers", "iterations", "error"),
+    [
+        (Workload(DIALECT, [WorkloadStatement(SQLExpressionType.COMMIT)]), 0, 1, "At least one worker and iteration"),
+        (Workload(DIALECT, [WorkloadStatement(SQLExpressionType.COMMIT)]), 1, 0, "At least one worker and iteration"),
+        (Workload(DIALECT, [WorkloadStatement(SQLExpressionType.BEGIN)]), 1, 1, "The workload has no statements"),
+        (
+            Workload("sqlite+pysqlite", []),
+            1,
+            1,
+            "captured with sqlite\\+pysqlite, can't replay it with postgresql\\+asyncpg",
+        ),
+    ],
+)
+async def test_replay_workload_invalid(
+    db_engine: AsyncEngine,
+    workload: Workload,
+    workers: int,
+    iterations: int,
+    error: str,
+) -> None:
+    with pytest.raises(ValueError, match=error):
+        await replay_workload(db_engine, workload, workers=workers, iterations=iterations)